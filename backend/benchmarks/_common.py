@@ -0,0 +1,83 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database import create_async_db_engine
+
+from models.item import Item
+from models.user import User
+
+CATEGORIES = ["Travel", "Health", "Finance", "Work", "Personal", "Subscriptions"]
+
+
+def temp_engine():
+    """Engine on a fresh SQLite file in a temporary directory"""
+    path = os.path.join(tempfile.mkdtemp(prefix="remindes-bench-"), "bench.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def async_engine_for(engine) -> AsyncEngine:
+    """Async engine (aiosqlite) on the same database file as a temp_engine()"""
+    return create_async_db_engine(f"sqlite+aiosqlite:///{engine.url.database}")
+
+
+def seed_user(session: Session, email: str, item_count: int, seed: int = 42) -> User:
+    """Create a user owning item_count items with a spread of expiry dates"""
+    rng = random.Random(seed)
+    user = User(email=email, full_name="Bench User")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+
+    today = date.today()
+    items = []
+    for n in range(item_count):
+        is_subscription = rng.random() < 0.3
+        offset = timedelta(days=rng.randint(-60, 400))
+        item = Item(
+            name=f"Item {n}",
+            category="Subscriptions" if is_subscription else rng.choice(CATEGORIES[:-1]),
+            type="subscription" if is_subscription else "document",
+            expiration_date=None if is_subscription else today + offset,
+            renewal_date=today + offset if is_subscription else None,
+            billing_cycle="monthly" if is_subscription else None,
+            user_id=user.id,
+        )
+        item.refresh_effective_expiry()
+        items.append(item)
+    session.add_all(items)
+    session.commit()
+    return user
+
+
+def measure(fn, repeat: int = 50) -> dict:
+    """Run fn repeat times and return latency percentiles in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[int(len(samples) * 0.95) - 1],
+        "mean": statistics.fmean(samples),
+    }
+
+
+def print_row(label: str, result: dict):
+    print(f"{label:<32} p50={result['p50']:8.3f}ms  p95={result['p95']:8.3f}ms  mean={result['mean']:8.3f}ms")
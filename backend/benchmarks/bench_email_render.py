@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark rendering expiry warning emails (HTML + plain text) with the
+template engine in utils/email_templates.py: reading and compiling the two
+templates for every message versus the precompiled render, one call per message and as a
+render_many() batch the way the expiry sweep uses it.
+
+Usage:
+    python benchmarks/bench_email_render.py
+"""
+import time
+from datetime import date, timedelta
+
+import _common  # noqa: F401 (puts backend/ on sys.path)
+
+from utils.email_service import render_notification_emails
+from utils.email_templates import TEMPLATE_DIR, CompiledTemplate, TemplateEngine
+
+MESSAGES = 5000
+
+
+def _rows(count: int) -> list[dict]:
+    today = date.today()
+    return [
+        {
+            "user_name": f"User {n}",
+            "item_name": f"Passport {n}",
+            "item_type": "Document",
+            "expiry_date": today + timedelta(days=n % 30),
+            "days": n % 30,
+        }
+        for n in range(count)
+    ]
+
+
+def _values(row: dict) -> dict:
+    return {
+        **row,
+        "expiry_date": row["expiry_date"].strftime('%B %d, %Y'),
+        "plural": "s" if row["days"] != 1 else "",
+        "frontend_url": "http://localhost:5173",
+    }
+
+
+def _report(label: str, seconds: float):
+    print(f"{label:<32} {MESSAGES / seconds:10.0f} emails/s  per email={seconds / MESSAGES * 1_000_000:8.1f}us")
+
+
+def main():
+    rows = _rows(MESSAGES)
+    print(f"--- render {MESSAGES} expiry warning emails (HTML + text) ---")
+
+    loader = TemplateEngine(TEMPLATE_DIR)
+    started = time.perf_counter()
+    for row in rows:
+        values = _values(row)
+        for name, autoescape in (("expiry_warning.html", True), ("expiry_warning.txt", False)):
+            CompiledTemplate(name, loader._read(name), autoescape).render(values)
+    _report("compile per message", time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for row in rows:
+        render_notification_emails("expiry_warning", [row])
+    _report("precompiled, one per call", time.perf_counter() - started)
+
+    started = time.perf_counter()
+    render_notification_emails("expiry_warning", rows)
+    _report("precompiled, render_many batch", time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark finding the reminders due on an ordinary morning (the day after a
+full sweep) across 100k items: the previous candidate scan (every expired or
+in-window item, with NOT EXISTS probes against recent notifications) versus
+reading due rows from reminder_schedule.
+
+Both loops only read, walking their index in chunks of 1000 the way
+run_expiry_sweep does.
+
+Usage:
+    python benchmarks/bench_expiry_sweep.py
+"""
+from datetime import date, datetime, timedelta
+
+from _common import temp_engine, seed_user, measure, print_row
+
+from sqlalchemy import and_, exists, func, or_, tuple_
+from sqlmodel import Session, select
+
+from models.item import Item
+from models.notification import Notification
+from models.reminder_schedule import ReminderSchedule
+from models.user import User
+from utils.expiry_sweep import EXPIRED_WINDOW, _due_query, run_expiry_sweep
+from utils.reminder_schedule import rebuild_reminder_schedule
+
+USERS = 200
+ITEMS_PER_USER = 500
+CHUNK_SIZE = 1000
+# The old scan repeated warnings daily
+EXPIRY_WARNING_WINDOW = timedelta(days=1)
+
+
+def _recent_notification(notification_type: str, since: datetime):
+    return exists().where(
+        and_(
+            Notification.item_id == Item.id,
+            Notification.user_id == Item.user_id,
+            Notification.notification_type == notification_type,
+            Notification.created_at >= since,
+        )
+    )
+
+
+def _candidate_query(after: tuple, now: datetime, today: date, horizon: date):
+    """The candidate query the sweep used before reminder_schedule"""
+    recent_warning = _recent_notification("expiry_warning", now - EXPIRY_WARNING_WINDOW)
+    recent_expired = _recent_notification("expired", now - EXPIRED_WINDOW)
+    return (
+        select(Item, User.id, User.email, User.full_name, User.notification_days_before, User.daily_digest,
+               recent_warning.label("has_recent_warning"), recent_expired.label("has_recent_expired"))
+        .join(User, User.id == Item.user_id)
+        .where(User.email_notifications == True)
+        .where(Item.effective_expiry_date.isnot(None))
+        .where(Item.effective_expiry_date <= horizon)
+        .where(tuple_(Item.effective_expiry_date, Item.id) > after)
+        .where(or_(
+            and_(Item.effective_expiry_date < today, ~recent_expired),
+            and_(Item.effective_expiry_date >= today, ~recent_warning),
+        ))
+        .order_by(Item.effective_expiry_date, Item.id)
+        .limit(CHUNK_SIZE)
+    )
+
+
+def _scan_items(session: Session, now: datetime, today: date) -> int:
+    horizon = today + timedelta(days=session.exec(select(func.max(User.notification_days_before))).one())
+    after, found = (date.min, 0), 0
+    while rows := session.exec(_candidate_query(after, now, today, horizon)).all():
+        found += len(rows)
+        after = (rows[-1][0].effective_expiry_date, rows[-1][0].id)
+        session.expunge_all()
+    return found
+
+
+def _scan_schedule(session: Session, today: date) -> int:
+    after, found = (date.min, 0), 0
+    while rows := session.exec(_due_query(after, CHUNK_SIZE, today, [])).all():
+        found += len(rows)
+        after = (rows[-1][0].fire_date, rows[-1][0].id)
+        session.expunge_all()
+    return found
+
+
+def main():
+    engine = temp_engine()
+    with Session(engine) as session:
+        for n in range(USERS):
+            seed_user(session, f"user{n}@example.com", ITEMS_PER_USER, seed=n)
+        rebuild_reminder_schedule(session)
+        # Day one notifies everything that is due, as a first sweep would
+        first = run_expiry_sweep(session, send_emails=False, chunk_size=CHUNK_SIZE)
+        session.expunge_all()
+
+        tomorrow = date.today() + timedelta(days=1)
+        next_morning = datetime.utcnow() + timedelta(days=1)
+        due_old = _scan_items(session, next_morning, tomorrow)
+        due_new = _scan_schedule(session, tomorrow)
+        scheduled = session.exec(select(func.count()).select_from(ReminderSchedule)).one()
+
+        print(f"--- next-morning due reminders among {USERS * ITEMS_PER_USER} items "
+              f"(day one created {first.notifications_created}; {scheduled} scheduled) ---")
+        print_row(f"item scan (before, {due_old} due)", measure(lambda: _scan_items(session, next_morning, tomorrow), repeat=10))
+        print_row(f"reminder_schedule ({due_new} due)", measure(lambda: _scan_schedule(session, tomorrow), repeat=10))
+
+
+if __name__ == "__main__":
+    main()
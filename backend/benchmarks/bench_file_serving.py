@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Throughput of GET /items/{id}/file for a large attachment.
+
+Starts the API under uvicorn on a throwaway SQLite file (as load_test.py
+does), seeds one user whose item has a --size-mb PDF in the sharded local
+storage, then measures over HTTP:
+
+- full downloads (what every preview cost before): MB/s
+- revalidation with If-None-Match: 304s per second, no body
+- 1MB Range reads at random offsets, as a PDF viewer fetching pages
+
+Usage:
+    python benchmarks/bench_file_serving.py [--size-mb 50] [--requests 40] [--concurrency 4]
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+import jwt
+
+from _common import seed_user
+from load_test import BACKEND_DIR, SECRET_KEY, _free_port, _start_server
+
+from sqlmodel import Session, create_engine, select
+
+from models.item import Item
+from utils.storage import LocalStorage
+
+PAGE_SIZE = 1024 * 1024
+
+
+def _attachment(upload_dir: str, size_mb: int) -> str:
+    """Write a random PDF into the storage; returns its file_path"""
+    storage = LocalStorage(upload_dir)
+    staged = os.path.join(storage.staging_dir, "bench.part")
+    digest = hashlib.sha256()
+    with open(staged, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        digest.update(b"%PDF-1.4\n")
+        for _ in range(size_mb):
+            chunk = os.urandom(1024 * 1024)
+            f.write(chunk)
+            digest.update(chunk)
+    key = f"{digest.hexdigest()}.pdf"
+    asyncio.run(storage.put(key, staged))
+    return f"/uploads/{key}"
+
+
+async def _run(client: httpx.AsyncClient, requests: int, concurrency: int, make_request) -> dict:
+    latencies = []
+    received = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal received
+        for _ in remaining:
+            started = time.perf_counter()
+            method, url, headers, expected = make_request()
+            response = await client.request(method, url, headers=headers)
+            assert response.status_code == expected, response.status_code
+            received += len(response.content)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "mb_per_s": received / elapsed / 1024 / 1024,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+async def _bench(base_url: str, token: str, item_id: int, size: int, args):
+    url = f"/items/{item_id}/file"
+    rng = random.Random(42)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, headers={"Authorization": f"Bearer {token}"}, limits=limits, timeout=60
+    ) as client:
+        etag = (await client.get(url)).headers["etag"]
+        cases = {
+            "full download (200)": lambda: ("GET", url, None, 200),
+            "revalidation (304)": lambda: ("GET", url, {"If-None-Match": etag}, 304),
+            "1MB page (206 Range)": lambda: (
+                "GET", url, {"Range": f"bytes={(start := rng.randrange(0, size - PAGE_SIZE))}-{start + PAGE_SIZE - 1}"}, 206
+            ),
+        }
+        print(f"--- {size / 1024 / 1024:.0f}MB attachment, {args.requests} requests, concurrency {args.concurrency} ---")
+        for label, make_request in cases.items():
+            await _run(client, min(args.requests, 5), args.concurrency, make_request)  # warm up
+            result = await _run(client, args.requests, args.concurrency, make_request)
+            print(
+                f"{label:<24} {result['rps']:8.1f} req/s  {result['mb_per_s']:8.1f} MB/s  "
+                f"p50={result['p50']:8.2f}ms  p95={result['p95']:8.2f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default=BACKEND_DIR, help="backend directory to serve (default: this tree)")
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--accel-redirect", default="", help="UPLOAD_ACCEL_REDIRECT for the server (needs nginx in front)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="remindes-files-")
+    db_path = os.path.join(work_dir, "files.db")
+    file_path = _attachment(os.path.join(work_dir, "uploads"), args.size_mb)
+    port = _free_port()
+    os.environ["UPLOAD_ACCEL_REDIRECT"] = args.accel_redirect
+    server = _start_server(os.path.abspath(args.app_dir), db_path, port, workers=1)
+    try:
+        # The server created the schema on startup; seed the file directly
+        engine = create_engine(f"sqlite:///{db_path}")
+        with Session(engine) as session:
+            user = seed_user(session, "files@example.com", 1)
+            item = session.exec(select(Item).where(Item.user_id == user.id)).one()
+            item.file_path = file_path
+            session.add(item)
+            session.commit()
+            token = jwt.encode({"sub": str(user.id)}, SECRET_KEY, algorithm="HS256")
+            item_id = item.id
+        engine.dispose()
+
+        size = args.size_mb * 1024 * 1024 + len(b"%PDF-1.4\n")
+        asyncio.run(_bench(f"http://127.0.0.1:{port}", token, item_id, size, args))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /items page 100 (limit 100): offset pagination with a total
+count versus cursor pagination, for one user owning 20k items.
+
+Usage:
+    python benchmarks/bench_item_pagination.py
+"""
+import asyncio
+
+from _common import temp_engine, async_engine_for, seed_user, measure, print_row
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from routes.items.search import list_items
+
+ITEM_COUNT = 20_000
+PAGE = 100
+LIMIT = 100
+
+
+loop = asyncio.new_event_loop()
+
+
+def _list(session, user, **kwargs):
+    params = dict(
+        skip=0, limit=LIMIT, category=None, item_type=None, search=None,
+        sort_by="created_at", sort_order="desc", pagination="offset",
+        cursor=None, include_total=None,
+    )
+    params.update(kwargs)
+    return loop.run_until_complete(list_items(session=session, user=user, **params))
+
+
+def main():
+    engine = temp_engine()
+    with Session(engine) as seed_session:
+        user = seed_user(seed_session, "pages@example.com", ITEM_COUNT)
+        seed_session.refresh(user)
+        seed_session.expunge(user)
+
+    session = AsyncSession(async_engine_for(engine))
+
+    # Walk the cursor chain to find the cursor that starts page 100
+    cursor = None
+    for _ in range(PAGE - 1):
+        cursor = _list(session, user, pagination="cursor", cursor=cursor)["next_cursor"]
+
+    print(f"--- page {PAGE} of {ITEM_COUNT} items, limit {LIMIT} ---")
+    print_row("offset + COUNT(*)", measure(lambda: _list(session, user, skip=(PAGE - 1) * LIMIT)))
+    print_row("offset, no total", measure(lambda: _list(session, user, skip=(PAGE - 1) * LIMIT, include_total=False)))
+    print_row("cursor", measure(lambda: _list(session, user, pagination="cursor", cursor=cursor)))
+    print_row("cursor + COUNT(*)", measure(lambda: _list(session, user, pagination="cursor", cursor=cursor, include_total=True)))
+    loop.run_until_complete(session.close())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Benchmark /items/stats: the single aggregate query (cache miss) versus a
+cached lookup, for users owning 20, 1k and 10k items.
+
+Usage:
+    python benchmarks/bench_item_stats.py
+"""
+from _common import temp_engine, seed_user, measure, print_row
+
+from sqlmodel import Session
+
+from utils import item_stats
+
+SIZES = (20, 1_000, 10_000)
+
+
+def main():
+    engine = temp_engine()
+    with Session(engine) as session:
+        for size in SIZES:
+            user = seed_user(session, f"user{size}@example.com", size)
+
+            def cold():
+                item_stats.invalidate_item_stats(user.id)
+                item_stats.get_item_stats_cached(session, user.id)
+
+            def warm():
+                item_stats.get_item_stats_cached(session, user.id)
+
+            print(f"--- {size} items ---")
+            print_row("aggregate query (miss)", measure(cold))
+            print_row("cached (hit)", measure(warm, repeat=1000))
+
+    print(item_stats.stats_metrics())
+
+
+if __name__ == "__main__":
+    main()
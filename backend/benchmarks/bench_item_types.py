@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /item-types: querying and parsing every active type and
+encoding the payload per request versus the pre-serialized catalog
+snapshot, for the whole list and a category filter.
+
+Usage:
+    python benchmarks/bench_item_types.py
+"""
+import json
+
+from _common import CATEGORIES, temp_engine, measure, print_row
+
+from fastapi.encoders import jsonable_encoder
+from sqlmodel import Session, select
+
+from models.item_type import ItemType
+from utils import item_type_catalog
+from utils.item_type_catalog import item_type_dict
+
+TYPE_COUNT = 120
+FIELDS = [
+    {"name": "expiration_date", "label": "Expiration Date", "field_type": "date", "required": True},
+    {"name": "document_number", "label": "Document Number", "field_type": "text", "placeholder": "AB123456"},
+    {"name": "issuing_country", "label": "Issuing Country", "field_type": "select", "options": ["US", "UK", "DE", "FR"]},
+    {"name": "notes", "label": "Notes", "field_type": "textarea"},
+]
+
+
+def per_request(session, category=None):
+    query = select(ItemType).where(ItemType.is_active == True)
+    if category:
+        query = query.where(ItemType.category == category)
+    item_types = session.exec(query.order_by(ItemType.category, ItemType.name)).all()
+    result = [item_type_dict(item_type) for item_type in item_types]
+    return json.dumps(jsonable_encoder({"item_types": result, "total": len(result)})).encode()
+
+
+def main():
+    engine = temp_engine()
+    with Session(engine) as session:
+        session.add_all([
+            ItemType(
+                name=f"Type {n}", category=CATEGORIES[n % len(CATEGORIES)],
+                item_class="subscription" if n % 3 == 0 else "document", fields_config=json.dumps(FIELDS),
+            )
+            for n in range(TYPE_COUNT)
+        ])
+        session.commit()
+
+        catalog = item_type_catalog.get_catalog(engine)
+        print(f"--- {TYPE_COUNT} item types, {len(catalog.list().body) / 1024:.1f}KB payload ---")
+        print_row("query + parse + encode", measure(lambda: per_request(session)))
+        print_row("catalog snapshot", measure(lambda: item_type_catalog.get_catalog(engine).list(), repeat=10_000))
+        print_row("query (category filter)", measure(lambda: per_request(session, "Travel")))
+        print_row("catalog (category filter)", measure(
+            lambda: item_type_catalog.get_catalog(engine).list("Travel"), repeat=10_000
+        ))
+        print_row("catalog reload (miss)", measure(
+            lambda: (item_type_catalog.invalidate_item_type_catalog(), item_type_catalog.get_catalog(engine))
+        ))
+
+    print(item_type_catalog.catalog_metrics())
+
+
+if __name__ == "__main__":
+    main()
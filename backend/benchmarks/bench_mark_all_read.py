@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark marking 10k unread notifications as read: the previous ORM loop
+(load, mutate and flush every row) versus the single bulk UPDATE in
+notification_service.mark_all_read.
+
+Usage:
+    python benchmarks/bench_mark_all_read.py
+"""
+import statistics
+import time
+from datetime import datetime
+
+from _common import temp_engine, seed_user, print_row
+
+from sqlmodel import Session, select, update
+
+from models.item import Item
+from models.notification import Notification
+from utils.notification_service import mark_all_read
+
+NOTIFICATIONS = 10_000
+REPEAT = 5
+
+
+def _mark_all_read_orm(user_id: int, session: Session) -> int:
+    """The per-object implementation mark_all_read used to have"""
+    notifications = session.exec(
+        select(Notification).where(Notification.user_id == user_id, Notification.is_read == False)
+    ).all()
+    for notification in notifications:
+        notification.is_read = True
+        notification.read_at = datetime.utcnow()
+        session.add(notification)
+    session.commit()
+    return len(notifications)
+
+
+def _measure(session: Session, user_id: int, fn) -> dict:
+    samples = []
+    for _ in range(REPEAT):
+        session.exec(update(Notification).values(is_read=False, read_at=None))
+        session.commit()
+        session.expunge_all()
+        started = time.perf_counter()
+        assert fn(user_id, session) == NOTIFICATIONS
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {"p50": statistics.median(samples), "p95": samples[-1], "mean": statistics.fmean(samples)}
+
+
+def main():
+    engine = temp_engine()
+    with Session(engine) as session:
+        user = seed_user(session, "notified@example.com", 10)
+        user_id = user.id
+        item_id = session.exec(select(Item.id).where(Item.user_id == user_id)).first()
+        session.add_all([
+            Notification(user_id=user_id, item_id=item_id, title=f"n{n}", message="m")
+            for n in range(NOTIFICATIONS)
+        ])
+        session.commit()
+
+        print(f"--- mark {NOTIFICATIONS} unread notifications read ---")
+        print_row("ORM loop (before)", _measure(session, user_id, _mark_all_read_orm))
+        print_row("bulk UPDATE", _measure(session, user_id, mark_all_read))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark SMTP throughput against the local stand-in (utils/local_smtp.py):
+one relay session per message (smtp_relay.deliver_message, what every send
+paid before) versus pooled sessions carrying many messages each
+(smtp_relay.send_many), sending from several threads like the outbox
+workers do.
+
+The stand-in has no TLS, so --connect-ms delays its greeting to stand in
+for the TCP + STARTTLS handshake with a remote relay.
+
+Usage:
+    python benchmarks/bench_smtp_pool.py
+    python benchmarks/bench_smtp_pool.py --messages 2000 --threads 4 --connect-ms 0
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import _common  # noqa: F401 (puts backend/ on sys.path)
+
+from utils import smtp_relay
+from utils.local_smtp import LocalSMTPServer
+
+
+def _messages(count: int):
+    return [
+        smtp_relay.build_message(f"user{n}@example.com", f"Reminder {n}", "<p>Your passport expires soon</p>")
+        for n in range(count)
+    ]
+
+
+def _one_session_per_message(messages, threads: int, batch: int):
+    def send(chunk):
+        for msg in chunk:
+            smtp_relay.deliver_message(msg)
+
+    chunks = [messages[n:n + batch] for n in range(0, len(messages), batch)]
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(send, chunks))
+
+
+def _pooled(messages, threads: int, batch: int):
+    pool = smtp_relay.SMTPConnectionPool(size=threads)
+    chunks = [messages[n:n + batch] for n in range(0, len(messages), batch)]
+    with ThreadPoolExecutor(threads) as executor:
+        results = [r for chunk in executor.map(pool.send_many, chunks) for r in chunk]
+    pool.close()
+    assert results == [None] * len(messages)
+
+
+def _run(label: str, fn, server: LocalSMTPServer, messages, threads: int, batch: int):
+    server.messages.clear()
+    connections = server.connections
+    started = time.perf_counter()
+    fn(messages, threads, batch)
+    seconds = time.perf_counter() - started
+    assert len(server.messages) == len(messages)
+    print(
+        f"{label:<32} {len(messages) / seconds:9.1f} msg/s  "
+        f"total={seconds * 1000:9.1f}ms  sessions={server.connections - connections}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=2, help="sending threads (outbox workers)")
+    parser.add_argument("--batch", type=int, default=10, help="messages per send_many call (EMAIL_OUTBOX_BATCH)")
+    parser.add_argument("--connect-ms", type=float, default=20.0, help="simulated connect + TLS handshake")
+    args = parser.parse_args()
+
+    with LocalSMTPServer(connect_delay_seconds=args.connect_ms / 1000) as server:
+        smtp_relay.SMTP_RELAY_HOST = server.host
+        smtp_relay.SMTP_RELAY_PORT = server.port
+        smtp_relay.SMTP_RELAY_STARTTLS = False
+        messages = _messages(args.messages)
+
+        print(
+            f"--- {args.messages} messages, {args.threads} threads, "
+            f"batch {args.batch}, connect {args.connect_ms:g}ms ---"
+        )
+        _run("session per message (before)", _one_session_per_message, server, messages, args.threads, args.batch)
+        _run("pooled send_many", _pooled, server, messages, args.threads, args.batch)
+
+
+if __name__ == "__main__":
+    main()
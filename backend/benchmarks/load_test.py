@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the hot read routes at a fixed concurrency.
+
+Starts the API under uvicorn on a throwaway SQLite file, seeds one user,
+then fires requests at each endpoint with a fixed number of in-flight
+requests and reports requests/sec per worker plus latency percentiles.
+
+To compare two versions, point --app-dir at a checkout of the other one:
+
+    git worktree add /tmp/remindes-before <commit>
+    python benchmarks/load_test.py --app-dir /tmp/remindes-before/backend
+    python benchmarks/load_test.py
+
+Usage:
+    python benchmarks/load_test.py [--concurrency 32] [--requests 2000] [--workers 1]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import jwt
+
+from _common import seed_user
+
+from sqlmodel import Session, create_engine
+
+SECRET_KEY = "load-test-secret"
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(app_dir: str, db_path: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, SECRET_KEY=SECRET_KEY, DATABASE_URL=f"sqlite:///{db_path}")
+    env.pop("ASYNC_DATABASE_URL", None)
+    # The app logs every request; keep that out of the report
+    server_log = open(os.path.join(os.path.dirname(db_path), "server.log"), "w")
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--app-dir", app_dir, "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+            "--timeout-keep-alive", "60",
+        ],
+        cwd=os.path.dirname(db_path),
+        env=env,
+        stdout=server_log,
+        stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("❌ Server did not start within 30 seconds")
+
+
+async def _run(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                ok = response.status_code == 200
+            except httpx.TransportError:
+                ok = False
+            latencies.append((time.perf_counter() - started) * 1000)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "errors": errors,
+    }
+
+
+async def _load(base_url: str, token: str, args) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30) as client:
+        first_id = (await client.get("/items?limit=1")).json()["items"][0]["id"]
+        paths = [
+            "/items?limit=50",
+            "/items?limit=50&pagination=cursor",
+            "/items?search=item&limit=20",
+            f"/items/{first_id}",
+            "/items/stats",
+            "/notifications/unread-count",
+        ]
+        print(f"--- {args.requests} requests per route, concurrency {args.concurrency}, {args.workers} worker(s) ---")
+        for path in paths:
+            await _run(client, path, min(args.requests, 100), args.concurrency)  # warm up
+            result = await _run(client, path, args.requests, args.concurrency)
+            print(
+                f"{path:<36} {result['rps'] / args.workers:8.1f} req/s/worker  "
+                f"p50={result['p50']:7.2f}ms  p95={result['p95']:7.2f}ms  errors={result['errors']}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default=BACKEND_DIR, help="backend directory to serve (default: this tree)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--items", type=int, default=500, help="items owned by the load-test user")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="remindes-load-"), "load.db")
+    port = _free_port()
+    server = _start_server(os.path.abspath(args.app_dir), db_path, port, args.workers)
+    try:
+        # The server created the schema on startup; seed the file directly
+        engine = create_engine(f"sqlite:///{db_path}")
+        with Session(engine) as session:
+            user = seed_user(session, "load@example.com", args.items)
+            user.email_verified = True
+            session.add(user)
+            session.commit()
+            token = jwt.encode({"sub": str(user.id)}, SECRET_KEY, algorithm="HS256")
+        engine.dispose()
+
+        asyncio.run(_load(f"http://127.0.0.1:{port}", token, args))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
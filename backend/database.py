@@ -1,14 +1,174 @@
 import os
+import logging
+from typing import Optional
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///database.db")
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+# Connection pool (ignored for in-memory SQLite, which uses one connection per thread)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Per-connection SQLite PRAGMAs. WAL lets readers proceed during writes and
+# busy_timeout makes writers wait instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper(),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper(),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")) * -1,  # negative = KiB
+    "foreign_keys": "ON" if os.getenv("SQLITE_FOREIGN_KEYS", "true").lower() == "true" else "OFF",
+}
+
+_ALLOWED_PRAGMA_VALUES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "foreign_keys": {"ON", "OFF"},
+}
+
+
+def _validate_pragmas(pragmas: dict):
+    # PRAGMA values cannot be bound as parameters, so reject anything unexpected
+    for name, allowed in _ALLOWED_PRAGMA_VALUES.items():
+        if pragmas[name] not in allowed:
+            raise ValueError(f"❌ Invalid SQLite {name} '{pragmas[name]}'. Must be one of {sorted(allowed)}")
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    path = url.partition("://")[2]
+    return path in ("", "/:memory:") or "mode=memory" in url
+
+
+def create_db_engine(url: str = DATABASE_URL, **kwargs) -> Engine:
+    """Create an engine with pool sizing from env and SQLite PRAGMA hooks"""
+    if not url.startswith("sqlite"):
+        return create_engine(
+            url,
+            echo=False,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            **kwargs
+        )
+
+    if not _is_memory_sqlite(url) and "poolclass" not in kwargs:
+        kwargs.setdefault("pool_size", DB_POOL_SIZE)
+        kwargs.setdefault("max_overflow", DB_MAX_OVERFLOW)
+        kwargs.setdefault("pool_timeout", DB_POOL_TIMEOUT)
+
+    sqlite_engine = create_engine(url, echo=False, connect_args={"check_same_thread": False}, **kwargs)
+    install_sqlite_pragmas(sqlite_engine)
+    return sqlite_engine
+
+
+def install_sqlite_pragmas(sqlite_engine: Engine, pragmas: dict = SQLITE_PRAGMAS):
+    """Apply the PRAGMAs to every new DBAPI connection of the engine"""
+    _validate_pragmas(pragmas)
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    """Map a sync database URL onto its async driver (aiosqlite / asyncpg)"""
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme:
+        scheme = scheme.split("+", 1)[0]
+    driver = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+    return f"{driver.get(scheme, scheme)}{sep}{rest}"
+
+
+def create_async_db_engine(url: Optional[str] = None, **kwargs) -> AsyncEngine:
+    """Async counterpart of create_db_engine, sharing pool and PRAGMA settings"""
+    url = url or ASYNC_DATABASE_URL
+    if not url.startswith("sqlite"):
+        return create_async_engine(
+            url,
+            echo=False,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            **kwargs
+        )
+
+    if _is_memory_sqlite(url):
+        kwargs.setdefault("poolclass", StaticPool)
+    elif "poolclass" not in kwargs:
+        kwargs.setdefault("pool_size", DB_POOL_SIZE)
+        kwargs.setdefault("max_overflow", DB_MAX_OVERFLOW)
+        kwargs.setdefault("pool_timeout", DB_POOL_TIMEOUT)
+
+    sqlite_engine = create_async_engine(url, echo=False, connect_args={"check_same_thread": False}, **kwargs)
+    install_sqlite_pragmas(sqlite_engine.sync_engine)
+    return sqlite_engine
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url())
+
+engine = create_db_engine()
+async_engine = create_async_db_engine()
+
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
+    # FTS5 index and sync triggers for item search (no-op outside SQLite)
+    from utils.item_search import ensure_fulltext_index, register_fulltext_engine
+    if ensure_fulltext_index(engine):
+        register_fulltext_engine(async_engine.sync_engine)
+
+
+def database_self_check(check_engine: Engine = engine) -> dict:
+    """Verify connectivity and report the effective pool and PRAGMA settings"""
+    report = {
+        "dialect": check_engine.dialect.name,
+        "pool": check_engine.pool.status(),
+    }
+    with check_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        if check_engine.dialect.name == "sqlite":
+            report["sqlite_version"] = conn.execute(text("SELECT sqlite_version()")).scalar()
+            report["pragmas"] = {
+                name: conn.execute(text(f"PRAGMA {name}")).scalar()
+                for name in SQLITE_PRAGMAS
+            }
+            # e.g. in-memory databases cannot use WAL
+            effective_mode = str(report["pragmas"]["journal_mode"]).upper()
+            if effective_mode != SQLITE_PRAGMAS["journal_mode"]:
+                report["warnings"] = [
+                    f"journal_mode is {effective_mode}, requested {SQLITE_PRAGMAS['journal_mode']}"
+                ]
+    return report
+
+
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def get_async_session():
+    """
+    Async session for `async def` routes, so queries don't block the event
+    loop. Objects stay loaded after commit; lazy loads are not available.
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -8,6 +8,12 @@ It creates all tables from all models including:
 - Item (with dynamic fields support)
 - ItemType (for managing item templates)
 - Notification (for user notifications)
+- NotificationArchive (old read notifications moved out by the retention job)
+- EmailOutbox (outbound email queued for the outbox workers)
+- SweepShardRun (leases of the notification scheduler's sweep shards)
+- ReminderSchedule (reminder stages of every dated item)
+- UploadBlob (content-addressed uploads and their reference counts)
+- DigestEntry (notifications held for a user's daily digest email)
 
 Usage:
     python init_db.py
@@ -36,7 +42,12 @@ from database import DATABASE_URL, engine
 from models.user import User
 from models.item import Item
 from models.item_type import ItemType
-from models.notification import Notification
+from models.notification import Notification, NotificationArchive
+from models.email_outbox import EmailOutbox
+from models.sweep_run import SweepShardRun
+from models.reminder_schedule import ReminderSchedule
+from models.upload_blob import UploadBlob
+from models.digest_entry import DigestEntry
 
 # Configure logging
 logging.basicConfig(
@@ -1,7 +1,6 @@
 # backend/main.py
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from starlette.middleware.sessions import SessionMiddleware
 import os
@@ -12,13 +11,23 @@ from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from utils.rate_limit import limiter
 
-from database import create_db_and_tables
+from database import create_db_and_tables, database_self_check
+from utils import metrics
+from utils.auth import get_current_admin
+from utils.email_outbox import start_outbox_workers, stop_outbox_workers
+from utils.email_templates import load_email_templates
+from utils.file_validation import MAX_FILE_SIZE
+from utils.notification_scheduler import start_notification_scheduler, stop_notification_scheduler
+from utils.storage import get_storage
+from utils.thumbnails import start_thumbnail_workers, stop_thumbnail_workers
+from utils.upload_limit import UploadSizeLimitMiddleware
 from routes.auth import router as auth_router
 from routes.items import router as items_router
 from routes.notifications import router as notifications_router
 from routes.item_types import router as item_types_router
 from routes.payments import router as payments_router
 from routes.contact import router as contact_router
+from routes.uploads import router as uploads_router
 
 load_dotenv()
 
@@ -45,9 +54,11 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-# ✅ Serve uploaded files
-os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# ✅ Upload storage (local sharded directories or S3, see utils/storage.py)
+get_storage()
+
+# ✅ Metrics providers of every subsystem, including those no route imports
+metrics.load_providers()
 
 # ✅ CORS Configuration (with production support)
 FRONTEND_ORIGINS = [
@@ -65,6 +76,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # ✅ Session Middleware (required for OAuth)
@@ -80,23 +92,8 @@ app.add_middleware(
 )
 
 
-# ✅ File upload size limit middleware (10MB)
-@app.middleware("http")
-async def limit_upload_size(request: Request, call_next):
-    """Limit file upload size to 10MB"""
-    if request.method == "POST":
-        content_type = request.headers.get("content-type", "")
-        if "multipart/form-data" in content_type:
-            content_length = request.headers.get("content-length")
-            if content_length and int(content_length) > 10 * 1024 * 1024:  # 10MB
-                logger.warning(f"File upload too large: {content_length} bytes from {request.client.host}")
-                return JSONResponse(
-                    status_code=413,
-                    content={"detail": "File too large. Maximum size is 10MB."}
-                )
-    
-    response = await call_next(request)
-    return response
+# ✅ File upload size limit middleware (10MB, also enforced while the body streams)
+app.add_middleware(UploadSizeLimitMiddleware, max_body_size=MAX_FILE_SIZE)
 
 
 # ✅ Security headers middleware
@@ -149,6 +146,17 @@ async def startup_event():
     logger.info("🚀 Remindes API starting up...")
     create_db_and_tables()
     logger.info(f"✅ Database initialized")
+    try:
+        db_report = database_self_check()
+        logger.info(f"✅ Database settings: {db_report}")
+        for warning in db_report.get("warnings", []):
+            logger.warning(f"⚠️ Database: {warning}")
+    except Exception as e:
+        logger.error(f"❌ Database self-check failed: {e}")
+    load_email_templates()
+    start_outbox_workers()
+    start_notification_scheduler()
+    start_thumbnail_workers()
     logger.info(f"✅ CORS enabled for: {', '.join(FRONTEND_ORIGINS)}")
     logger.info(f"✅ File uploads: 10MB limit")
     logger.info(f"✅ Rate limiting: Enabled")
@@ -158,8 +166,12 @@ async def startup_event():
 # ✅ Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Log shutdown"""
+    """Stop background workers and log shutdown"""
     logger.info("👋 Remindes API shutting down...")
+    stop_thumbnail_workers()
+    stop_notification_scheduler()
+    stop_outbox_workers()
+    await get_storage().aclose()
 
 
 # ✅ Health check endpoint
@@ -177,26 +189,32 @@ def read_root():
 @app.get("/health", tags=["Health"])
 def health_check():
     """Detailed health check with system status"""
-    import sqlite3
-    
     db_status = "ok"
+    db_settings = None
     try:
-        conn = sqlite3.connect('database.db')
-        conn.close()
+        db_settings = database_self_check()
     except Exception as e:
         db_status = f"error: {str(e)}"
         logger.error(f"Database health check failed: {e}")
     
-    uploads_status = "ok" if os.path.exists("uploads") else "error: uploads directory missing"
+    uploads_status = get_storage().status()
     
     return {
         "status": "healthy" if db_status == "ok" else "degraded",
         "database": db_status,
+        "database_settings": db_settings,
         "uploads": uploads_status,
         "version": "1.0.0"
     }
 
 
+# ✅ Process-local performance metrics (caches, query timings), admins only
+@app.get("/metrics", tags=["Health"], dependencies=[Depends(get_current_admin)])
+def metrics_snapshot():
+    """Metrics reported by this worker process"""
+    return metrics.snapshot()
+
+
 # ✅ Register routes
 app.include_router(auth_router)
 app.include_router(items_router)
@@ -204,6 +222,7 @@ app.include_router(item_types_router)
 app.include_router(notifications_router)
 app.include_router(payments_router)
 app.include_router(contact_router)
+app.include_router(uploads_router)
 
 
 # ✅ Global exception handler
@@ -0,0 +1,64 @@
+"""
+Migration: Add effective_expiry_date
+Description: Adds the denormalized items.effective_expiry_date column, its
+indexes, and backfills it from dynamic_fields and the legacy date columns.
+"""
+import sqlite3
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        try:
+            cursor.execute("ALTER TABLE items ADD COLUMN effective_expiry_date DATE")
+            print("✅ Added column: effective_expiry_date")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" in str(e).lower():
+                print("⏩ Column effective_expiry_date already exists, skipping")
+            else:
+                raise
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_items_effective_expiry_date
+            ON items(effective_expiry_date)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_items_user_id_effective_expiry_date
+            ON items(user_id, effective_expiry_date)
+        """)
+        print("✅ Created indexes")
+        
+        # Same precedence as models.item.resolve_expiry_date: dynamic
+        # expiration_date, dynamic renewal_date, then the legacy column
+        cursor.execute("""
+            UPDATE items
+            SET effective_expiry_date = COALESCE(
+                CASE WHEN json_valid(dynamic_fields) THEN
+                    COALESCE(
+                        date(json_extract(dynamic_fields, '$.expiration_date')),
+                        date(json_extract(dynamic_fields, '$.renewal_date'))
+                    )
+                END,
+                CASE type
+                    WHEN 'document' THEN expiration_date
+                    WHEN 'subscription' THEN renewal_date
+                END
+            )
+        """)
+        print(f"✅ Backfilled effective_expiry_date for {cursor.rowcount} items")
+        
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,39 @@
+"""
+Migration: Add item sort indexes
+Description: Adds the composite (user_id, <sort column>, id) indexes used by
+cursor pagination in GET /items.
+"""
+import sqlite3
+
+INDEXES = [
+    ("ix_items_user_id_created_at_id", "user_id, created_at, id"),
+    ("ix_items_user_id_updated_at_id", "user_id, updated_at, id"),
+    ("ix_items_user_id_name_id", "user_id, name, id"),
+    ("ix_items_user_id_price_id", "user_id, price, id"),
+]
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        # SECURITY NOTE: index names and columns are hardcoded constants
+        for index_name, columns in INDEXES:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON items({columns})")
+            print(f"✅ Created index: {index_name}")
+        
+        cursor.execute("ANALYZE items")
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,44 @@
+"""
+Migration: Add items full-text index
+Description: Creates the items_fts FTS5 table and its sync triggers, then
+(re)builds it from the existing items. Safe to re-run.
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+# Share the schema with the application (utils/item_search.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.item_search import FTS_SCHEMA, FTS_TABLE, REBUILD_SQL
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        for statement in FTS_SCHEMA:
+            cursor.execute(statement)
+        print(f"✅ Created {FTS_TABLE} table and triggers")
+        
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(REBUILD_SQL)
+        print(f"✅ Indexed {cursor.rowcount} items")
+        
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        
+    except sqlite3.OperationalError as e:
+        conn.rollback()
+        if "fts5" in str(e).lower():
+            print("⚠️ This SQLite build has no FTS5; search will use the ILIKE fallback")
+        else:
+            print(f"❌ Migration failed: {e}")
+            raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,33 @@
+"""
+Migration: Add notification unread index
+Description: Adds the composite (user_id, is_read) index behind the COUNT in
+GET /notifications/unread-count.
+"""
+import sqlite3
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_notifications_user_id_is_read "
+            "ON notifications(user_id, is_read)"
+        )
+        print("✅ Created index: ix_notifications_user_id_is_read")
+        
+        cursor.execute("ANALYZE notifications")
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,57 @@
+"""
+Migration: Add notification feed index and archive table
+Description: Adds the (user_id, created_at, id) index used by cursor
+pagination of GET /notifications, and the notifications_archive table that
+the retention job (utils/notification_retention.py) moves old read
+notifications into.
+"""
+import sqlite3
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_notifications_user_id_created_at_id "
+            "ON notifications(user_id, created_at, id)"
+        )
+        print("✅ Created index: ix_notifications_user_id_created_at_id")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS notifications_archive (
+                id INTEGER PRIMARY KEY,
+                notification_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                item_id INTEGER NOT NULL,
+                title VARCHAR NOT NULL,
+                message VARCHAR NOT NULL,
+                notification_type VARCHAR NOT NULL,
+                is_read BOOLEAN NOT NULL DEFAULT 1,
+                is_sent_via_email BOOLEAN NOT NULL DEFAULT 0,
+                created_at DATETIME NOT NULL,
+                read_at DATETIME,
+                archived_at DATETIME NOT NULL
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_notifications_archive_user_id "
+            "ON notifications_archive(user_id)"
+        )
+        print("✅ Created table: notifications_archive")
+        
+        cursor.execute("ANALYZE notifications")
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
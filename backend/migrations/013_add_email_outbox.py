@@ -0,0 +1,58 @@
+"""
+Migration: Add email outbox table
+Description: Creates the email_outbox table that request handlers and the
+expiry sweep queue outbound mail into, drained by the worker pool in
+utils/email_outbox.py.
+"""
+import sqlite3
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS email_outbox (
+                id INTEGER PRIMARY KEY,
+                to_email VARCHAR NOT NULL,
+                from_email VARCHAR NOT NULL,
+                from_name VARCHAR,
+                subject VARCHAR NOT NULL,
+                html_body TEXT NOT NULL,
+                plain_body TEXT,
+                notification_id INTEGER,
+                status VARCHAR NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 5,
+                next_attempt_at DATETIME NOT NULL,
+                last_error VARCHAR,
+                created_at DATETIME NOT NULL,
+                sent_at DATETIME
+            )
+        """)
+        print("✅ Created table: email_outbox")
+        
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_email_outbox_status_next_attempt_at "
+            "ON email_outbox(status, next_attempt_at)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_email_outbox_notification_id "
+            "ON email_outbox(notification_id)"
+        )
+        print("✅ Created indexes on email_outbox")
+        
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
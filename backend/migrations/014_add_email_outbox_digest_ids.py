@@ -0,0 +1,36 @@
+"""
+Migration: Add digest notification ids to the email outbox
+Description: Adds email_outbox.notification_ids, the JSON list of
+notifications a daily digest email covers, so the outbox workers can flag
+all of them as sent once the digest is delivered.
+"""
+import sqlite3
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        try:
+            cursor.execute("ALTER TABLE email_outbox ADD COLUMN notification_ids TEXT")
+            print("✅ Added column: email_outbox.notification_ids")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" in str(e).lower():
+                print("⏩ Column notification_ids already exists, skipping")
+            else:
+                raise
+        
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,55 @@
+"""
+Migration: Add sweep shard runs table
+Description: Creates the sweep_shard_runs table that the notification
+scheduler (utils/notification_scheduler.py) uses as its work queue and
+lease: one row per timezone bucket, local date and user shard.
+"""
+import sqlite3
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sweep_shard_runs (
+                id INTEGER PRIMARY KEY,
+                run_date DATE NOT NULL,
+                utc_offset_minutes INTEGER NOT NULL,
+                shard INTEGER NOT NULL,
+                shard_count INTEGER NOT NULL,
+                status VARCHAR NOT NULL DEFAULT 'pending',
+                owner VARCHAR,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_expires_at DATETIME,
+                notifications_created INTEGER NOT NULL DEFAULT 0,
+                emails_queued INTEGER NOT NULL DEFAULT 0,
+                last_error VARCHAR,
+                created_at DATETIME NOT NULL,
+                started_at DATETIME,
+                finished_at DATETIME,
+                CONSTRAINT uq_sweep_shard_runs_date_offset_shard UNIQUE (run_date, utc_offset_minutes, shard)
+            )
+        """)
+        print("✅ Created table: sweep_shard_runs")
+        
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_sweep_shard_runs_status_lease_expires_at "
+            "ON sweep_shard_runs(status, lease_expires_at)"
+        )
+        print("✅ Created index on sweep_shard_runs")
+        
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
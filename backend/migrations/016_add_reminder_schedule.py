@@ -0,0 +1,81 @@
+"""
+Migration: Add reminder schedule table
+Description: Creates the reminder_schedule table the expiry sweep reads due
+reminders from (utils/reminder_schedule.py) and schedules the next reminder
+of every dated item of an opted-in user. Items notified recently keep their
+cadence, so the first sweep after migrating does not repeat them.
+"""
+import sqlite3
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS reminder_schedule (
+                id INTEGER PRIMARY KEY,
+                item_id INTEGER NOT NULL UNIQUE REFERENCES items(id),
+                user_id INTEGER NOT NULL REFERENCES user(id),
+                kind VARCHAR NOT NULL,
+                fire_date DATE NOT NULL,
+                last_fired_date DATE,
+                updated_at DATETIME NOT NULL
+            )
+        """)
+        print("✅ Created table: reminder_schedule")
+        
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_reminder_schedule_fire_date_id "
+            "ON reminder_schedule(fire_date, id)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_reminder_schedule_user_id "
+            "ON reminder_schedule(user_id)"
+        )
+        print("✅ Created indexes on reminder_schedule")
+        
+        # Warnings start reminder_days_before the expiry date, expired notices
+        # repeat weekly; neither fires again before the next interval (UTC dates)
+        cursor.execute("""
+            INSERT INTO reminder_schedule (item_id, user_id, kind, fire_date, last_fired_date, updated_at)
+            SELECT id, user_id, kind,
+                   CASE WHEN kind = 'expiry_warning'
+                        THEN max(date(expiry, '-' || reminder_days || ' days'), date('now'),
+                                 COALESCE(date(last_warning, '+1 day'), ''))
+                        ELSE max(date(expiry, '+1 day'), date('now'),
+                                 COALESCE(date(last_expired, '+7 days'), ''))
+                   END,
+                   date(max(COALESCE(last_warning, ''), COALESCE(last_expired, ''))),
+                   datetime('now')
+            FROM (
+                SELECT i.id, i.user_id, i.effective_expiry_date AS expiry,
+                       COALESCE(i.reminder_days_before, u.notification_days_before) AS reminder_days,
+                       CASE WHEN i.effective_expiry_date >= date('now') THEN 'expiry_warning' ELSE 'expired' END AS kind,
+                       (SELECT max(created_at) FROM notifications n
+                        WHERE n.item_id = i.id AND n.notification_type = 'expiry_warning') AS last_warning,
+                       (SELECT max(created_at) FROM notifications n
+                        WHERE n.item_id = i.id AND n.notification_type = 'expired') AS last_expired
+                FROM items i
+                JOIN user u ON u.id = i.user_id
+                WHERE i.effective_expiry_date IS NOT NULL
+                  AND u.email_notifications = 1
+                  AND i.id NOT IN (SELECT item_id FROM reminder_schedule)
+            )
+        """)
+        print(f"✅ Scheduled reminders for {cursor.rowcount} items")
+        
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,106 @@
+"""
+Migration: Add multi-stage reminders
+Description: Adds the reminder_offsets columns to items and user, and
+rebuilds reminder_schedule with one row per (item, stage) - a warning stage
+"before:<days>" and the repeating "expired" stage - under a unique
+(item_id, stage) constraint. Existing rows are carried over: a warning
+already sent in the current window counts as fired, and the expired stage
+keeps its weekly cadence.
+"""
+import sqlite3
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        # SECURITY NOTE: table names are hardcoded constants, not user input
+        for table in ("items", "user"):
+            try:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN reminder_offsets VARCHAR")
+                print(f"✅ Added column: {table}.reminder_offsets")
+            except sqlite3.OperationalError as e:
+                if "duplicate column name" not in str(e).lower():
+                    raise
+                print(f"⏩ Column {table}.reminder_offsets already exists, skipping")
+        
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(reminder_schedule)")]
+        if "stage" in columns:
+            print("⏩ reminder_schedule already has stages, skipping")
+            conn.commit()
+            return
+        
+        cursor.execute("ALTER TABLE reminder_schedule RENAME TO reminder_schedule_old")
+        cursor.execute("DROP INDEX IF EXISTS ix_reminder_schedule_fire_date_id")
+        cursor.execute("DROP INDEX IF EXISTS ix_reminder_schedule_user_id")
+        cursor.execute("""
+            CREATE TABLE reminder_schedule (
+                id INTEGER PRIMARY KEY,
+                item_id INTEGER NOT NULL REFERENCES items(id),
+                user_id INTEGER NOT NULL REFERENCES user(id),
+                stage VARCHAR NOT NULL,
+                kind VARCHAR NOT NULL,
+                expiry_date DATE NOT NULL,
+                fire_date DATE,
+                last_fired_date DATE,
+                updated_at DATETIME NOT NULL,
+                CONSTRAINT uq_reminder_schedule_item_id_stage UNIQUE (item_id, stage)
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX ix_reminder_schedule_fire_date_id ON reminder_schedule(fire_date, id)"
+        )
+        cursor.execute(
+            "CREATE INDEX ix_reminder_schedule_user_id ON reminder_schedule(user_id)"
+        )
+        print("✅ Created table: reminder_schedule (with stages)")
+        
+        # Warning stage of items not expired yet; fired if a warning went out
+        # since its window opened
+        cursor.execute("""
+            INSERT INTO reminder_schedule (item_id, user_id, stage, kind, expiry_date, fire_date, last_fired_date, updated_at)
+            SELECT id, user_id, 'before:' || reminder_days, 'expiry_warning', expiry,
+                   CASE WHEN last_fired_date >= date(expiry, '-' || reminder_days || ' days') THEN NULL
+                        ELSE max(date(expiry, '-' || reminder_days || ' days'), date('now'))
+                   END,
+                   last_fired_date, datetime('now')
+            FROM (
+                SELECT r.item_id AS id, r.user_id, r.last_fired_date, i.effective_expiry_date AS expiry,
+                       COALESCE(i.reminder_days_before, u.notification_days_before) AS reminder_days
+                FROM reminder_schedule_old r
+                JOIN items i ON i.id = r.item_id
+                JOIN user u ON u.id = r.user_id
+                WHERE i.effective_expiry_date >= date('now')
+            )
+        """)
+        print(f"✅ Scheduled warning stages for {cursor.rowcount} items")
+        
+        cursor.execute("""
+            INSERT INTO reminder_schedule (item_id, user_id, stage, kind, expiry_date, fire_date, last_fired_date, updated_at)
+            SELECT r.item_id, r.user_id, 'expired', 'expired', i.effective_expiry_date,
+                   CASE WHEN r.kind = 'expired' THEN r.fire_date ELSE date(i.effective_expiry_date, '+1 day') END,
+                   CASE WHEN r.kind = 'expired' THEN r.last_fired_date END,
+                   datetime('now')
+            FROM reminder_schedule_old r
+            JOIN items i ON i.id = r.item_id
+            WHERE i.effective_expiry_date IS NOT NULL
+        """)
+        print(f"✅ Scheduled expired stages for {cursor.rowcount} items")
+        
+        cursor.execute("DROP TABLE reminder_schedule_old")
+        
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        print("ℹ️  Items without reminder_offsets keep a single warning at their reminder days")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
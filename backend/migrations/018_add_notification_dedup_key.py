@@ -0,0 +1,42 @@
+"""
+Migration: Add notification dedup key
+Description: Adds notifications.dedup_key with a unique index. The expiry
+sweep inserts notifications with ON CONFLICT (dedup_key) DO NOTHING, so the
+same reminder is never recorded twice, even by concurrent sweeps. Existing
+notifications keep a NULL key.
+"""
+import sqlite3
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        try:
+            cursor.execute("ALTER TABLE notifications ADD COLUMN dedup_key VARCHAR")
+            print("✅ Added column: notifications.dedup_key")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" not in str(e).lower():
+                raise
+            print("⏩ Column notifications.dedup_key already exists, skipping")
+        
+        cursor.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_notifications_dedup_key "
+            "ON notifications(dedup_key)"
+        )
+        print("✅ Created unique index: ix_notifications_dedup_key")
+        
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,107 @@
+"""
+Migration: Add content-addressed upload blobs
+Description: Creates the upload_blobs table (utils/blob_store.py) and moves
+existing item attachments to their content-addressed names
+(uploads/<sha256>.<ext>), so identical files are stored once and counted
+per referencing item. New names are linked (or copied) first and the old
+files removed only after the database commit, so a failed run leaves every
+item pointing at a file that exists.
+"""
+import hashlib
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+
+UPLOAD_DIR = "uploads"
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    old_files = []
+    
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS upload_blobs (
+                id INTEGER PRIMARY KEY,
+                path VARCHAR NOT NULL UNIQUE,
+                sha256 VARCHAR NOT NULL,
+                size INTEGER NOT NULL,
+                mime_type VARCHAR,
+                ref_count INTEGER NOT NULL,
+                created_at DATETIME NOT NULL,
+                last_referenced_at DATETIME NOT NULL
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_upload_blobs_sha256 ON upload_blobs(sha256)"
+        )
+        print("✅ Created table: upload_blobs")
+        
+        rows = cursor.execute("""
+            SELECT file_path, COUNT(*) FROM items
+            WHERE file_path IS NOT NULL AND file_path != ''
+              AND file_path NOT IN (SELECT path FROM upload_blobs)
+            GROUP BY file_path
+        """).fetchall()
+        
+        moved = missing = saved = 0
+        now = datetime.utcnow().isoformat(sep=" ")
+        for file_path, references in rows:
+            old_path = os.path.join(UPLOAD_DIR, os.path.basename(file_path))
+            if not os.path.isfile(old_path):
+                missing += 1
+                continue
+            
+            sha256 = _sha256(old_path)
+            ext = old_path.rsplit(".", 1)[-1].lower() if "." in os.path.basename(old_path) else "bin"
+            new_name = f"{sha256}.{ext}"
+            new_path = os.path.join(UPLOAD_DIR, new_name)
+            size = os.path.getsize(old_path)
+            
+            if os.path.exists(new_path):
+                saved += size
+            else:
+                try:
+                    os.link(old_path, new_path)
+                except OSError:
+                    shutil.copy2(old_path, new_path)
+            
+            cursor.execute("UPDATE items SET file_path = ? WHERE file_path = ?", (f"/uploads/{new_name}", file_path))
+            cursor.execute("""
+                INSERT INTO upload_blobs (path, sha256, size, ref_count, created_at, last_referenced_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET ref_count = ref_count + excluded.ref_count
+            """, (f"/uploads/{new_name}", sha256, size, references, now, now))
+            if os.path.abspath(old_path) != os.path.abspath(new_path):
+                old_files.append(old_path)
+            moved += 1
+        
+        conn.commit()
+        print(f"✅ Moved {moved} attachments to content-addressed names ({saved / 1024 / 1024:.2f}MB deduplicated)")
+        if missing:
+            print(f"⚠️  {missing} attachments were missing on disk and left as they are")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    for old_path in old_files:
+        os.remove(old_path)
+    print("\n🎉 Migration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
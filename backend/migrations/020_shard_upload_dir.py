@@ -0,0 +1,63 @@
+"""
+Migration: Shard the upload directory
+Description: Moves files from the flat uploads/ directory into the
+two-level sharded layout of the local storage backend (utils/storage.py):
+uploads/ab/cd/<name>, sharded on the content hash of content-addressed
+names and on the hash of the name otherwise. Item file paths are
+unchanged (/uploads/<name>). Files already in a shard are left alone, so
+the migration can be re-run. With STORAGE_BACKEND=s3, copy the sharded
+tree to the bucket (under S3_PREFIX) after running it.
+"""
+import hashlib
+import os
+import sqlite3
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+SHARD_LEVELS = 2
+
+
+def _shard_path(name):
+    stem = name.split(".", 1)[0]
+    is_content_addressed = len(stem) == 64 and all(c in "0123456789abcdef" for c in stem)
+    digest = name if is_content_addressed else hashlib.sha256(name.encode()).hexdigest()
+    return os.path.join(UPLOAD_DIR, *[digest[2 * level:2 * level + 2] for level in range(SHARD_LEVELS)], name)
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        if not os.path.isdir(UPLOAD_DIR):
+            print(f"⚠️  No {UPLOAD_DIR}/ directory, nothing to move")
+            return
+        
+        moved = 0
+        for name in sorted(os.listdir(UPLOAD_DIR)):
+            old_path = os.path.join(UPLOAD_DIR, name)
+            if name.startswith(".") or name.endswith(".part") or not os.path.isfile(old_path):
+                continue
+            new_path = _shard_path(name)
+            os.makedirs(os.path.dirname(new_path), exist_ok=True)
+            os.replace(old_path, new_path)
+            moved += 1
+        print(f"✅ Moved {moved} files into sharded directories")
+        
+        referenced = cursor.execute(
+            "SELECT DISTINCT file_path FROM items WHERE file_path IS NOT NULL AND file_path != ''"
+        ).fetchall()
+        missing = sum(not os.path.isfile(_shard_path(os.path.basename(row[0]))) for row in referenced)
+        if missing:
+            print(f"⚠️  {missing} item attachments were not found in the sharded layout")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+    finally:
+        conn.close()
+    
+    print("\n🎉 Migration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
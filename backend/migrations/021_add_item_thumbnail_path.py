@@ -0,0 +1,40 @@
+"""
+Migration: Add item thumbnail path
+Description: Adds items.thumbnail_path, set by the background thumbnail jobs
+(utils/thumbnails.py), and the items(file_path) index they update by.
+Existing attachments get their thumbnails from `python -m utils.thumbnails`.
+"""
+import sqlite3
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        try:
+            cursor.execute("ALTER TABLE items ADD COLUMN thumbnail_path VARCHAR")
+            print("✅ Added column: thumbnail_path")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" in str(e).lower():
+                print("⏩ Column thumbnail_path already exists, skipping")
+            else:
+                raise
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_items_file_path ON items(file_path)")
+        print("✅ Created index: ix_items_file_path")
+        
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        print("ℹ️  Run `python -m utils.thumbnails` to render thumbnails for existing attachments")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,49 @@
+"""
+Migration: Add digest entries table
+Description: Creates the digest_entries table. The expiry sweep
+(utils/expiry_sweep.py) writes a row per notification held for a daily
+digest in the same transaction as the notification and deletes the rows
+when it queues the digest email, so a sweep that fails partway never leaves
+notifications without their email.
+"""
+import sqlite3
+
+
+def migrate():
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS digest_entries (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                notification_id INTEGER NOT NULL UNIQUE,
+                to_email VARCHAR NOT NULL,
+                user_name VARCHAR NOT NULL,
+                notification_type VARCHAR NOT NULL,
+                item_name VARCHAR NOT NULL,
+                item_type VARCHAR NOT NULL,
+                expiry_date DATE NOT NULL,
+                days INTEGER NOT NULL,
+                created_at DATETIME NOT NULL
+            )
+        """)
+        print("✅ Created table: digest_entries")
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_digest_entries_user_id ON digest_entries(user_id)")
+        print("✅ Created index on digest_entries")
+        
+        conn.commit()
+        print("\n🎉 Migration complete!")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
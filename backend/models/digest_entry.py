@@ -0,0 +1,31 @@
+# models/digest_entry.py
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import date, datetime
+
+class DigestEntry(SQLModel, table=True):
+    """
+    A notification held for a daily digest email. Written with the
+    notification by the expiry sweep (utils/expiry_sweep.py) and deleted
+    when the digest email is queued, so a sweep that stops halfway leaves
+    its held notifications for the next run to send.
+    """
+    __tablename__ = "digest_entries"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(index=True)
+    # No foreign key, like email_outbox: held entries never block notification deletes
+    notification_id: int = Field(unique=True)
+
+    # Recipient at the time of the sweep
+    to_email: str
+    user_name: str
+
+    # Digest line (see utils/email_service.render_digest_email)
+    notification_type: str
+    item_name: str
+    item_type: str
+    expiry_date: date
+    days: int
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
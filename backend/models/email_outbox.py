@@ -0,0 +1,40 @@
+# models/email_outbox.py
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, Index, Text
+from typing import Optional
+from datetime import datetime
+
+class EmailOutbox(SQLModel, table=True):
+    """Outbound email waiting to be delivered by the outbox workers"""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Workers claim due rows in (status, next_attempt_at) order
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # Message
+    to_email: str
+    from_email: str
+    from_name: Optional[str] = None
+    subject: str
+    html_body: str = Field(sa_column=Column(Text, nullable=False))
+    plain_body: Optional[str] = Field(default=None, sa_column=Column(Text))
+
+    # Notification flagged as is_sent_via_email once delivered.
+    # No foreign key, so queued mail never blocks notification deletes
+    notification_id: Optional[int] = Field(default=None, index=True)
+    # Digest emails cover several notifications (JSON list of ids)
+    notification_ids: Optional[str] = Field(default=None, sa_column=Column(Text))
+
+    # Delivery state
+    status: str = Field(default="pending")  # pending, sending, sent, failed
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=5)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    last_error: Optional[str] = None
+
+    # Timestamps
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = None
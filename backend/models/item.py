@@ -1,9 +1,31 @@
 # models/item.py
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from datetime import date, datetime
 from typing import Optional
 import json
 
+
+def resolve_expiry_date(
+    item_type: Optional[str],
+    dynamic_fields: dict,
+    expiration_date: Optional[date],
+    renewal_date: Optional[date]
+) -> Optional[date]:
+    """Resolve the relevant expiry date from dynamic fields, then legacy columns"""
+    for key in ("expiration_date", "renewal_date"):
+        if key in dynamic_fields:
+            try:
+                return date.fromisoformat(dynamic_fields[key])
+            except (TypeError, ValueError):
+                pass
+
+    if item_type == "document":
+        return expiration_date
+    elif item_type == "subscription":
+        return renewal_date
+    return None
+
 class ItemBase(SQLModel):
     # Shared fields
     name: str
@@ -24,11 +46,13 @@ class ItemBase(SQLModel):
     price: Optional[float] = None
 
     # Shared optional fields
-    file_path: Optional[str] = None
     notes: Optional[str] = None
     
     # Custom reminder schedule (optional - falls back to user's default if not set)
     reminder_days_before: Optional[int] = None
+    # Multi-stage reminders, a JSON list of days before expiry such as "[30, 7, 1]"
+    # (takes precedence over reminder_days_before)
+    reminder_offsets: Optional[str] = None
     
     # Dynamic fields stored as JSON (new approach)
     dynamic_fields: Optional[str] = Field(default="{}")  # JSON string
@@ -36,10 +60,30 @@ class ItemBase(SQLModel):
 
 class Item(ItemBase, table=True):
     __tablename__ = "items"
+    __table_args__ = (
+        Index("ix_items_user_id_effective_expiry_date", "user_id", "effective_expiry_date"),
+        # Keyset pagination indexes for the sortable columns in routes/items/search.py
+        Index("ix_items_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_items_user_id_updated_at_id", "user_id", "updated_at", "id"),
+        Index("ix_items_user_id_name_id", "user_id", "name", "id"),
+        Index("ix_items_user_id_price_id", "user_id", "price", "id"),
+        # Thumbnail jobs update every item of a stored file (utils/thumbnails.py)
+        Index("ix_items_file_path", "file_path"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id", index=True)
     
+    # Denormalized result of compute_expiry_date(), kept in sync on every write
+    # so expiry queries can range-scan an index instead of parsing JSON
+    effective_expiry_date: Optional[date] = Field(default=None, index=True)
+    
+    # Attachment (/uploads/<sha256>.<ext>), only set through the upload routes so
+    # its upload_blobs reference count stays right (utils/blob_store.py)
+    file_path: Optional[str] = None
+    # /uploads/<sha256>.thumb.webp once the thumbnail job has rendered file_path
+    thumbnail_path: Optional[str] = None
+    
     # Timestamps
     created_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
@@ -58,28 +102,27 @@ class Item(ItemBase, table=True):
         """Set dynamic fields from dict"""
         self.dynamic_fields = json.dumps(fields)
     
+    # Helper method to compute the relevant expiry date from the raw fields
+    def compute_expiry_date(self) -> Optional[date]:
+        """Resolve the expiry date from dynamic fields and legacy columns"""
+        return resolve_expiry_date(
+            self.type,
+            self.get_dynamic_fields(),
+            self.expiration_date,
+            self.renewal_date
+        )
+    
+    def refresh_effective_expiry(self):
+        """Recompute the persisted effective_expiry_date (call after any field change)"""
+        self.effective_expiry_date = self.compute_expiry_date()
+    
     # Helper method to get the relevant expiry date
     def get_expiry_date(self) -> Optional[date]:
         """Returns the appropriate expiry date based on item type"""
-        # First check dynamic fields
-        dyn_fields = self.get_dynamic_fields()
-        if "expiration_date" in dyn_fields:
-            try:
-                return date.fromisoformat(dyn_fields["expiration_date"])
-            except:
-                pass
-        if "renewal_date" in dyn_fields:
-            try:
-                return date.fromisoformat(dyn_fields["renewal_date"])
-            except:
-                pass
-        
-        # Fall back to legacy fields
-        if self.type == "document":
-            return self.expiration_date
-        elif self.type == "subscription":
-            return self.renewal_date
-        return None
+        if self.effective_expiry_date is not None:
+            return self.effective_expiry_date
+        # Rows without a persisted date (e.g. not yet backfilled) are resolved on the fly
+        return self.compute_expiry_date()
     
     # Helper method to check if item is expiring soon
     def is_expiring_soon(self, days: int = 7) -> bool:
@@ -123,12 +166,12 @@ class ItemUpdate(SQLModel):
     billing_cycle: Optional[str] = None
     price: Optional[float] = None
 
-    # Shared
-    file_path: Optional[str] = None
+    # Shared (attachments are replaced with PUT /items/{item_id})
     notes: Optional[str] = None
     
     # Custom reminder schedule
     reminder_days_before: Optional[int] = None
+    reminder_offsets: Optional[str] = None
     
     # Dynamic fields
     dynamic_fields: Optional[str] = None
\ No newline at end of file
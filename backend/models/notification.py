@@ -1,10 +1,19 @@
 # models/notification.py
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from typing import Optional
 from datetime import datetime
 
 class Notification(SQLModel, table=True):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Unread counts and unread-only listings
+        Index("ix_notifications_user_id_is_read", "user_id", "is_read"),
+        # Keyset pagination of the feed (newest first)
+        Index("ix_notifications_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Conflict target of the sweep's INSERT ... ON CONFLICT DO NOTHING
+        Index("ix_notifications_dedup_key", "dedup_key", unique=True),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id", index=True)
@@ -14,6 +23,8 @@ class Notification(SQLModel, table=True):
     title: str
     message: str
     notification_type: str = Field(default="expiry_warning")  # expiry_warning, expired, renewal_due
+    # Identifies the reminder a notification was created for (see utils/expiry_sweep.py)
+    dedup_key: Optional[str] = None
     
     # Status
     is_read: bool = Field(default=False)
@@ -21,4 +32,25 @@ class Notification(SQLModel, table=True):
     
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    read_at: Optional[datetime] = None
\ No newline at end of file
+    read_at: Optional[datetime] = None
+
+
+class NotificationArchive(SQLModel, table=True):
+    """Old read notifications moved out of the hot table by the retention job"""
+    __tablename__ = "notifications_archive"
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # No foreign keys, so archived rows never block item deletion
+    notification_id: int
+    user_id: int = Field(index=True)
+    item_id: int
+    
+    title: str
+    message: str
+    notification_type: str
+    is_read: bool = Field(default=True)
+    is_sent_via_email: bool = Field(default=False)
+    
+    created_at: datetime
+    read_at: Optional[datetime] = None
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
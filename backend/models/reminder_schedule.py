@@ -0,0 +1,31 @@
+# models/reminder_schedule.py
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, UniqueConstraint
+from typing import Optional
+from datetime import date, datetime
+
+class ReminderSchedule(SQLModel, table=True):
+    """
+    A reminder stage of an item ("before:30", ..., "expired") and the date
+    it is due on next, kept up to date by item and preference writes (see
+    utils/reminder_schedule.py)
+    """
+    __tablename__ = "reminder_schedule"
+    __table_args__ = (
+        # One row per stage, so concurrent reschedules cannot duplicate a stage
+        UniqueConstraint("item_id", "stage", name="uq_reminder_schedule_item_id_stage"),
+        # The sweep range-scans due rows in (fire_date, id) keyset order
+        Index("ix_reminder_schedule_fire_date_id", "fire_date", "id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    item_id: int = Field(foreign_key="items.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
+
+    stage: str  # before:<days>, expired
+    kind: str  # expiry_warning, expired
+    expiry_date: date  # Expiry date the stage was planned for
+    fire_date: Optional[date] = None  # Local date of the user the stage is due on; None once a warning has fired
+    last_fired_date: Optional[date] = None  # Local date the stage last fired
+
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
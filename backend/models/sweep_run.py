@@ -0,0 +1,43 @@
+# models/sweep_run.py
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, UniqueConstraint
+from typing import Optional
+from datetime import date, datetime
+
+class SweepShardRun(SQLModel, table=True):
+    """
+    One expiry sweep over a shard of the users in a timezone bucket for one
+    local date. Doubles as the work queue and the lease of the scheduler in
+    utils/notification_scheduler.py.
+    """
+    __tablename__ = "sweep_shard_runs"
+    __table_args__ = (
+        # A bucket's shard is swept at most once per local date
+        UniqueConstraint("run_date", "utc_offset_minutes", "shard", name="uq_sweep_shard_runs_date_offset_shard"),
+        # Workers claim runs in (status, lease_expires_at) order
+        Index("ix_sweep_shard_runs_status_lease_expires_at", "status", "lease_expires_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # Work: users whose timezone is at this UTC offset, with user_id % shard_count == shard
+    run_date: date  # Local date of the bucket
+    utc_offset_minutes: int
+    shard: int
+    shard_count: int
+
+    # Lease
+    status: str = Field(default="pending")  # pending, running, done, failed
+    owner: Optional[str] = None
+    attempts: int = Field(default=0)
+    lease_expires_at: Optional[datetime] = None
+
+    # Outcome
+    notifications_created: int = Field(default=0)
+    emails_queued: int = Field(default=0)
+    last_error: Optional[str] = None
+
+    # Timestamps
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,22 @@
+# models/upload_blob.py
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+class UploadBlob(SQLModel, table=True):
+    """
+    A content-addressed upload and how many items reference it through
+    Item.file_path (see utils/blob_store.py)
+    """
+    __tablename__ = "upload_blobs"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    path: str = Field(unique=True)  # /uploads/<sha256>.<ext>, as stored in Item.file_path
+    sha256: str = Field(index=True)
+    size: int
+    mime_type: Optional[str] = None
+
+    ref_count: int = Field(default=0)
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_referenced_at: datetime = Field(default_factory=datetime.utcnow)
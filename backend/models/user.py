@@ -28,6 +28,7 @@ class User(SQLModel, table=True):
     # Notification preferences
     email_notifications: bool = Field(default=True)  # Enable/disable email notifications
     notification_days_before: int = Field(default=7)  # How many days before expiry to notify (default 7 days)
+    reminder_offsets: Optional[str] = None  # JSON list of days before expiry, e.g. "[30, 7, 1]"; overrides notification_days_before
     daily_digest: bool = Field(default=False)  # Send daily digest email
 
     # Display preferences
@@ -2,7 +2,9 @@
 Shared Pydantic schemas for authentication routes
 """
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional
+from typing import List, Optional
+
+from utils.reminder_schedule import clean_reminder_offsets
 
 
 class UserCreate(BaseModel):
@@ -92,6 +94,7 @@ class SettingsUpdate(BaseModel):
     """Validated user account settings"""
     email_notifications_enabled: Optional[bool] = None
     notification_days: Optional[int] = None
+    reminder_offsets: Optional[List[int]] = None  # [] clears them back to notification_days
     daily_digest: Optional[bool] = None
     language: Optional[str] = None
     timezone: Optional[str] = None
@@ -103,6 +106,12 @@ class SettingsUpdate(BaseModel):
                 raise ValueError('Notification days must be between 0 and 365')
         return v
     
+    @validator('reminder_offsets')
+    def validate_reminder_offsets(cls, v):
+        if v is not None:
+            return clean_reminder_offsets(v)
+        return v
+    
     @validator('language')
     def validate_language(cls, v):
         if v is not None:
@@ -137,7 +137,7 @@ async def forgot_password(
     frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
     reset_link = f"{frontend_url}/reset-password?token={reset_token}"
     
-    send_password_reset_email(user.email, user.full_name or "User", reset_link)
+    await send_password_reset_email(user.email, user.full_name or "User", reset_link)
     
     return {
         "success": True,
@@ -2,15 +2,18 @@
 Profile management endpoints for authentication
 """
 from fastapi import APIRouter, HTTPException, Depends, Request
-from sqlmodel import Session, select
+from sqlalchemy import text
+from sqlmodel import Session, select, delete
 from datetime import datetime
-import os
 import logging
-import sqlite3
 
 from database import get_session
 from models.user import User
+from models.digest_entry import DigestEntry
 from models.item import Item
+from models.notification import Notification, NotificationArchive
+from models.email_outbox import EmailOutbox
+from models.reminder_schedule import ReminderSchedule
 from utils.auth import (
     verify_password,
     get_current_user
@@ -18,6 +21,12 @@ from utils.auth import (
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from utils.blob_store import purge_uploads, release_uploads
+from utils.file import delete_upload
+from utils.item_stats import invalidate_item_stats
+from utils.principal import invalidate_principal
+from utils.unread_counts import invalidate_unread_count
+
 from ._validation import validate_password
 
 router = APIRouter()
@@ -69,6 +78,7 @@ def update_profile(
     
     session.add(user)
     session.commit()
+    invalidate_principal(user.id)
     session.refresh(user)
     
     logger.info(f"✅ Profile updated for user: {user.email}")
@@ -107,56 +117,45 @@ async def delete_account(
     user_id = user.id
     user_email = user.email
     
-    # Import Item model
-    from models.item import Item
-    import sqlite3
-    
     try:
         # 1. Get all user's items
         items = session.exec(select(Item).where(Item.user_id == user_id)).all()
         
-        # 2. Delete all associated files
-        files_deleted = 0
-        for item in items:
-            if item.file_path:
-                file_path = f"uploads/{item.file_path}"
-                if os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                        files_deleted += 1
-                    except Exception as e:
-                        logger.error(f"⚠️ Could not delete file {file_path}: {e}")
+        # 2. Delete tokens (in this transaction: a second connection would
+        # wait on the write lock the session takes below)
+        session.exec(text("DELETE FROM password_reset_tokens WHERE user_id = :user_id").bindparams(user_id=user_id))
+        session.exec(text("DELETE FROM email_verification_tokens WHERE user_id = :user_id").bindparams(user_id=user_id))
+        
+        # 3. Release all associated files (unlinked once nothing references them)
+        released_files = release_uploads(session, [item.file_path for item in items])
         
-        # 3. Delete all user's items
+        # 4. Delete user profile picture if it is a stored upload (not an OAuth URL)
+        if user.profile_picture and not user.profile_picture.startswith(("http://", "https://")):
+            await delete_upload(user.profile_picture)
+        
+        # 5. Delete notifications, then all user's items (before the ORM
+        # flush, so foreign keys are never left dangling)
+        session.exec(delete(DigestEntry).where(DigestEntry.user_id == user_id))
+        session.exec(delete(Notification).where(Notification.user_id == user_id))
+        session.exec(delete(NotificationArchive).where(NotificationArchive.user_id == user_id))
+        session.exec(delete(ReminderSchedule).where(ReminderSchedule.user_id == user_id))
+        # Undelivered mail to the account is dropped with it
+        session.exec(delete(EmailOutbox).where(
+            EmailOutbox.to_email == user_email,
+            EmailOutbox.status.in_(("pending", "sending"))
+        ))
         for item in items:
             session.delete(item)
         
         items_deleted = len(items)
         
-        # 4. Delete tokens
-        conn = sqlite3.connect('database.db')
-        cursor = conn.cursor()
-        try:
-            cursor.execute("DELETE FROM password_reset_tokens WHERE user_id = ?", (user_id,))
-            cursor.execute("DELETE FROM email_verification_tokens WHERE user_id = ?", (user_id,))
-            conn.commit()
-        except Exception as e:
-            logger.error(f"⚠️ Could not delete tokens: {e}")
-        finally:
-            conn.close()
-        
-        # 5. Delete user profile picture if exists
-        if user.profile_picture:
-            profile_pic_path = f"uploads/{user.profile_picture}"
-            if os.path.exists(profile_pic_path):
-                try:
-                    os.remove(profile_pic_path)
-                except Exception as e:
-                    logger.error(f"⚠️ Could not delete profile picture: {e}")
-        
         # 6. Delete the user account
         session.delete(user)
         session.commit()
+        files_deleted = await purge_uploads(session, released_files)
+        invalidate_item_stats(user_id)
+        invalidate_principal(user_id)
+        invalidate_unread_count(user_id)
         
         logger.info(f"""
         ╔════════════════════════════════════════╗
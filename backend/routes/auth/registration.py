@@ -83,7 +83,7 @@ async def register(
     frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
     verification_link = f"{frontend_url}/verify-email?token={verification_token}"
     
-    send_verification_email(new_user.email, new_user.full_name, verification_link)
+    await send_verification_email(new_user.email, new_user.full_name, verification_link)
 
     # Generate tokens for immediate login after registration
     access_token = create_access_token(data={"sub": str(new_user.id)})
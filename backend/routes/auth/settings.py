@@ -4,10 +4,13 @@ Settings and preferences management endpoints for authentication
 from fastapi import APIRouter, Depends
 from sqlmodel import Session
 from datetime import datetime
+import json
 
 from database import get_session
 from models.user import User
 from utils.auth import get_current_user
+from utils.principal import invalidate_principal
+from utils.reminder_schedule import parse_reminder_offsets, reschedule_items
 
 from ._schemas import SettingsUpdate, PreferencesUpdate
 
@@ -24,6 +27,7 @@ def get_settings(user: User = Depends(get_current_user)):
     return {
         "email_notifications_enabled": user.email_notifications,
         "notification_days": user.notification_days_before,
+        "reminder_offsets": parse_reminder_offsets(user.reminder_offsets) or [],
         "daily_digest": user.daily_digest,
         "language": user.language,
         "timezone": user.timezone
@@ -41,11 +45,15 @@ def update_settings(
     session: Session = Depends(get_session)
 ):
     """Update user account settings"""
+    # Reminders follow these settings, so changing one reschedules the user's items
+    schedule_inputs = (user.email_notifications, user.notification_days_before, user.reminder_offsets, user.timezone)
     
     if settings_data.email_notifications_enabled is not None:
         user.email_notifications = settings_data.email_notifications_enabled
     if settings_data.notification_days is not None:
         user.notification_days_before = settings_data.notification_days
+    if settings_data.reminder_offsets is not None:
+        user.reminder_offsets = json.dumps(settings_data.reminder_offsets) if settings_data.reminder_offsets else None
     if settings_data.daily_digest is not None:
         user.daily_digest = settings_data.daily_digest
     if settings_data.language is not None:
@@ -56,7 +64,10 @@ def update_settings(
     user.updated_at = datetime.utcnow()
     
     session.add(user)
+    if (user.email_notifications, user.notification_days_before, user.reminder_offsets, user.timezone) != schedule_inputs:
+        reschedule_items(session, user.id)
     session.commit()
+    invalidate_principal(user.id)
     session.refresh(user)
     
     return {
@@ -104,6 +115,7 @@ def update_preferences(
     
     session.add(user)
     session.commit()
+    invalidate_principal(user.id)
     session.refresh(user)
     
     return {
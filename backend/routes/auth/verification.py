@@ -4,6 +4,7 @@ from sqlmodel import Session
 from database import get_session
 from models.user import User
 from utils.auth import get_current_user
+from utils.principal import invalidate_principal
 from datetime import datetime, timedelta
 import secrets
 import os
@@ -70,6 +71,7 @@ def verify_email(data: dict, session: Session = Depends(get_session)):
         user.email_verified_at = datetime.utcnow()
         session.add(user)
         session.commit()
+        invalidate_principal(user.id)
         
         # Mark token as used
         cursor.execute("""
@@ -148,7 +150,7 @@ async def resend_verification(
     frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
     verification_link = f"{frontend_url}/verify-email?token={verification_token}"
     
-    send_verification_email(user.email, user.full_name, verification_link)
+    await send_verification_email(user.email, user.full_name, verification_link)
     
     return {
         "success": True,
@@ -1,13 +1,14 @@
 """
 Contact form endpoint
 """
-import html as html_module
 import logging
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, EmailStr
+from starlette.concurrency import run_in_threadpool
 
+from utils.email_outbox import enqueue_email
+from utils.email_templates import render_template
 from utils.rate_limit import limiter
-from utils.smtp_relay import send_email
 
 router = APIRouter(prefix="/contact", tags=["contact"])
 logger = logging.getLogger(__name__)
@@ -58,63 +59,24 @@ async def submit_contact_form(request: Request, data: ContactRequest):
 
     to_email = INQUIRY_ROUTING[inquiry_type]
 
-    safe_name = html_module.escape(name)
-    safe_email = html_module.escape(email)
-    safe_inquiry_type = html_module.escape(inquiry_type)
-    safe_message = html_module.escape(message)
-
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background: linear-gradient(135deg, #14b8a6 0%, #06b6d4 100%);
-                       color: white; padding: 20px; text-align: center; border-radius: 10px 10px 0 0; }}
-            .content {{ background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }}
-            .field {{ margin-bottom: 15px; }}
-            .label {{ font-weight: bold; color: #555; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h2>New Contact Form Submission</h2>
-            </div>
-            <div class="content">
-                <div class="field">
-                    <span class="label">Name:</span> {safe_name}
-                </div>
-                <div class="field">
-                    <span class="label">Email:</span> {safe_email}
-                </div>
-                <div class="field">
-                    <span class="label">Inquiry Type:</span> {safe_inquiry_type}
-                </div>
-                <div class="field">
-                    <span class="label">Message:</span>
-                    <p>{safe_message}</p>
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-
-    plain = f"Name: {name}\nEmail: {email}\nType: {inquiry_type}\n\nMessage:\n{message}"
-
-    success = send_email(
-        to_email=to_email,
-        subject=f"[Remindes Contact] {inquiry_type} from {name}",
-        html_body=html,
-        from_email="support@remindes.com",
-        plain_body=plain,
-    )
-
-    if not success:
-        logger.error(f"Failed to send contact form email from {email} (inquiry_type={inquiry_type}, to={to_email})")
+    # Values are HTML-escaped by the template engine
+    values = {"name": name, "email": email, "inquiry_type": inquiry_type, "message": message}
+    html = render_template("contact.html", **values)
+    plain = render_template("contact.txt", **values)
+
+    # Queued for the outbox workers; the relay is never contacted from here
+    try:
+        outbox_id = await run_in_threadpool(
+            enqueue_email,
+            to_email=to_email,
+            subject=f"[Remindes Contact] {inquiry_type} from {name}",
+            html_body=html,
+            from_email="support@remindes.com",
+            plain_body=plain,
+        )
+    except Exception as e:
+        logger.error(f"Failed to queue contact form email from {email} (inquiry_type={inquiry_type}, to={to_email}): {e}")
         raise HTTPException(status_code=503, detail="Failed to send message. Please try again later.")
 
-    logger.info(f"✅ Contact form submitted: {inquiry_type} from {email} -> {to_email}")
+    logger.info(f"✅ Contact form submitted: {inquiry_type} from {email} -> {to_email} (outbox #{outbox_id})")
     return {"success": True, "message": "Message sent successfully. We'll be in touch."}
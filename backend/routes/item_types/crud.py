@@ -1,115 +1,82 @@
 # backend/routes/item_types/crud.py
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse, Response
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 import os
 import re
 
-from models.item_type import ItemType
-from models.user import User
-from database import get_session
-from utils.auth import get_current_user
+from utils.auth import get_current_principal
+from utils.item_type_catalog import (
+    CatalogBody, ItemTypeCatalog, cached_catalog, count_not_modified, get_catalog,
+)
+from utils.principal import Principal
 
 router = APIRouter()
 
 ITEM_TYPE_IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "static", "item-type-images")
 
 
+async def _catalog() -> ItemTypeCatalog:
+    # Loading runs a query: only on a miss, and off the event loop
+    return cached_catalog() or await run_in_threadpool(get_catalog)
+
+
+def _catalog_response(answer: CatalogBody, if_none_match: Optional[str]) -> Response:
+    """Pre-serialized catalog answer; a matching If-None-Match gets 304 Not Modified"""
+    headers = {"ETag": answer.etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and answer.etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        count_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(content=answer.body, media_type="application/json", headers=headers)
+
+
 @router.get("/item-types")
 @router.get("/item-types/")
-def list_item_types(
+async def list_item_types(
     category: Optional[str] = None,
     item_class: Optional[str] = None,  # "document" or "subscription"
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user)
+    if_none_match: Optional[str] = Header(None),
+    user: Principal = Depends(get_current_principal)
 ):
     """
     List all available item types with their field configurations.
     Can be filtered by category or item_class.
+    Served from the in-process catalog (utils/item_type_catalog.py), with an ETag.
     """
-    query = select(ItemType).where(ItemType.is_active == True)
-    
-    if category:
-        query = query.where(ItemType.category == category)
-    
-    if item_class:
-        query = query.where(ItemType.item_class == item_class)
-    
-    query = query.order_by(ItemType.category, ItemType.name)
-    
-    item_types = session.exec(query).all()
-    
-    # Parse fields_config JSON for each type
-    result = []
-    for item_type in item_types:
-        item_dict = {
-            "id": item_type.id,
-            "name": item_type.name,
-            "category": item_type.category,
-            "item_class": item_type.item_class,
-            "description": item_type.description,
-            "icon": item_type.icon,
-            "fields": item_type.get_fields(),
-            "is_active": item_type.is_active,
-            "created_at": item_type.created_at.isoformat() if item_type.created_at else None
-        }
-        result.append(item_dict)
-    
-    return {"item_types": result, "total": len(result)}
+    catalog = await _catalog()
+    return _catalog_response(catalog.list(category, item_class), if_none_match)
 
 
 @router.get("/item-types/categories")
 @router.get("/item-types/categories/")
-def get_categories(
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user)
+async def get_categories(
+    if_none_match: Optional[str] = Header(None),
+    user: Principal = Depends(get_current_principal)
 ):
     """
     Get list of all available categories with count of types in each.
     """
-    query = select(ItemType.category, ItemType.item_class).where(ItemType.is_active == True).distinct()
-    results = session.exec(query).all()
-    
-    # Group by category
-    categories = {}
-    for category, item_class in results:
-        if category not in categories:
-            categories[category] = {"documents": 0, "subscriptions": 0}
-        if item_class == "document":
-            categories[category]["documents"] += 1
-        elif item_class == "subscription":
-            categories[category]["subscriptions"] += 1
-    
-    return {"categories": categories}
+    catalog = await _catalog()
+    return _catalog_response(catalog.categories, if_none_match)
 
 
 @router.get("/item-types/{item_type_id}")
 @router.get("/item-types/{item_type_id}/")
-def get_item_type(
+async def get_item_type(
     item_type_id: int,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user)
+    if_none_match: Optional[str] = Header(None),
+    user: Principal = Depends(get_current_principal)
 ):
     """
     Get a specific item type by ID with its field configuration.
     """
-    item_type = session.get(ItemType, item_type_id)
+    answer = (await _catalog()).get(item_type_id)
     
-    if not item_type:
+    if not answer:
         raise HTTPException(status_code=404, detail="Item type not found")
     
-    return {
-        "id": item_type.id,
-        "name": item_type.name,
-        "category": item_type.category,
-        "item_class": item_type.item_class,
-        "description": item_type.description,
-        "icon": item_type.icon,
-        "fields": item_type.get_fields(),
-        "is_active": item_type.is_active,
-        "created_at": item_type.created_at.isoformat() if item_type.created_at else None
-    }
+    return _catalog_response(answer, if_none_match)
 
 
 @router.get("/item-type-image/{item_type_name}")
@@ -2,6 +2,7 @@
 from fastapi import APIRouter
 
 from .crud import router as crud_router
+from .files import router as files_router
 from .search import router as search_router
 from .stats import router as stats_router
 
@@ -11,3 +12,4 @@ router = APIRouter(tags=["Items"])
 router.include_router(stats_router)  # Include stats first to match /stats before /{item_id}
 router.include_router(search_router)
 router.include_router(crud_router)
+router.include_router(files_router)
@@ -1,9 +1,9 @@
 # backend/routes/items/crud.py
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
-from sqlmodel import Session
+from sqlmodel import select, func, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Optional
 from datetime import datetime
-import os
 import logging
 import json
 
@@ -11,20 +11,28 @@ from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from models.item import Item, ItemCreate, ItemUpdate
+from models.notification import Notification
 from models.user import User
-from database import get_session
-from utils.auth import get_current_user
+from database import get_async_session
+from utils.auth import get_current_principal
+from utils.principal import Principal
 from utils.dates import parse_date
+from utils.expiry_sweep import delete_item_digest_entries
+from utils.blob_store import attach_upload, purge_uploads, release_uploads
 from utils.file import save_upload
 from utils.file_validation import validate_file
-from utils.item_validation import validate_item_fields
+from utils.item_validation import validate_item_fields, validate_reminder_offsets
+from utils.item_stats import invalidate_item_stats
+from utils.reminder_schedule import delete_item_reminders, reschedule_items
+from utils.thumbnails import enqueue_thumbnail, existing_thumbnail
+from utils.unread_counts import invalidate_unread_count
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 limiter = Limiter(key_func=get_remote_address)
 
 
-def require_verified_email(user: User = Depends(get_current_user)) -> User:
+def require_verified_email(user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Dependency that requires user to have verified email
     """
@@ -37,20 +45,37 @@ def require_verified_email(user: User = Depends(get_current_user)) -> User:
     return user
 
 
+async def _reschedule(session: AsyncSession, user_id: int, item_id: int):
+    """Recompute the item's next expiry reminder in the current transaction"""
+    await session.run_sync(lambda sync_session: reschedule_items(sync_session, user_id, [item_id]))
+
+
+async def _store_upload(session: AsyncSession, file: Optional[UploadFile]) -> Optional[str]:
+    """Stream an upload and reference its blob in the current transaction; returns the file_path"""
+    stored = await save_upload(file)
+    if stored is None:
+        return None
+    return await attach_upload(session, stored)
+
+
+async def _release_uploads(session: AsyncSession, file_paths: list) -> list[str]:
+    """Drop the items' references to their files in the current transaction"""
+    return await session.run_sync(lambda sync_session: release_uploads(sync_session, file_paths))
+
+
 @router.post("/items")
 @router.post("/items/")
 @limiter.limit("30/minute")
 async def create_item(
     request: Request,
     item: ItemCreate,
-    session: Session = Depends(get_session),
-    user: User = Depends(require_verified_email)
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(require_verified_email)
 ):
     """Create a new item (JSON payload)"""
     # Check item count limit for free users
-    from sqlmodel import select, func
     statement = select(func.count(Item.id)).where(Item.user_id == user.id)
-    item_count = session.exec(statement).one()
+    item_count = (await session.exec(statement)).one()
     
     if not user.can_add_items(item_count):
         logger.warning(f"⚠️ Free user {user.email} attempted to exceed 20 item limit")
@@ -59,11 +84,16 @@ async def create_item(
             detail="Free plan limited to 20 items. Upgrade to Premium for unlimited items."
         )
     
-    db_item = Item.from_orm(item)
-    db_item.user_id = user.id
+    db_item = Item.model_validate(
+        item, update={"user_id": user.id, "reminder_offsets": validate_reminder_offsets(item.reminder_offsets)}
+    )
+    db_item.refresh_effective_expiry()
     session.add(db_item)
-    session.commit()
-    session.refresh(db_item)
+    await session.flush()
+    await _reschedule(session, user.id, db_item.id)
+    await session.commit()
+    invalidate_item_stats(user.id)
+    await session.refresh(db_item)
     
     logger.info(f"✅ Item created: {db_item.id} by user {user.email}")
     return db_item
@@ -71,13 +101,13 @@ async def create_item(
 
 @router.get("/items/{item_id}")
 @router.get("/items/{item_id}/")
-def get_item(
+async def get_item(
     item_id: int,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user)
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_current_principal)
 ):
     """Get a specific item by ID"""
-    item = session.get(Item, item_id)
+    item = await session.get(Item, item_id)
     
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -91,14 +121,14 @@ def get_item(
 
 @router.patch("/items/{item_id}")
 @router.patch("/items/{item_id}/")
-def update_item(
+async def update_item(
     item_id: int,
     item: ItemUpdate,
-    session: Session = Depends(get_session),
-    user: User = Depends(require_verified_email)
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(require_verified_email)
 ):
     """Partially update an item (JSON payload)"""
-    db_item = session.get(Item, item_id)
+    db_item = await session.get(Item, item_id)
     
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -107,14 +137,20 @@ def update_item(
         logger.warning(f"⚠️ User {user.email} attempted to update item {item_id} owned by another user")
         raise HTTPException(status_code=403, detail="Not authorized to update this item")
 
-    for key, value in item.dict(exclude_unset=True).items():
+    updates = item.dict(exclude_unset=True)
+    if "reminder_offsets" in updates:
+        updates["reminder_offsets"] = validate_reminder_offsets(updates["reminder_offsets"])
+    for key, value in updates.items():
         setattr(db_item, key, value)
 
+    db_item.refresh_effective_expiry()
     db_item.updated_at = datetime.utcnow()
     
     session.add(db_item)
-    session.commit()
-    session.refresh(db_item)
+    await _reschedule(session, user.id, db_item.id)
+    await session.commit()
+    invalidate_item_stats(user.id)
+    await session.refresh(db_item)
     
     logger.info(f"✅ Item updated: {db_item.id} by user {user.email}")
     return db_item
@@ -136,16 +172,17 @@ async def update_item_with_file(
     price: Optional[float] = Form(None),
     document_number: Optional[str] = Form(None),
     reminder_days_before: Optional[int] = Form(None),
+    reminder_offsets: Optional[str] = Form(None),  # JSON list, e.g. [30, 7, 1]
     file: UploadFile = File(None),
-    session: Session = Depends(get_session),
-    user: User = Depends(require_verified_email)
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(require_verified_email)
 ):
     """
     Update an existing item (with optional file upload)
     Used by EditItemPage.vue
     """
     # Get the item
-    db_item = session.get(Item, item_id)
+    db_item = await session.get(Item, item_id)
     
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -160,6 +197,7 @@ async def update_item_with_file(
         raise HTTPException(status_code=400, detail="Name must not exceed 200 characters")
     
     validate_item_fields(name, type, category)
+    reminder_offsets = validate_reminder_offsets(reminder_offsets)
     
     # Validate file if provided
     if file and file.filename:
@@ -180,32 +218,33 @@ async def update_item_with_file(
     
     # Update reminder settings
     db_item.reminder_days_before = reminder_days_before
+    db_item.reminder_offsets = reminder_offsets
     
     # Handle dates (convert empty strings to None)
     db_item.expiration_date = parse_date(expiration_date) if expiration_date else None
     db_item.renewal_date = parse_date(renewal_date) if renewal_date else None
+    db_item.refresh_effective_expiry()
     
     # Handle file upload if provided
+    released = []
     if file and file.filename:
-        # Delete old file if exists
-        if db_item.file_path:
-            old_file_path = f"uploads/{db_item.file_path}"
-            if os.path.exists(old_file_path):
-                try:
-                    os.remove(old_file_path)
-                    logger.info(f"✅ Deleted old file: {old_file_path}")
-                except Exception as e:
-                    logger.error(f"⚠️ Could not delete old file: {e}")
-        
-        # Save new file
-        new_file_path = save_upload(file)
+        # Store the new file first, so a rejected upload keeps the old one
+        new_file_path = await _store_upload(session, file)
+        released = await _release_uploads(session, [db_item.file_path])
+        if new_file_path != db_item.file_path:
+            db_item.thumbnail_path = await existing_thumbnail(new_file_path)
         db_item.file_path = new_file_path
     
     db_item.updated_at = datetime.utcnow()
     
     session.add(db_item)
-    session.commit()
-    session.refresh(db_item)
+    await _reschedule(session, user.id, db_item.id)
+    await session.commit()
+    await purge_uploads(session, released)
+    invalidate_item_stats(user.id)
+    await session.refresh(db_item)
+    if db_item.thumbnail_path is None:
+        enqueue_thumbnail(db_item.file_path)
     
     logger.info(f"✅ Item updated with file: {db_item.id} by user {user.email}")
     return db_item
@@ -217,13 +256,13 @@ async def update_item_with_file(
 async def delete_item(
     request: Request,
     item_id: int,
-    session: Session = Depends(get_session),
-    user: User = Depends(require_verified_email)
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(require_verified_email)
 ):
     """
     Delete an item and its associated file
     """
-    item = session.get(Item, item_id)
+    item = await session.get(Item, item_id)
     
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -232,18 +271,17 @@ async def delete_item(
         logger.warning(f"⚠️ User {user.email} attempted to delete item {item_id} owned by another user")
         raise HTTPException(status_code=403, detail="Not authorized to delete this item")
 
-    # Delete associated file if exists
-    if item.file_path:
-        file_path = f"uploads/{item.file_path}"
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                logger.info(f"✅ Deleted file: {file_path}")
-            except Exception as e:
-                logger.error(f"⚠️ Could not delete file: {e}")
+    # Release the associated file (unlinked once nothing references it)
+    released = await _release_uploads(session, [item.file_path])
 
-    session.delete(item)
-    session.commit()
+    await session.exec(delete_item_digest_entries([item_id]))
+    await session.exec(delete(Notification).where(Notification.item_id == item_id))
+    await session.exec(delete_item_reminders([item_id]))
+    await session.delete(item)
+    await session.commit()
+    await purge_uploads(session, released)
+    invalidate_item_stats(user.id)
+    invalidate_unread_count(user.id)
     
     logger.info(f"✅ Item deleted: {item_id} by user {user.email}")
     return {"message": "Item deleted successfully", "id": item_id}
@@ -266,6 +304,7 @@ async def upload_item(
     document_number: Optional[str] = Form(None),
     notes: Optional[str] = Form(None),
     reminder_days_before: Optional[int] = Form(None),
+    reminder_offsets: Optional[str] = Form(None),  # JSON list, e.g. [30, 7, 1]
     
     # New fields for dynamic support
     item_type_id: Optional[int] = Form(None),
@@ -274,8 +313,8 @@ async def upload_item(
     
     file: UploadFile = File(None),
 
-    session: Session = Depends(get_session),
-    user: User = Depends(require_verified_email)
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(require_verified_email)
 ):
     """
     Create a new item with file upload.
@@ -283,9 +322,8 @@ async def upload_item(
     """
     
     # Check item count limit for free users
-    from sqlmodel import select, func
     statement = select(func.count(Item.id)).where(Item.user_id == user.id)
-    item_count = session.exec(statement).one()
+    item_count = (await session.exec(statement)).one()
     
     if not user.can_add_items(item_count):
         logger.warning(f"⚠️ Free user {user.email} attempted to exceed 20 item limit")
@@ -299,6 +337,7 @@ async def upload_item(
         raise HTTPException(status_code=400, detail="Name must not exceed 200 characters")
     
     validate_item_fields(name, type, category)
+    reminder_offsets = validate_reminder_offsets(reminder_offsets)
     
     # Validate file if provided
     if file and file.filename:
@@ -318,7 +357,7 @@ async def upload_item(
     renewal_date_parsed = parse_date(renewal_date)
     
     # Save file
-    file_path = save_upload(file) if file else None
+    file_path = await _store_upload(session, file)
 
     # Create item
     item = Item(
@@ -334,14 +373,22 @@ async def upload_item(
         document_number=document_number.strip() if document_number else None,
         notes=notes.strip() if notes else None,
         file_path=file_path,
+        thumbnail_path=await existing_thumbnail(file_path),
         reminder_days_before=reminder_days_before,
+        reminder_offsets=reminder_offsets,
         dynamic_fields=dynamic_fields if dynamic_fields else "{}",
         user_id=user.id
     )
+    item.refresh_effective_expiry()
 
     session.add(item)
-    session.commit()
-    session.refresh(item)
+    await session.flush()
+    await _reschedule(session, user.id, item.id)
+    await session.commit()
+    invalidate_item_stats(user.id)
+    await session.refresh(item)
+    if item.thumbnail_path is None:
+        enqueue_thumbnail(item.file_path)
     
     logger.info(f"✅ Item uploaded: {item.id} by user {user.email}")
     return item
@@ -353,8 +400,8 @@ async def upload_item(
 async def bulk_delete_items(
     request: Request,
     item_ids: list[int],
-    session: Session = Depends(get_session),
-    user: User = Depends(require_verified_email)
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(require_verified_email)
 ):
     """
     Delete multiple items at once
@@ -365,33 +412,31 @@ async def bulk_delete_items(
     if len(item_ids) > 100:
         raise HTTPException(status_code=400, detail="Cannot delete more than 100 items at once")
     
-    deleted_count = 0
-    files_deleted = 0
+    deleted_items = []
     
-    for item_id in item_ids:
-        item = session.get(Item, item_id)
-        
-        if not item:
-            continue
-        
+    items = (await session.exec(select(Item).where(Item.id.in_(item_ids)))).all()
+    
+    for item in items:
         if item.user_id != user.id:
-            logger.warning(f"⚠️ User {user.email} attempted to delete item {item_id} owned by another user")
+            logger.warning(f"⚠️ User {user.email} attempted to delete item {item.id} owned by another user")
             continue
         
-        # Delete file if exists
-        if item.file_path:
-            file_path = f"uploads/{item.file_path}"
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    files_deleted += 1
-                except Exception as e:
-                    logger.error(f"⚠️ Could not delete file: {e}")
-        
-        session.delete(item)
-        deleted_count += 1
-    
-    session.commit()
+        deleted_items.append(item)
+    
+    # Release their files (unlinked once nothing references them)
+    released = await _release_uploads(session, [item.file_path for item in deleted_items])
+    if deleted_items:
+        await session.exec(delete_item_digest_entries([item.id for item in deleted_items]))
+        await session.exec(delete(Notification).where(Notification.item_id.in_([item.id for item in deleted_items])))
+        await session.exec(delete_item_reminders([item.id for item in deleted_items]))
+        for item in deleted_items:
+            await session.delete(item)
+    deleted_count = len(deleted_items)
+    
+    await session.commit()
+    files_deleted = await purge_uploads(session, released)
+    invalidate_item_stats(user.id)
+    invalidate_unread_count(user.id)
     
     logger.info(f"✅ Bulk deleted {deleted_count} items by user {user.email}")
     
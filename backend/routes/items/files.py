@@ -0,0 +1,63 @@
+# backend/routes/items/files.py
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import logging
+
+from models.item import Item
+from database import get_async_session
+from utils.auth import get_current_principal
+from utils.principal import Principal
+from utils.storage import upload_key
+from utils.upload_serving import serve_upload
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+async def _owned_item(session: AsyncSession, item_id: int, user: Principal):
+    row = (await session.exec(
+        select(Item.user_id, Item.file_path, Item.thumbnail_path).where(Item.id == item_id)
+    )).first()
+    
+    if not row or row.user_id != user.id:
+        if row:
+            logger.warning(f"⚠️ User {user.email} attempted to access the file of item {item_id} owned by another user")
+        raise HTTPException(status_code=404, detail="Item not found")
+    
+    return row
+
+
+@router.get("/items/{item_id}/file")
+async def get_item_file(
+    request: Request,
+    item_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_current_principal)
+):
+    """
+    Download an item's attached file (owner only), with ETag revalidation
+    and Range requests (see utils/upload_serving.py)
+    """
+    row = await _owned_item(session, item_id, user)
+    
+    if not row.file_path:
+        raise HTTPException(status_code=404, detail="Item has no attached file")
+    
+    return await serve_upload(request, upload_key(row.file_path))
+
+
+@router.get("/items/{item_id}/thumbnail")
+async def get_item_thumbnail(
+    request: Request,
+    item_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_current_principal)
+):
+    """Get the WebP thumbnail of an item's attached file (owner only, see utils/thumbnails.py)"""
+    row = await _owned_item(session, item_id, user)
+    
+    if not row.thumbnail_path:
+        raise HTTPException(status_code=404, detail="Item has no thumbnail")
+    
+    return await serve_upload(request, upload_key(row.thumbnail_path))
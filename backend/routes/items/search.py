@@ -1,76 +1,218 @@
 # backend/routes/items/search.py
-from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, select, func, or_
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import tuple_
 from typing import Optional
+from datetime import date, datetime
 import logging
 
 from models.item import Item
-from models.user import User
-from database import get_session
-from utils.auth import get_current_user
+from database import get_async_session
+from utils.auth import get_current_principal
+from utils.cursor import decode_cursor_payload, encode_cursor_payload
+from utils.principal import Principal
+from utils.item_search import build_match_query, fulltext_enabled, fulltext_matches, ilike_filter
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Sortable columns; each has a (user_id, column, id) index for keyset paging
+SORT_COLUMNS = {
+    "created_at": Item.created_at,
+    "updated_at": Item.updated_at,
+    "name": Item.name,
+    "price": Item.price,
+    "effective_expiry_date": Item.effective_expiry_date,
+}
+
+# Legacy sort names map onto the denormalized expiry column
+SORT_ALIASES = {
+    "expiration_date": "effective_expiry_date",
+    "renewal_date": "effective_expiry_date",
+}
+
+_DATETIME_SORTS = {"created_at", "updated_at"}
+
+
+def _resolve_sort(sort_by: Optional[str]) -> str:
+    sort_by = SORT_ALIASES.get(sort_by, sort_by)
+    return sort_by if sort_by in SORT_COLUMNS else "created_at"
+
+
+def encode_cursor(sort_by: str, sort_order: str, value, item_id: int) -> str:
+    """Opaque cursor for the row after which the next page starts"""
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    return encode_cursor_payload({"s": sort_by, "o": sort_order, "v": value, "id": item_id})
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> tuple:
+    """Return the (sort value, id) encoded in a cursor, validating it matches the query"""
+    try:
+        payload = decode_cursor_payload(cursor)
+        value, item_id = payload["v"], int(payload["id"])
+        if payload["s"] != sort_by or payload["o"] != sort_order:
+            raise ValueError("cursor was issued for a different sort")
+        if value is not None:
+            if sort_by in _DATETIME_SORTS:
+                value = datetime.fromisoformat(value)
+            elif sort_by == "effective_expiry_date":
+                value = date.fromisoformat(value)
+            elif sort_by == "price":
+                value = float(value)
+            elif not isinstance(value, str):
+                raise TypeError(f"expected a string for {sort_by}")
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+    return value, item_id
+
+
+def _keyset_segments(column, sort_order: str, after: Optional[tuple]) -> list:
+    """
+    Split the rows after the cursor into index-friendly (where, order by)
+    segments, in page order. NULL sort values come first when ascending and
+    last when descending; each segment is a range seek on (user_id, column, id)
+    rather than an OR that forces a filtered scan.
+    """
+    ascending = sort_order == "asc"
+    null_block = [column.is_(None)]
+    value_block = [column.isnot(None)]
+    null_order = (Item.id.asc() if ascending else Item.id.desc(),)
+    value_order = (column.asc(), Item.id.asc()) if ascending else (column.desc(), Item.id.desc())
+
+    if after is not None:
+        value, item_id = after
+        if value is None:
+            null_block.append(Item.id > item_id if ascending else Item.id < item_id)
+        else:
+            key = tuple_(column, Item.id)
+            value_block.append(key > tuple_(value, item_id) if ascending else key < tuple_(value, item_id))
+
+    segments = [(null_block, null_order), (value_block, value_order)]
+    if not ascending:
+        segments.reverse()
+
+    # Drop the block the cursor has already moved past
+    if after is not None and (after[0] is not None) == ascending:
+        segments = segments[1:]
+    return segments
+
 
 @router.get("/items")
 @router.get("/items/")
-def list_items(
+async def list_items(
     skip: int = Query(0, ge=0, description="Number of items to skip"),
     limit: int = Query(100, ge=1, le=500, description="Max number of items to return"),
     category: Optional[str] = Query(None, description="Filter by category"),
     item_type: Optional[str] = Query(None, description="Filter by type (document/subscription)"),
-    search: Optional[str] = Query(None, description="Search in name and notes"),
-    sort_by: Optional[str] = Query("created_at", description="Sort field"),
+    search: Optional[str] = Query(None, description="Search in name, notes, document number and dynamic fields (prefix match)"),
+    sort_by: Optional[str] = Query(None, description="Sort field (default: relevance when searching, else created_at)"),
     sort_order: Optional[str] = Query("desc", pattern="^(asc|desc)$", description="Sort order"),
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user)
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="Pagination mode"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page (cursor mode)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: offset mode only)"),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_current_principal)
 ):
     """
-    List user's items with pagination, search, and filtering
+    List user's items with pagination, search, and filtering.
+
+    Offset mode (default) pages with skip/limit. Cursor mode pages with the
+    opaque next_cursor of the previous response, so deep pages cost the same
+    as the first one. Relevance ranking is only available in offset mode.
     """
     # Base query
     query = select(Item).where(Item.user_id == user.id)
-    
+
     # Apply filters
     if category:
         query = query.where(Item.category == category)
-    
+
     if item_type:
         query = query.where(Item.type == item_type)
-    
+
+    rank_column = None
     if search:
-        search_term = f"%{search}%"
-        query = query.where(
-            or_(
-                Item.name.ilike(search_term),
-                Item.notes.ilike(search_term),
-                Item.document_number.ilike(search_term)
-            )
-        )
-    
+        match_query = build_match_query(search) if fulltext_enabled(session) else ""
+        if match_query:
+            matches = fulltext_matches(match_query)
+            query = query.join(matches, matches.c.item_id == Item.id)
+            rank_column = matches.c.rank
+        else:
+            query = query.where(ilike_filter(search))
+
+    if include_total is None:
+        include_total = pagination == "offset"
+
     # Count total (before pagination)
-    count_query = select(func.count()).select_from(query.subquery())
-    total = session.exec(count_query).one()
-    
-    # Apply sorting
-    sort_column = getattr(Item, sort_by, Item.created_at)
+    total = None
+    if include_total:
+        count_query = select(func.count()).select_from(query.subquery())
+        total = (await session.exec(count_query)).one()
+
+    # Full-text searches rank by relevance unless another sort is requested
+    if rank_column is not None and pagination == "offset" and sort_by in (None, "relevance"):
+        query = query.order_by(rank_column, Item.id.desc()).offset(skip).limit(limit)
+        items = (await session.exec(query)).all()
+
+        logger.info(f"📋 Listed {len(items)} ranked items for user {user.email}")
+
+        return {
+            "items": items,
+            "total": total,
+            "skip": skip,
+            "limit": limit,
+            "has_more": (skip + len(items)) < total if total is not None else len(items) == limit
+        }
+
+    sort_by = _resolve_sort(sort_by)
+    sort_column = SORT_COLUMNS[sort_by]
+
+    if pagination == "cursor":
+        after = decode_cursor(cursor, sort_by, sort_order) if cursor else None
+
+        # Fetch one extra row to learn whether another page exists
+        rows = []
+        for conditions, order in _keyset_segments(sort_column, sort_order, after):
+            segment_query = query.where(*conditions).order_by(*order).limit(limit + 1 - len(rows))
+            rows.extend((await session.exec(segment_query)).all())
+            if len(rows) > limit:
+                break
+        items = rows[:limit]
+        has_more = len(rows) > limit
+        next_cursor = None
+        if has_more:
+            last = items[-1]
+            next_cursor = encode_cursor(sort_by, sort_order, getattr(last, sort_by), last.id)
+
+        logger.info(f"📋 Listed {len(items)} items (cursor) for user {user.email}")
+
+        return {
+            "items": items,
+            "total": total,
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "has_more": has_more
+        }
+
+    # Apply sorting (id breaks ties so pages are stable)
     if sort_order == "desc":
-        query = query.order_by(sort_column.desc())
+        query = query.order_by(sort_column.desc().nulls_last(), Item.id.desc())
     else:
-        query = query.order_by(sort_column.asc())
-    
+        query = query.order_by(sort_column.asc().nulls_first(), Item.id.asc())
+
     # Apply pagination
     query = query.offset(skip).limit(limit)
-    
-    items = session.exec(query).all()
-    
+
+    items = (await session.exec(query)).all()
+
     logger.info(f"📋 Listed {len(items)} items for user {user.email}")
-    
+
     return {
         "items": items,
         "total": total,
         "skip": skip,
         "limit": limit,
-        "has_more": (skip + len(items)) < total
+        "has_more": (skip + len(items)) < total if total is not None else len(items) == limit
     }
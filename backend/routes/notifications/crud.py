@@ -1,28 +1,37 @@
 # routes/notifications/crud.py
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date, timedelta
+from typing import List, Optional
+from pydantic import BaseModel, Field
 
-from database import get_session
+from database import get_session, get_async_session
 from models.user import User
-from utils.auth import get_current_user
+from utils.auth import get_current_user, get_current_admin, get_current_principal
+from utils.principal import Principal
 from utils.notification_service import (
     mark_notification_read,
+    mark_notifications_read,
     mark_all_read
 )
 
 router = APIRouter()
 
+MAX_MARK_READ_IDS = 500
+
 
 @router.post("/notifications/{notification_id}/read")
 @router.post("/notifications/{notification_id}/read/")
-def mark_as_read(
+async def mark_as_read(
     notification_id: int,
-    user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Mark a notification as read"""
-    success = mark_notification_read(notification_id, user.id, session)
+    success = await session.run_sync(
+        lambda sync_session: mark_notification_read(notification_id, user.id, sync_session)
+    )
     
     if not success:
         raise HTTPException(status_code=404, detail="Notification not found")
@@ -32,28 +41,52 @@ def mark_as_read(
 
 @router.post("/notifications/mark-all-read")
 @router.post("/notifications/mark-all-read/")
-def mark_all_as_read(
-    user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+async def mark_all_as_read(
+    user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Mark all notifications as read"""
-    count = mark_all_read(user.id, session)
-    return {"message": f"Marked {count} notifications as read"}
+    count = await session.run_sync(lambda sync_session: mark_all_read(user.id, sync_session))
+    return {"message": f"Marked {count} notifications as read", "count": count}
+
+
+class MarkReadRequest(BaseModel):
+    ids: Optional[List[int]] = Field(None, max_length=MAX_MARK_READ_IDS)
+    item_id: Optional[int] = None
+
+
+@router.post("/notifications/mark-read")
+@router.post("/notifications/mark-read/")
+async def mark_many_as_read(
+    data: MarkReadRequest,
+    user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Mark notifications as read by ids and/or by item"""
+    if data.ids is None and data.item_id is None:
+        raise HTTPException(status_code=400, detail="Specify ids and/or item_id")
+    
+    count = await session.run_sync(
+        lambda sync_session: mark_notifications_read(
+            user.id, sync_session, notification_ids=data.ids, item_id=data.item_id
+        )
+    )
+    return {"message": f"Marked {count} notifications as read", "count": count}
 
 
-@router.post("/notifications/check-expiring")
-@router.post("/notifications/check-expiring/")
+@router.post("/notifications/check-expiring", status_code=202)
+@router.post("/notifications/check-expiring/", status_code=202)
 def trigger_expiry_check(
-    user: User = Depends(get_current_user),
+    admin: User = Depends(get_current_admin),
     session: Session = Depends(get_session)
 ):
-    """Manually trigger expiry check (for testing)"""
-    from utils.notification_service import check_expiring_items
+    """Queue an expiry sweep of every timezone now (admins only); the scheduler workers run it"""
+    from utils.notification_scheduler import enqueue_expiry_sweep
     
-    count = check_expiring_items(session)
+    runs_queued = enqueue_expiry_sweep(session)
     return {
-        "message": "Expiry check completed",
-        "notifications_created": count
+        "message": "Expiry check queued",
+        "runs_queued": runs_queued
     }
 
 
@@ -63,30 +96,32 @@ def test_email(
     user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
-    """Test email sending (for debugging)"""
+    """Queue a test email (for debugging); delivery shows up under email_outbox in /metrics"""
     from utils.email_service import send_expiry_notification_email
     
     print(f"🧪 Testing email for user: {user.email}")
     
-    # Send a test email
-    success = send_expiry_notification_email(
-        to_email=user.email,
-        user_name=user.full_name or "User",
-        item_name="Test Document",
-        item_type="Document",
-        expiry_date=date.today() + timedelta(days=3),
-        days_until_expiry=3
-    )
-    
-    if success:
-        return {
-            "success": True,
-            "message": "✅ Test email sent successfully! Check your inbox (and spam folder).",
-            "email": user.email
-        }
-    else:
+    # Queue a test email
+    try:
+        outbox_id = send_expiry_notification_email(
+            to_email=user.email,
+            user_name=user.full_name or "User",
+            item_name="Test Document",
+            item_type="Document",
+            expiry_date=date.today() + timedelta(days=3),
+            days_until_expiry=3
+        )
+    except Exception as e:
+        print(f"❌ Failed to queue test email: {e}")
         return {
             "success": False,
-            "message": "❌ Failed to send email. Check backend logs for detailed error.",
+            "message": "❌ Failed to queue email. Check backend logs for detailed error.",
             "email": user.email
         }
+    
+    return {
+        "success": True,
+        "message": "✅ Test email queued! Check your inbox (and spam folder) shortly.",
+        "email": user.email,
+        "outbox_id": outbox_id
+    }
@@ -1,57 +1,98 @@
 # routes/notifications/list.py
-from fastapi import APIRouter, Depends
-from sqlmodel import Session
-from typing import List
-from pydantic import BaseModel
-
-from database import get_session
-from models.user import User
-from utils.auth import get_current_user
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+
+from database import get_async_session
+from utils.auth import get_current_principal
+from utils.cursor import decode_cursor_payload, encode_cursor_payload
+from utils.principal import Principal
 from utils.notification_service import get_user_notifications
+from utils.unread_counts import cache_unread_count, count_unread, get_cached_unread_count, unread_etag
 
 router = APIRouter()
 
 
 class NotificationResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     title: str
     message: str
     notification_type: str
     is_read: bool
-    created_at: str
+    created_at: datetime
     item_id: int
 
 
+def encode_notification_cursor(notification) -> str:
+    return encode_cursor_payload({"c": notification.created_at.isoformat(), "id": notification.id})
+
+
+def decode_notification_cursor(cursor: str) -> tuple:
+    try:
+        payload = decode_cursor_payload(cursor)
+        return datetime.fromisoformat(payload["c"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
 @router.get("/notifications", response_model=List[NotificationResponse])
 @router.get("/notifications/", response_model=List[NotificationResponse])
-def get_notifications(
+async def get_notifications(
+    response: Response,
     unread_only: bool = False,
-    user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    limit: int = Query(50, ge=1, le=200, description="Max number of notifications to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_async_session)
 ):
-    """Get all notifications for the current user"""
-    notifications = get_user_notifications(user.id, session, unread_only)
-    
-    return [
-        NotificationResponse(
-            id=n.id,
-            title=n.title,
-            message=n.message,
-            notification_type=n.notification_type,
-            is_read=n.is_read,
-            created_at=n.created_at.isoformat(),
-            item_id=n.item_id
+    """
+    Get the current user's notifications, newest first.
+
+    Pages are keyset-paginated on (created_at, id); when more remain, the
+    X-Next-Cursor response header holds the cursor for the next page.
+    """
+    after = decode_notification_cursor(cursor) if cursor else None
+
+    # Fetch one extra row to learn whether another page exists
+    notifications = await session.run_sync(
+        lambda sync_session: get_user_notifications(
+            user.id, sync_session, unread_only, limit=limit + 1, after=after
         )
-        for n in notifications
-    ]
+    )
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        response.headers["X-Next-Cursor"] = encode_notification_cursor(notifications[-1])
+    
+    return notifications
 
 
 @router.get("/notifications/unread-count")
 @router.get("/notifications/unread-count/")
-def get_unread_count(
-    user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+async def get_unread_count(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_async_session)
 ):
-    """Get count of unread notifications"""
-    notifications = get_user_notifications(user.id, session, unread_only=True)
-    return {"count": len(notifications)}
+    """
+    Get count of unread notifications.
+
+    Responds with an ETag; a matching If-None-Match gets 304 Not Modified.
+    """
+    count = get_cached_unread_count(user.id)
+    if count is None:
+        count = cache_unread_count(
+            user.id, await session.run_sync(lambda sync_session: count_unread(sync_session, user.id))
+        )
+
+    etag = unread_etag(count)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return {"count": count}
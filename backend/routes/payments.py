@@ -11,6 +11,7 @@ import stripe
 from models.user import User
 from database import get_session
 from utils.auth import get_current_user
+from utils.principal import invalidate_principal
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 logger = logging.getLogger(__name__)
@@ -54,6 +55,7 @@ async def create_checkout_session(
             user.stripe_customer_id = customer_id
             session.add(user)
             session.commit()
+            invalidate_principal(user.id)
             logger.info(f"✅ Created Stripe customer {customer_id} for user {user.email}")
         
         # Create checkout session
@@ -186,6 +188,7 @@ async def handle_checkout_completed(data: dict, session: Session):
         user.stripe_subscription_id = subscription_id
         session.add(user)
         session.commit()
+        invalidate_principal(user.id)
         logger.info(f"✅ Updated user {user.email} with subscription {subscription_id}")
     else:
         logger.warning(f"⚠️ User not found for customer {customer_id}")
@@ -211,6 +214,7 @@ async def handle_subscription_created(data: dict, session: Session):
         
         session.add(user)
         session.commit()
+        invalidate_principal(user.id)
         logger.info(f"✅ Activated premium subscription for {user.email}")
     else:
         logger.warning(f"⚠️ User not found for customer {customer_id}")
@@ -233,6 +237,7 @@ async def handle_subscription_updated(data: dict, session: Session):
         
         session.add(user)
         session.commit()
+        invalidate_principal(user.id)
         logger.info(f"✅ Updated subscription status for {user.email}: {status}")
     else:
         logger.warning(f"⚠️ User not found for customer {customer_id}")
@@ -253,6 +258,7 @@ async def handle_subscription_deleted(data: dict, session: Session):
         
         session.add(user)
         session.commit()
+        invalidate_principal(user.id)
         logger.info(f"✅ Canceled subscription for {user.email}")
     else:
         logger.warning(f"⚠️ User not found for customer {customer_id}")
@@ -273,6 +279,7 @@ async def handle_invoice_payment_succeeded(data: dict, session: Session):
         
         session.add(user)
         session.commit()
+        invalidate_principal(user.id)
         logger.info(f"✅ Updated billing period for {user.email}")
     else:
         logger.warning(f"⚠️ User not found for customer {customer_id}")
@@ -290,6 +297,7 @@ async def handle_invoice_payment_failed(data: dict, session: Session):
         user.subscription_status = "past_due"
         session.add(user)
         session.commit()
+        invalidate_principal(user.id)
         logger.warning(f"⚠️ Payment failed for {user.email}, status set to past_due")
     else:
         logger.warning(f"⚠️ User not found for customer {customer_id}")
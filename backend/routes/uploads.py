@@ -0,0 +1,43 @@
+"""
+Uploaded file endpoint
+"""
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.item import Item
+from database import get_async_session
+from utils.auth import get_current_principal
+from utils.principal import Principal
+from utils.upload_serving import serve_upload
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("/{key}")
+async def get_upload(
+    request: Request,
+    key: str,
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_current_principal)
+):
+    """
+    Serve a stored upload by its key, to users with an item that uses it as
+    its file or thumbnail. Keys are content hashes, which anyone holding the
+    same file can compute, so a key alone grants nothing.
+    """
+    path = f"/uploads/{key}"
+    owned = (await session.exec(
+        select(Item.id)
+        .where(Item.user_id == user.id, or_(Item.file_path == path, Item.thumbnail_path == path))
+        .limit(1)
+    )).first()
+    
+    if owned is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    return await serve_upload(request, key)
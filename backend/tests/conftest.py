@@ -1,5 +1,52 @@
+import asyncio
 import pytest
 import os
 
 # Use in-memory SQLite for tests
 os.environ["DATABASE_URL"] = "sqlite://"
+
+
+@pytest.fixture
+def db_engines(tmp_path):
+    """Sync and async engines sharing one temporary SQLite file"""
+    from sqlalchemy.pool import NullPool
+    from sqlmodel import SQLModel
+    from database import create_async_db_engine, create_db_engine
+
+    path = tmp_path / "test.db"
+    sync_engine = create_db_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(sync_engine)
+    # NullPool: every asyncio.run() below gets a fresh event loop
+    async_engine = create_async_db_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    yield sync_engine, async_engine
+    sync_engine.dispose()
+
+
+@pytest.fixture
+def call_async_route(db_engines):
+    """Call an async route function with an AsyncSession on the test database"""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    def call(route, **kwargs):
+        async def run():
+            async with AsyncSession(db_engines[1], expire_on_commit=False) as session:
+                return await route(session=session, **kwargs)
+        return asyncio.run(run())
+    return call
+
+
+@pytest.fixture(params=["local", "s3"])
+def storage_backend(request, tmp_path, monkeypatch):
+    """Each upload storage backend: sharded local directories, and S3 against the local stand-in"""
+    from utils import storage
+    from utils.local_s3 import LocalS3Server
+
+    monkeypatch.setattr(storage, "STORAGE_CHUNK_SIZE", 4096)
+    if request.param == "local":
+        yield storage.LocalStorage(str(tmp_path / "uploads"))
+        return
+    with LocalS3Server(access_key="test-key") as server:
+        yield storage.S3Storage(
+            server.endpoint_url, "uploads", access_key="test-key", secret_key="secret",
+            prefix="attachments", staging_dir=str(tmp_path),
+        )
@@ -0,0 +1,73 @@
+"""
+Tests for DELETE /auth/me: everything of the account goes in one transaction
+"""
+import asyncio
+import hashlib
+import os
+import sys
+from datetime import date
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.digest_entry import DigestEntry
+from models.item import Item
+from models.upload_blob import UploadBlob
+from models.user import User
+from routes.auth import profile
+from routes.auth.profile import delete_account
+from utils import storage as storage_utils
+from utils.auth import hash_password
+
+DATA = b"%PDF-1.4 passport scan"
+KEY = f"{hashlib.sha256(DATA).hexdigest()}.pdf"
+
+
+def _token_tables(engine):
+    with engine.begin() as connection:
+        for table in ("password_reset_tokens", "email_verification_tokens"):
+            connection.exec_driver_sql(
+                f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, token TEXT NOT NULL)"
+            )
+
+
+def test_account_with_attachments_is_deleted_with_its_tokens(db_engines, tmp_path, monkeypatch):
+    backend = storage_utils.LocalStorage(str(tmp_path / "uploads"))
+    monkeypatch.setattr(storage_utils, "_storage", backend)
+    monkeypatch.setattr(profile.limiter, "enabled", False)
+    engine = db_engines[0]
+    _token_tables(engine)
+
+    staged = os.path.join(backend.staging_dir, "upload.part")
+    with open(staged, "wb") as f:
+        f.write(DATA)
+    asyncio.run(backend.put(KEY, staged))
+
+    with Session(engine) as session:
+        user = User(email="leaving@example.com", password_hash=hash_password("secret-pass"))
+        session.add(user)
+        session.commit()
+        session.add(Item(name="Passport", category="Travel", type="document", file_path=f"/uploads/{KEY}", user_id=user.id))
+        session.add(UploadBlob(path=f"/uploads/{KEY}", sha256=KEY[:64], size=len(DATA), ref_count=1))
+        session.add(DigestEntry(
+            user_id=user.id, notification_id=1, to_email=user.email, user_name="Leaving", notification_type="expiring",
+            item_name="Passport", item_type="document", expiry_date=date.today(), days=3,
+        ))
+        for table in ("password_reset_tokens", "email_verification_tokens"):
+            session.exec(text(f"INSERT INTO {table} (user_id, token) VALUES (:user_id, 't')").bindparams(user_id=user.id))
+        session.commit()
+
+        result = asyncio.run(delete_account(
+            request=None, password_data={"password": "secret-pass"}, user=user, session=session
+        ))
+
+        assert result["items_deleted"] == 1 and result["files_deleted"] == 1
+        for table in ("password_reset_tokens", "email_verification_tokens"):
+            assert session.exec(text(f"SELECT COUNT(*) FROM {table}")).one()[0] == 0
+        assert session.exec(select(UploadBlob)).all() == []
+        # Held digest lines (recipient, item names) go with the account
+        assert session.exec(select(DigestEntry)).all() == []
+        assert session.exec(select(User)).all() == []
+    assert asyncio.run(backend.size(KEY)) is None
@@ -0,0 +1,58 @@
+"""
+Tests for engine construction, SQLite PRAGMAs and the startup self-check
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import SQLModel, Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from database import SQLITE_PRAGMAS, create_db_engine, database_self_check, install_sqlite_pragmas
+from models.notification import Notification
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_pragmas_applied_to_every_connection(file_engine):
+    with file_engine.connect() as first, file_engine.connect() as second:
+        for conn in (first, second):
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_PRAGMAS["busy_timeout"]
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+
+
+def test_self_check_reports_settings(file_engine):
+    report = database_self_check(file_engine)
+
+    assert report["dialect"] == "sqlite"
+    assert report["pragmas"]["journal_mode"] == "wal"
+    assert "warnings" not in report
+
+
+def test_self_check_warns_when_wal_unavailable():
+    report = database_self_check(create_db_engine("sqlite://"))
+
+    assert report["pragmas"]["journal_mode"] == "memory"
+    assert report["warnings"]
+
+
+def test_foreign_keys_enforced(file_engine):
+    with Session(file_engine) as session:
+        session.add(Notification(user_id=999, item_id=999, title="t", message="m"))
+        with pytest.raises(IntegrityError):
+            session.commit()
+
+
+def test_invalid_pragma_rejected():
+    with pytest.raises(ValueError):
+        install_sqlite_pragmas(create_db_engine("sqlite://"), {**SQLITE_PRAGMAS, "journal_mode": "WAL; DROP"})
@@ -0,0 +1,175 @@
+"""
+Tests for the email outbox, its workers and the local SMTP stand-in
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.email_outbox import EmailOutbox
+from models.item import Item
+from models.notification import Notification
+from models.user import User
+from utils import email_outbox, smtp_relay
+from utils.email_outbox import OutboxWorkerPool, drain_outbox, enqueue_email, purge_outbox
+from utils.local_smtp import LocalSMTPServer
+
+
+@pytest.fixture
+def relay(monkeypatch):
+    with LocalSMTPServer() as server:
+        monkeypatch.setattr(smtp_relay, "SMTP_RELAY_HOST", server.host)
+        monkeypatch.setattr(smtp_relay, "SMTP_RELAY_PORT", server.port)
+        monkeypatch.setattr(smtp_relay, "SMTP_RELAY_STARTTLS", False)
+        monkeypatch.setattr(smtp_relay, "SMTP_RELAY_TIMEOUT", 5.0)
+        smtp_relay.close_smtp_pool()
+        yield server
+        smtp_relay.close_smtp_pool()
+
+
+@pytest.fixture
+def engine(db_engines):
+    return db_engines[0]
+
+
+def _queue(engine, **kwargs):
+    with Session(engine) as session:
+        enqueue_email(
+            to_email=kwargs.pop("to_email", "user@example.com"),
+            subject=kwargs.pop("subject", "Hello"),
+            html_body="<p>Hello</p>",
+            plain_body="Hello",
+            session=session,
+            **kwargs
+        )
+        session.commit()
+        return session.exec(select(EmailOutbox.id).order_by(EmailOutbox.id.desc())).first()
+
+
+def _row(engine, outbox_id):
+    with Session(engine) as session:
+        return session.get(EmailOutbox, outbox_id)
+
+
+def test_drain_delivers_and_flags_the_notification(engine, relay):
+    with Session(engine) as session:
+        user = User(email="user@example.com")
+        session.add(user)
+        session.commit()
+        item = Item(name="Passport", category="Travel", type="document", user_id=user.id)
+        session.add(item)
+        session.commit()
+        notification = Notification(user_id=user.id, item_id=item.id, title="t", message="m")
+        session.add(notification)
+        session.commit()
+        notification_id = notification.id
+
+    outbox_id = _queue(engine, notification_id=notification_id)
+
+    assert drain_outbox(engine) == 1
+    assert drain_outbox(engine) == 0
+
+    row = _row(engine, outbox_id)
+    assert row.status == "sent" and row.attempts == 1 and row.sent_at is not None
+    # Reset and verification links do not outlive delivery
+    assert row.html_body == "" and row.plain_body is None
+    assert [m["Subject"] for m in relay.messages] == ["Hello"]
+    assert relay.messages[0]["From"] == "Remindes <no-reply@remindes.com>"
+    with Session(engine) as session:
+        assert session.get(Notification, notification_id).is_sent_via_email
+
+
+def test_failures_back_off_then_give_up(engine, relay, monkeypatch):
+    monkeypatch.setattr(email_outbox, "EMAIL_OUTBOX_MAX_ATTEMPTS", 3)
+    relay.fail_next = 10
+    outbox_id = _queue(engine)
+    now = datetime.utcnow()
+
+    assert drain_outbox(engine, now=now) == 1
+    row = _row(engine, outbox_id)
+    assert row.status == "pending" and row.attempts == 1
+    assert "451" in row.last_error
+    assert row.next_attempt_at >= now + timedelta(seconds=email_outbox.EMAIL_OUTBOX_BACKOFF_SECONDS - 1)
+
+    # Not due again until the backoff has passed
+    assert drain_outbox(engine, now=now) == 0
+
+    later = now + timedelta(days=1)
+    assert drain_outbox(engine, now=later) == 1
+    assert drain_outbox(engine, now=later + timedelta(days=1)) == 1
+    row = _row(engine, outbox_id)
+    assert row.status == "failed" and row.attempts == 3
+    assert relay.messages == []
+
+
+def test_purge_deletes_finished_rows_after_the_retention(engine, relay, monkeypatch):
+    monkeypatch.setattr(email_outbox, "EMAIL_OUTBOX_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(email_outbox, "EMAIL_OUTBOX_PURGE_BATCH", 1)
+    now = datetime.utcnow()
+    _queue(engine)
+    assert drain_outbox(engine) == 1
+    relay.fail_next = 1
+    failed_id = _queue(engine)
+    assert drain_outbox(engine) == 1
+    pending_id = _queue(engine)
+
+    assert purge_outbox(engine, now=now + timedelta(days=1)) == 0
+    with Session(engine) as session:
+        assert session.get(EmailOutbox, failed_id).status == "failed"
+
+    before = email_outbox._counters["purged"]
+    retention = timedelta(days=email_outbox.EMAIL_OUTBOX_RETENTION_DAYS + 1)
+    assert purge_outbox(engine, now=now + retention) == 2
+    with Session(engine) as session:
+        assert session.exec(select(EmailOutbox.id)).all() == [pending_id]
+    assert email_outbox._counters["purged"] - before == 2
+
+
+def test_backoff_doubles_up_to_the_cap():
+    base = email_outbox.EMAIL_OUTBOX_BACKOFF_SECONDS
+
+    assert email_outbox.retry_delay(1) == timedelta(seconds=base)
+    assert email_outbox.retry_delay(3) == timedelta(seconds=base * 4)
+    assert email_outbox.retry_delay(50) == timedelta(seconds=email_outbox.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS)
+
+
+def test_claims_are_exclusive_until_the_lease_expires(engine):
+    outbox_id = _queue(engine)
+    now = datetime.utcnow()
+
+    with Session(engine) as session:
+        assert [row.id for row in email_outbox._claim(session, 10, now)] == [outbox_id]
+        assert email_outbox._claim(session, 10, now) == []
+
+        # A worker that died mid-send: the row is picked up after the lease
+        expired = now + timedelta(seconds=email_outbox.EMAIL_OUTBOX_LEASE_SECONDS + 1)
+        reclaimed = email_outbox._claim(session, 10, expired)
+        assert [(row.id, row.attempts) for row in reclaimed] == [(outbox_id, 2)]
+
+
+def test_invalid_sender_is_rejected(engine):
+    with Session(engine) as session:
+        with pytest.raises(ValueError):
+            enqueue_email("user@example.com", "Hi", "<p>Hi</p>", from_email="hacker@evil.com", session=session)
+
+
+def test_worker_pool_drains_in_the_background(engine, relay):
+    pool = OutboxWorkerPool(workers=2, poll_seconds=0.05, engine=engine)
+    pool.start()
+    try:
+        outbox_ids = [_queue(engine, subject=f"Message {n}") for n in range(5)]
+        pool.wake()
+        deadline = time.monotonic() + 10
+        while len(relay.messages) < 5 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        pool.stop()
+
+    assert sorted(m["Subject"] for m in relay.messages) == [f"Message {n}" for n in range(5)]
+    assert all(_row(engine, outbox_id).status == "sent" for outbox_id in outbox_ids)
+    assert not pool.is_running()
@@ -0,0 +1,74 @@
+"""
+Tests for the precompiled email template engine
+"""
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from utils.email_service import render_digest_email, render_notification_emails
+from utils.email_templates import TEMPLATE_DIR, TemplateEngine, TemplateError
+
+
+@pytest.fixture
+def engine(tmp_path):
+    (tmp_path / "_footer.html").write_text("<p>{{ sender }}</p>\n")
+    (tmp_path / "page.html").write_text(
+        '<style>p { color: red; }</style>\n<p>{{ name }}</p>{{ body|safe }}\n{% include "_footer.html" %}\n'
+    )
+    (tmp_path / "page.txt").write_text("Hi {{ name }}\n")
+    return TemplateEngine(tmp_path).load()
+
+
+def test_html_is_escaped_unless_safe(engine):
+    rendered = engine.render("page.html", name="<b>Ann</b>", body="<hr>", sender="A & B")
+
+    assert rendered == (
+        "<style>p { color: red; }</style>\n<p>&lt;b&gt;Ann&lt;/b&gt;</p><hr>\n<p>A &amp; B</p>\n"
+    )
+    # Plain-text templates are never escaped
+    assert engine.render("page.txt", name="<Ann>") == "Hi <Ann>\n"
+
+
+def test_includes_are_inlined_and_not_templates_of_their_own(engine):
+    assert engine.get("page.html").variables == {"name", "body", "sender"}
+    with pytest.raises(TemplateError):
+        engine.get("_footer.html")
+
+
+def test_missing_variable_raises(engine):
+    with pytest.raises(KeyError):
+        engine.render("page.txt")
+
+
+def test_render_many_and_stats(engine):
+    rendered = engine.render_many("page.txt", [{"name": n} for n in ("a", "b", "c")])
+
+    assert rendered == ["Hi a\n", "Hi b\n", "Hi c\n"]
+    assert engine.stats()["renders"] == 3
+
+
+def test_shipped_templates_compile_and_render():
+    engine = TemplateEngine(TEMPLATE_DIR).load()
+    assert {"expiry_warning.html", "expired.txt", "digest.html", "contact.html"} <= set(engine._templates)
+
+    warning, = render_notification_emails("expiry_warning", [{
+        "user_name": "Ann", "item_name": "Passport <EU>", "item_type": "Document",
+        "expiry_date": date(2026, 1, 2), "days": 1,
+    }])
+    assert warning.subject == "⚠️ Passport <EU> expiring in 1 day"
+    assert "Passport &lt;EU&gt;" in warning.html_body
+    assert "January 02, 2026" in warning.plain_body and "{{" not in warning.html_body
+
+    digest = render_digest_email("Ann", [
+        {"notification_type": "expired", "item_name": "Visa", "item_type": "Document",
+         "expiry_date": date(2026, 1, 1), "days": 3},
+        {"notification_type": "expiry_warning", "item_name": "Card", "item_type": "Document",
+         "expiry_date": date(2026, 1, 9), "days": 2},
+    ])
+    assert digest.subject == "📋 2 items need your attention"
+    assert digest.html_body.index("Visa") < digest.html_body.index("Card")
+    assert "Expired:\n  - Visa (Document), January 01, 2026: Expired 3 days ago" in digest.plain_body
@@ -0,0 +1,254 @@
+"""
+Tests for the set-based expiry sweep
+"""
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlmodel.pool import StaticPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.digest_entry import DigestEntry
+from models.email_outbox import EmailOutbox
+from models.item import Item
+from models.notification import Notification
+from models.reminder_schedule import ReminderSchedule
+from models.user import User
+from utils import expiry_sweep, smtp_relay
+from utils.email_outbox import drain_outbox
+from utils.expiry_sweep import run_expiry_sweep
+from utils.local_smtp import LocalSMTPServer
+from utils.reminder_schedule import reschedule_items
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _user(session, email, **kwargs):
+    user = User(email=email, full_name="Test User", **kwargs)
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def _item(session, user, name, expiry, **kwargs):
+    item = Item(name=name, category="Travel", type="document", expiration_date=expiry, user_id=user.id, **kwargs)
+    item.refresh_effective_expiry()
+    session.add(item)
+    session.commit()
+    reschedule_items(session, user.id, [item.id])
+    session.commit()
+    session.refresh(item)
+    return item
+
+
+def test_creates_warning_and_expired_notifications(session):
+    user = _user(session, "a@example.com")
+    _item(session, user, "Passport", date.today() + timedelta(days=3))
+    _item(session, user, "Visa", date.today() - timedelta(days=2))
+    _item(session, user, "Licence", date.today() + timedelta(days=90))
+    _item(session, user, "No date", None)
+
+    report = run_expiry_sweep(session, chunk_size=2)
+
+    # Items without a date or beyond every reminder window are never scanned
+    assert report.items_scanned == 2
+    assert report.chunks == 1
+    assert report.notifications_created == 2
+    assert report.emails_queued == 2
+    assert set(report.timings) == {"candidates", "classify", "insert", "email", "digest"}
+
+    notifications = session.exec(select(Notification).order_by(Notification.notification_type)).all()
+    assert [n.notification_type for n in notifications] == ["expired", "expiry_warning"]
+    # Flagged by the outbox workers once delivered, not by the sweep
+    assert not any(n.is_sent_via_email for n in notifications)
+    assert "expires in 3 days" in notifications[1].message
+
+    outbox = session.exec(select(EmailOutbox).order_by(EmailOutbox.notification_id)).all()
+    assert [row.notification_id for row in outbox] == sorted(n.id for n in notifications)
+    assert all(row.status == "pending" and row.to_email == "a@example.com" for row in outbox)
+
+
+def test_second_run_is_deduplicated(session):
+    user = _user(session, "b@example.com")
+    _item(session, user, "Passport", date.today() + timedelta(days=1))
+    _item(session, user, "Visa", date.today() - timedelta(days=1))
+
+    first = run_expiry_sweep(session)
+    second = run_expiry_sweep(session)
+
+    assert first.notifications_created == 2
+    assert first.emails_queued == 2
+    assert second.notifications_created == 0
+    assert second.items_scanned == 0
+    assert len(session.exec(select(EmailOutbox)).all()) == 2
+
+
+def test_digest_users_get_one_email_for_all_items(session, monkeypatch):
+    digest_user = _user(session, "digest@example.com", daily_digest=True)
+    other = _user(session, "single@example.com")
+    for n in range(3):
+        _item(session, digest_user, f"Doc {n}", date.today() + timedelta(days=n + 1))
+    _item(session, digest_user, "Old visa", date.today() - timedelta(days=3))
+    _item(session, other, "Passport", date.today() + timedelta(days=2))
+
+    # A small chunk size makes the digest user's items span several chunks
+    report = run_expiry_sweep(session, chunk_size=2)
+
+    assert report.notifications_created == 5
+    assert report.digests_queued == 1
+    assert report.emails_saved == 3
+    assert report.emails_queued == 2
+
+    digest = session.exec(select(EmailOutbox).where(EmailOutbox.to_email == "digest@example.com")).one()
+    assert digest.subject == "📋 4 items need your attention"
+    assert "Old visa" in digest.plain_body and "Expired 3 days ago" in digest.plain_body
+    assert digest.notification_id is None
+
+    with LocalSMTPServer() as relay:
+        monkeypatch.setattr(smtp_relay, "SMTP_RELAY_HOST", relay.host)
+        monkeypatch.setattr(smtp_relay, "SMTP_RELAY_PORT", relay.port)
+        monkeypatch.setattr(smtp_relay, "SMTP_RELAY_STARTTLS", False)
+        smtp_relay.close_smtp_pool()
+        assert drain_outbox(session.get_bind()) == 2
+        smtp_relay.close_smtp_pool()
+
+    session.expire_all()
+    assert all(n.is_sent_via_email for n in session.exec(select(Notification)).all())
+
+
+def test_digest_entries_survive_a_sweep_that_fails_partway(session, monkeypatch):
+    digest_user = _user(session, "digest@example.com", daily_digest=True)
+    for n in range(4):
+        _item(session, digest_user, f"Doc {n}", date.today() + timedelta(days=n + 1))
+
+    insert = expiry_sweep._insert_notifications
+    calls = []
+
+    def fail_on_second_chunk(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("database went away")
+        return insert(*args, **kwargs)
+
+    monkeypatch.setattr(expiry_sweep, "_insert_notifications", fail_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        run_expiry_sweep(session, chunk_size=2)
+    session.rollback()
+    # The first chunk is committed with its held entries, and no email yet
+    assert len(session.exec(select(Notification)).all()) == 2
+    assert len(session.exec(select(DigestEntry)).all()) == 2
+    assert session.exec(select(EmailOutbox)).all() == []
+
+    monkeypatch.setattr(expiry_sweep, "_insert_notifications", insert)
+    report = run_expiry_sweep(session, chunk_size=2)
+
+    assert report.notifications_created == 2
+    assert report.digests_queued == 1
+    digest = session.exec(select(EmailOutbox)).one()
+    assert digest.subject == "📋 4 items need your attention"
+    assert sorted(json.loads(digest.notification_ids)) == sorted(
+        session.exec(select(Notification.id)).all()
+    )
+    assert session.exec(select(DigestEntry)).all() == []
+
+
+def test_deleted_items_leave_the_held_digest(db_engines, call_async_route, monkeypatch):
+    from routes.items import crud
+    from utils.principal import Principal
+
+    monkeypatch.setattr(crud.limiter, "enabled", False)
+    queue_digests = expiry_sweep._queue_digests
+    monkeypatch.setattr(expiry_sweep, "_queue_digests", lambda *args: None)
+    with Session(db_engines[0]) as session:
+        user = _user(session, "digest@example.com", daily_digest=True, email_verified=True)
+        items = [_item(session, user, f"Doc {n}", date.today() + timedelta(days=n + 1)) for n in range(3)]
+        run_expiry_sweep(session)
+        assert len(session.exec(select(DigestEntry)).all()) == 3
+
+        principal = Principal.from_user(user)
+        call_async_route(crud.delete_item, request=None, item_id=items[0].id, user=principal)
+        call_async_route(crud.bulk_delete_items, request=None, item_ids=[items[1].id], user=principal)
+
+        assert session.exec(select(DigestEntry.item_name)).all() == ["Doc 2"]
+        report = expiry_sweep.SweepReport()
+        queue_digests(session, [], report, 10)
+        assert report.digests_queued == 1
+        assert session.exec(select(EmailOutbox)).one().subject == "📋 1 item needs your attention"
+
+
+def test_respects_item_reminder_days_and_opt_out(session):
+    user = _user(session, "c@example.com", notification_days_before=7)
+    opted_out = _user(session, "d@example.com", email_notifications=False)
+    _item(session, user, "Custom", date.today() + timedelta(days=20), reminder_days_before=30)
+    _item(session, user, "Default", date.today() + timedelta(days=20))
+    _item(session, opted_out, "Ignored", date.today())
+
+    report = run_expiry_sweep(session, send_emails=False)
+
+    assert report.notifications_created == 1
+    notification = session.exec(select(Notification)).one()
+    assert notification.user_id == user.id
+
+
+def test_old_notifications_do_not_block(session):
+    user = _user(session, "e@example.com")
+    item = _item(session, user, "Passport", date.today() + timedelta(days=2))
+    session.add(Notification(
+        user_id=user.id,
+        item_id=item.id,
+        title="old",
+        message="old",
+        notification_type="expiry_warning",
+        created_at=datetime.utcnow() - timedelta(days=2),
+    ))
+    session.commit()
+
+    report = run_expiry_sweep(session, send_emails=False)
+
+    assert report.notifications_created == 1
+
+
+def test_dynamic_field_expiry_is_persisted(session):
+    user = _user(session, "f@example.com")
+    expiry = date.today() + timedelta(days=4)
+    item = _item(session, user, "Insurance", None, dynamic_fields=f'{{"expiration_date": "{expiry.isoformat()}"}}')
+
+    assert item.effective_expiry_date == expiry
+
+    report = run_expiry_sweep(session, send_emails=False)
+
+    assert report.notifications_created == 1
+
+
+def test_existing_dedup_key_is_not_notified_again(session):
+    user = _user(session, "g@example.com")
+    item = _item(session, user, "Passport", date.today() + timedelta(days=2))
+    assert run_expiry_sweep(session).notifications_created == 1
+
+    # The schedule forgets it fired, e.g. restored from a backup
+    reminder = session.exec(
+        select(ReminderSchedule).where(ReminderSchedule.item_id == item.id, ReminderSchedule.kind == "expiry_warning")
+    ).one()
+    reminder.fire_date, reminder.last_fired_date = date.today(), None
+    session.add(reminder)
+    session.commit()
+
+    report = run_expiry_sweep(session)
+
+    assert report.items_scanned == 1
+    assert report.notifications_created == 0
+    assert report.emails_queued == 0
+    notification = session.exec(select(Notification)).one()
+    assert notification.dedup_key == f"{item.id}:before:7:{item.effective_expiry_date.isoformat()}"
+    assert len(session.exec(select(EmailOutbox)).all()) == 1
@@ -0,0 +1,178 @@
+"""
+Tests for GET /items/{item_id}/file: ownership, immutable caching, conditional GETs and Range requests
+"""
+import asyncio
+import hashlib
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from database import get_async_session
+from models.item import Item
+from models.upload_blob import UploadBlob
+from models.user import User
+from routes.items import router as items_router
+from utils import storage as storage_utils, upload_serving
+from utils.auth import create_access_token
+from utils.principal import invalidate_principal
+from utils.upload_serving import IMMUTABLE_CACHE_CONTROL, RangeNotSatisfiable, parse_range
+
+DATA = os.urandom(200_000)
+SHA256 = hashlib.sha256(DATA).hexdigest()
+KEY = f"{SHA256}.pdf"
+
+
+@pytest.fixture
+def client(db_engines, storage_backend, monkeypatch):
+    monkeypatch.setattr(storage_utils, "_storage", storage_backend)
+    staged = os.path.join(storage_backend.staging_dir, "upload.part")
+    with open(staged, "wb") as f:
+        f.write(DATA)
+    asyncio.run(storage_backend.put(KEY, staged))
+
+    async def session_override():
+        async with AsyncSession(db_engines[1], expire_on_commit=False) as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(items_router)
+    app.dependency_overrides[get_async_session] = session_override
+    return TestClient(app)
+
+
+def _login(db_engines, email, file_path=None):
+    """Bearer headers for a new user and the id of an item of theirs"""
+    with Session(db_engines[0]) as session:
+        user = User(email=email, full_name="Test User", email_verified=True)
+        session.add(user)
+        session.commit()
+        item = Item(name="Passport", category="Travel", type="document", file_path=file_path, user_id=user.id)
+        session.add(item)
+        session.commit()
+        invalidate_principal(user.id)
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}, item.id
+
+
+def test_owner_gets_an_immutable_file_with_conditional_and_range_requests(client, db_engines):
+    headers, item_id = _login(db_engines, "owner@example.com", f"/uploads/{KEY}")
+    url = f"/items/{item_id}/file"
+
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["etag"] == f'"{KEY}"'
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["accept-ranges"] == "bytes"
+
+    # Revalidation never reads the file
+    revalidated = client.get(url, headers={**headers, "If-None-Match": f'W/"x", "{KEY}"'})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == f'"{KEY}"'
+
+    partial = client.get(url, headers={**headers, "Range": "bytes=1000-65535"})
+    assert partial.status_code == 206
+    assert partial.content == DATA[1000:65536]
+    assert partial.headers["content-range"] == f"bytes 1000-65535/{len(DATA)}"
+
+    suffix = client.get(url, headers={**headers, "Range": "bytes=-10", "If-Range": f'"{KEY}"'})
+    assert (suffix.status_code, suffix.content) == (206, DATA[-10:])
+    # A stale If-Range gets the whole, current file
+    stale = client.get(url, headers={**headers, "Range": "bytes=0-9", "If-Range": '"other"'})
+    assert (stale.status_code, stale.content) == (200, DATA)
+
+    assert client.get(url, headers={**headers, "Range": f"bytes={len(DATA)}-"}).status_code == 416
+
+
+def test_file_is_only_served_to_the_owner(client, db_engines):
+    _, item_id = _login(db_engines, "owner@example.com", f"/uploads/{KEY}")
+    other_headers, bare_item_id = _login(db_engines, "other@example.com")
+
+    assert client.get(f"/items/{item_id}/file").status_code == 401
+    assert client.get(f"/items/{item_id}/file", headers=other_headers).status_code == 404
+    assert client.get(f"/items/{bare_item_id}/file", headers=other_headers).json() == {
+        "detail": "Item has no attached file"
+    }
+
+
+def test_thumbnail_is_only_served_to_the_owner(client, db_engines, storage_backend):
+    thumbnail = f"{SHA256}.thumb.webp"
+    staged = os.path.join(storage_backend.staging_dir, "thumb.part")
+    with open(staged, "wb") as f:
+        f.write(b"RIFF-webp")
+    asyncio.run(storage_backend.put(thumbnail, staged))
+    headers, item_id = _login(db_engines, "owner@example.com", f"/uploads/{KEY}")
+    other_headers, bare_item_id = _login(db_engines, "other@example.com")
+    with Session(db_engines[0]) as session:
+        session.get(Item, item_id).thumbnail_path = f"/uploads/{thumbnail}"
+        session.commit()
+
+    response = client.get(f"/items/{item_id}/thumbnail", headers=headers)
+    assert (response.status_code, response.content) == (200, b"RIFF-webp")
+    assert response.headers["content-type"] == "image/webp"
+    # Same content hash as the file, but a different representation
+    assert response.headers["etag"] == f'"{thumbnail}"'
+    assert client.get(
+        f"/items/{item_id}/thumbnail", headers={**headers, "If-None-Match": f'"{KEY}"'}
+    ).status_code == 200
+    assert client.get(f"/items/{item_id}/thumbnail", headers=other_headers).status_code == 404
+    assert client.get(f"/items/{bare_item_id}/thumbnail", headers=other_headers).json() == {
+        "detail": "Item has no thumbnail"
+    }
+
+
+def test_accel_redirect_hands_local_files_to_nginx(client, db_engines, storage_backend, monkeypatch):
+    monkeypatch.setattr(upload_serving, "UPLOAD_ACCEL_REDIRECT", "/_uploads/")
+    headers, item_id = _login(db_engines, "owner@example.com", f"/uploads/{KEY}")
+
+    response = client.get(f"/items/{item_id}/file", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{KEY}"'
+    if storage_backend.name == "local":
+        assert response.content == b""
+        assert response.headers["x-accel-redirect"] == f"/_uploads/{SHA256[:2]}/{SHA256[2:4]}/{KEY}"
+    else:
+        # Objects in S3 are not on nginx's disk
+        assert response.content == DATA
+        assert "x-accel-redirect" not in response.headers
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=900-5000", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=-5000", 1000) == (0, 999)
+    # Sent whole instead
+    for header in ("bytes=0-1,5-6", "items=0-1", "bytes=a-b", "bytes=-", "bytes=5", "bytes=9-5"):
+        assert parse_range(header, 1000) is None
+    for header in ("bytes=1000-", "bytes=1000-1200", "bytes=-0"):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range(header, 1000)
+
+
+def test_json_routes_cannot_point_items_at_stored_files(client, db_engines):
+    headers, item_id = _login(db_engines, "owner@example.com", f"/uploads/{KEY}")
+    with Session(db_engines[0]) as session:
+        session.add(UploadBlob(path=f"/uploads/{KEY}", sha256=SHA256, size=len(DATA), ref_count=1))
+        session.commit()
+
+    # file_path is not client-writable: no second, uncounted reference to the blob
+    created = client.post("/items", headers=headers, json={
+        "name": "Copy", "category": "Travel", "type": "document", "file_path": f"/uploads/{KEY}",
+    })
+    assert created.status_code == 200
+    assert created.json()["file_path"] is None
+    patched = client.patch(f"/items/{created.json()['id']}", headers=headers, json={"file_path": f"/uploads/{KEY}"})
+    assert patched.json()["file_path"] is None
+
+    assert client.delete(f"/items/{created.json()['id']}", headers=headers).status_code == 200
+    assert client.get(f"/items/{item_id}/file", headers=headers).content == DATA
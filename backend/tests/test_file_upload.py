@@ -0,0 +1,146 @@
+"""
+Tests for the streaming upload stage, the blob store and the upload size limit middleware
+"""
+import asyncio
+import hashlib
+import io
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request, UploadFile
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.upload_blob import UploadBlob
+from utils import file as file_utils, storage as storage_utils
+from utils.blob_store import attach_upload, purge_uploads, release_uploads, storage_report
+from utils.file import delete_upload, place_upload, save_upload
+from utils.storage import LocalStorage
+from utils.upload_limit import UploadSizeLimitMiddleware
+
+PDF = b"%PDF-1.4\n" + b"0123456789" * 5000
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    path = tmp_path / "uploads"
+    monkeypatch.setattr(storage_utils, "_storage", LocalStorage(str(path)))
+    monkeypatch.setattr(file_utils, "UPLOAD_CHUNK_SIZE", 4096)
+    return path
+
+
+def _files(path):
+    """Stored and staged files, relative to the upload directory"""
+    return sorted(
+        os.path.relpath(os.path.join(root, name), path) for root, _, names in os.walk(path) for name in names
+    )
+
+
+def _save(data, filename="scan.PDF"):
+    return asyncio.run(save_upload(UploadFile(file=io.BytesIO(data), filename=filename)))
+
+
+def _stored(file_path):
+    """Relative location of a stored file_path in the sharded upload directory"""
+    name = os.path.basename(file_path)
+    return os.path.join(name[:2], name[2:4], name)
+
+
+def test_streams_to_disk_with_hash_and_mime(upload_dir):
+    stored = _save(PDF)
+
+    sha256 = hashlib.sha256(PDF).hexdigest()
+    assert stored.path == f"/uploads/{sha256}.pdf"
+    assert stored.size == len(PDF)
+    assert stored.sha256 == sha256
+    assert stored.mime_type == "application/pdf"
+    # Nothing carries the final name until the blob store places it
+    assert _files(upload_dir) == [os.path.join(".staging", os.path.basename(stored.partial_path))]
+
+    asyncio.run(place_upload(stored))
+    assert _files(upload_dir) == [os.path.join(sha256[:2], sha256[2:4], f"{sha256}.pdf")]
+    assert (upload_dir / _stored(stored.path)).read_bytes() == PDF
+
+    assert asyncio.run(delete_upload(stored.path))
+    assert not asyncio.run(delete_upload(stored.path))
+    assert _files(upload_dir) == []
+
+
+def test_identical_uploads_share_one_blob(upload_dir, db_engines):
+    with Session(db_engines[0]) as session:
+        paths = [asyncio.run(attach_upload(session, _save(PDF))) for _ in range(3)]
+        session.commit()
+        other = asyncio.run(attach_upload(session, _save(PDF + b"v2")))
+        session.commit()
+
+        assert len(set(paths)) == 1
+        assert _files(upload_dir) == sorted(_stored(p) for p in (paths[0], other))
+        assert storage_report(session) == {
+            "blobs": 2,
+            "references": 4,
+            "stored_bytes": 2 * len(PDF) + 2,
+            "referenced_bytes": 4 * len(PDF) + 2,
+            "bytes_saved": 2 * len(PDF),
+        }
+
+        # Deleting items only drops references until the last one goes
+        released = release_uploads(session, paths[:2] + [other])
+        session.commit()
+        assert asyncio.run(purge_uploads(session, released)) == 1
+        assert _files(upload_dir) == [_stored(paths[0])]
+        assert session.exec(select(UploadBlob.ref_count)).all() == [1]
+
+        released = release_uploads(session, paths[2:])
+        session.commit()
+        assert asyncio.run(purge_uploads(session, released)) == 1
+        assert _files(upload_dir) == []
+        assert session.exec(select(UploadBlob)).all() == []
+
+        # Files from before the blob store are removed with their item
+        legacy_path = "/uploads/0235f403-54a2-4ab1-9058-ffdd01310ff1.png"
+        legacy_file = storage_utils.get_storage().local_path(os.path.basename(legacy_path))
+        os.makedirs(os.path.dirname(legacy_file))
+        with open(legacy_file, "wb") as f:
+            f.write(b"x")
+        legacy = release_uploads(session, [legacy_path])
+        assert asyncio.run(purge_uploads(session, legacy)) == 1
+        assert _files(upload_dir) == []
+
+
+@pytest.mark.parametrize("data, status", [
+    (PDF, 413),
+    (b"MZ" + b"\0" * 5000, 400),
+    (b"", 400),
+], ids=["too-large", "bad-mime", "empty"])
+def test_rejected_uploads_leave_nothing_behind(upload_dir, monkeypatch, data, status):
+    monkeypatch.setattr(file_utils, "MAX_FILE_SIZE", 10_000)
+
+    with pytest.raises(HTTPException) as exc:
+        _save(data)
+
+    assert exc.value.status_code == status
+    assert _files(upload_dir) == []
+
+
+def test_middleware_caps_bodies_with_or_without_content_length():
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_body_size=1000)
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        return {"received": len(await request.body())}
+
+    client = TestClient(app)
+    headers = {"content-type": "multipart/form-data; boundary=x"}
+
+    assert client.post("/upload", content=b"a" * 1000, headers=headers).json() == {"received": 1000}
+    assert client.post("/upload", content=b"a" * 1001, headers=headers).status_code == 413
+    # A generator body is sent chunked, without a Content-Length
+    chunked = client.post("/upload", content=(b"a" * 400 for _ in range(3)), headers=headers)
+    assert chunked.status_code == 413
+    assert chunked.json() == {"detail": "File too large. Maximum size is 10MB."}
+    # Other bodies are left alone
+    assert client.post("/upload", content=b"a" * 2000).json() == {"received": 2000}
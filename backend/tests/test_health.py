@@ -5,6 +5,9 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from main import app
+from models.user import User
+from utils.auth import get_current_admin
+from utils.metrics import Sampled
 
 client = TestClient(app)
 
@@ -19,3 +22,25 @@ def test_health_endpoint():
     data = res.json()
     assert "status" in data
     assert "database" in data
+
+def test_metrics_endpoint_is_admin_only():
+    assert client.get("/metrics").status_code == 401
+
+    app.dependency_overrides[get_current_admin] = lambda: User(email="admin@example.com")
+    try:
+        res = client.get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+    assert res.status_code == 200
+    assert "item_stats" in res.json()
+    assert "principal_cache" in res.json()
+    assert "unread_counts" in res.json()
+    assert "notification_retention" in res.json()
+
+def test_sampled_queries_run_once_per_ttl():
+    calls = []
+    sampled = Sampled(lambda: calls.append(1) or len(calls), ttl=60)
+    assert [sampled(), sampled()] == [1, 1]
+    sampled.clear()
+    assert sampled() == 2
+    assert Sampled(lambda: calls.append(1) or len(calls), ttl=0)() == 3
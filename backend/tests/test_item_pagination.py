@@ -0,0 +1,118 @@
+"""
+Tests for offset and cursor pagination in GET /items
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.item import Item
+from models.user import User
+from routes.items.search import list_items
+from utils.cursor import encode_cursor_payload
+
+
+@pytest.fixture
+def session(db_engines):
+    with Session(db_engines[0]) as session:
+        yield session
+
+
+@pytest.fixture
+def list_page(call_async_route, user):
+    def list_page(**kwargs):
+        params = dict(
+            skip=0, limit=10, category=None, item_type=None, search=None,
+            sort_by="created_at", sort_order="desc", pagination="offset",
+            cursor=None, include_total=None,
+        )
+        params.update(kwargs)
+        return call_async_route(list_items, user=user, **params)
+    return list_page
+
+
+@pytest.fixture
+def user(session):
+    user = User(email="pages@example.com")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    for n in range(25):
+        item = Item(
+            name=f"Item {n % 7}",
+            category="Travel",
+            type="document",
+            # Every fifth item has no expiry to exercise NULL ordering
+            expiration_date=None if n % 5 == 0 else date.today() + timedelta(days=n % 4),
+            user_id=user.id,
+        )
+        item.refresh_effective_expiry()
+        session.add(item)
+    session.commit()
+    return user
+
+
+def _walk(list_page, **kwargs):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = list_page(pagination="cursor", cursor=cursor, limit=4, **kwargs)
+        ids.extend(item.id for item in page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            assert cursor is None
+            return ids, pages
+
+
+def test_offset_mode_keeps_total(list_page):
+    page = list_page(skip=20)
+
+    assert page["total"] == 25
+    assert len(page["items"]) == 5
+    assert page["has_more"] is False
+
+
+@pytest.mark.parametrize("sort_by", ["created_at", "name", "expiration_date", "price"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_cursor_walk_matches_offset_order(list_page, sort_by, sort_order):
+    expected = [item.id for item in list_page(limit=100, sort_by=sort_by, sort_order=sort_order)["items"]]
+
+    ids, pages = _walk(list_page, sort_by=sort_by, sort_order=sort_order)
+
+    assert ids == expected
+    assert pages == 7
+
+
+def test_cursor_mode_omits_total_by_default(list_page):
+    page = list_page(pagination="cursor")
+
+    assert page["total"] is None
+    assert page["next_cursor"]
+
+
+def test_cursor_for_other_sort_is_rejected(list_page):
+    cursor = list_page(pagination="cursor")["next_cursor"]
+
+    with pytest.raises(HTTPException) as exc:
+        list_page(pagination="cursor", cursor=cursor, sort_by="name")
+    assert exc.value.status_code == 400
+
+
+def test_garbage_cursor_is_rejected(list_page):
+    with pytest.raises(HTTPException) as exc:
+        list_page(pagination="cursor", cursor="not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("value", [["a"], {"a": 1}, 5])
+def test_cursor_value_of_the_wrong_type_is_rejected(list_page, value):
+    cursor = encode_cursor_payload({"s": "name", "o": "asc", "v": value, "id": 1})
+    with pytest.raises(HTTPException) as exc:
+        list_page(pagination="cursor", cursor=cursor, sort_by="name", sort_order="asc")
+    assert exc.value.status_code == 400
+    assert exc.value.detail.startswith("Invalid cursor")
@@ -0,0 +1,104 @@
+"""
+Tests for FTS5-backed item search and its ILIKE fallback
+"""
+import os
+import sys
+
+import pytest
+from sqlmodel import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.item import Item
+from models.user import User
+from routes.items.search import list_items
+from utils.item_search import build_match_query, ensure_fulltext_index, fulltext_enabled, register_fulltext_engine
+
+
+def _seed(session):
+    user = User(email="search@example.com")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    session.add_all([
+        Item(name="Passport", category="Travel", type="document", notes="renew at embassy", user_id=user.id),
+        Item(name="Car insurance", category="Vehicle", type="document", notes="passport copy attached", user_id=user.id),
+        Item(name="Health card", category="Health", type="document", user_id=user.id,
+             dynamic_fields='{"policy_number": "HX-99821", "provider": "Allianz"}'),
+    ])
+    session.commit()
+    return user
+
+
+@pytest.fixture
+def search(call_async_route):
+    def search(user, term, **kwargs):
+        params = dict(
+            skip=0, limit=50, category=None, item_type=None, search=term,
+            sort_by=None, sort_order="desc", pagination="offset",
+            cursor=None, include_total=None,
+        )
+        params.update(kwargs)
+        return call_async_route(list_items, user=user, **params)
+    return search
+
+
+@pytest.fixture
+def session(db_engines):
+    sync_engine, async_engine = db_engines
+    assert ensure_fulltext_index(sync_engine)
+    register_fulltext_engine(async_engine.sync_engine)
+    with Session(sync_engine) as session:
+        yield session
+
+
+def test_build_match_query_quotes_tokens():
+    assert build_match_query('pass "OR" x*') == '"pass"* "OR"* "x"*'
+    assert build_match_query("  -- ") == ""
+
+
+def test_prefix_match_ranks_name_first(session, search):
+    user = _seed(session)
+
+    result = search(user, "pass")
+
+    assert [item.name for item in result["items"]] == ["Passport", "Car insurance"]
+    assert result["total"] == 2
+
+
+def test_dynamic_field_values_are_indexed(session, search):
+    user = _seed(session)
+
+    assert [item.name for item in search(user, "allianz")["items"]] == ["Health card"]
+    assert [item.name for item in search(user, "HX 998")["items"]] == ["Health card"]
+
+
+def test_triggers_follow_updates_and_deletes(session, search):
+    user = _seed(session)
+    item = search(user, "passport")["items"][0]
+
+    item.name = "Identity card"
+    session.add(item)
+    session.commit()
+    assert [i.name for i in search(user, "identity")["items"]] == ["Identity card"]
+
+    session.delete(item)
+    session.commit()
+    assert search(user, "identity")["items"] == []
+
+
+def test_explicit_sort_overrides_relevance(session, search):
+    user = _seed(session)
+
+    result = search(user, "pass", sort_by="name", sort_order="asc")
+
+    assert [item.name for item in result["items"]] == ["Car insurance", "Passport"]
+
+
+def test_ilike_fallback_without_fts(db_engines, search):
+    with Session(db_engines[0]) as session:
+        assert not fulltext_enabled(session)
+        user = _seed(session)
+
+        assert {item.name for item in search(user, "ssport")["items"]} == {"Passport", "Car insurance"}
+        assert [item.name for item in search(user, "Allianz")["items"]] == ["Health card"]
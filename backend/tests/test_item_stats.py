@@ -0,0 +1,99 @@
+"""
+Tests for the single-query item statistics and their per-user cache
+"""
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.pool import StaticPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.item import Item
+from models.user import User
+from utils import item_stats
+from utils.item_stats import compute_item_stats, get_item_stats_cached, invalidate_item_stats
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    item_stats._cache.clear()
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def user(session):
+    user = User(email="stats@example.com")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def _item(session, user, **kwargs):
+    item = Item(name=kwargs.pop("name", "Item"), category=kwargs.pop("category", "Travel"), user_id=user.id, **kwargs)
+    item.refresh_effective_expiry()
+    session.add(item)
+    session.commit()
+    return item
+
+
+def test_counts_match_expected(session, user):
+    today = date(2026, 3, 10)
+    _item(session, user, type="document", expiration_date=today + timedelta(days=3))
+    _item(session, user, type="document", expiration_date=today + timedelta(days=20))
+    _item(session, user, type="document", expiration_date=today - timedelta(days=1), category="Health")
+    _item(session, user, type="subscription", renewal_date=today + timedelta(days=5), category="Subscriptions")
+    _item(session, user, type="subscription", billing_cycle="monthly", category="Subscriptions")
+
+    stats = compute_item_stats(session, user.id, today=today, now=datetime.utcnow())
+
+    assert stats["total_items"] == 5
+    assert stats["documents"] == 3
+    assert stats["subscriptions"] == 2
+    assert stats["active_subscriptions"] == 2
+    assert stats["expiring_soon"] == 3
+    assert stats["expiring_this_week"] == 2
+    assert stats["expired"] == 1
+    assert stats["by_category"] == {"Travel": 2, "Health": 1, "Subscriptions": 2}
+    summaries = stats["activity_summaries"]
+    assert summaries["subscriptions_renewing_week"] == 1
+    assert summaries["items_added_this_month"] == 5
+    assert summaries["items_expiring_this_month"] == 4
+
+
+def test_empty_user_returns_zeroes(session, user):
+    stats = compute_item_stats(session, user.id)
+
+    assert stats["total_items"] == 0
+    assert stats["by_category"] == {}
+
+
+def test_cache_hit_and_invalidation(session, user):
+    _item(session, user, type="document")
+
+    first = get_item_stats_cached(session, user.id)
+    _item(session, user, type="document")
+    second = get_item_stats_cached(session, user.id)
+
+    assert second is first  # served from cache
+    assert item_stats._cache.hits == 1
+
+    invalidate_item_stats(user.id)
+    third = get_item_stats_cached(session, user.id)
+
+    assert third["total_items"] == 2
+
+
+def test_cache_entry_from_previous_day_is_stale(session, user):
+    _item(session, user, type="document")
+    item_stats._cache.set(user.id, (date.today() - timedelta(days=1), {"total_items": 99}))
+
+    stats = get_item_stats_cached(session, user.id)
+
+    assert stats["total_items"] == 1
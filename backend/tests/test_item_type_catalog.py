@@ -0,0 +1,122 @@
+"""
+Tests for the in-process item type catalog behind the /item-types routes
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.item_type import ItemType
+from models.user import User
+from routes.item_types.crud import get_categories, get_item_type, list_item_types
+from utils import item_type_catalog
+from utils.principal import Principal
+
+FIELDS = [{"name": "expiration_date", "label": "Expiration Date", "field_type": "date", "required": True}]
+
+
+@pytest.fixture
+def engine(db_engines, monkeypatch):
+    engine = db_engines[0]
+    monkeypatch.setattr(item_type_catalog, "_catalog", None)
+    monkeypatch.setattr(item_type_catalog, "_default_engine", lambda: engine)
+    with Session(engine) as session:
+        session.add_all([
+            ItemType(name="Passport", category="Travel", item_class="document", icon="🛂", fields_config=json.dumps(FIELDS)),
+            ItemType(name="Visa", category="Travel", item_class="document"),
+            ItemType(name="Netflix", category="Subscriptions", item_class="subscription"),
+            ItemType(name="Fax Line", category="Subscriptions", item_class="subscription", is_active=False),
+        ])
+        session.commit()
+    return engine
+
+
+@pytest.fixture
+def user():
+    return Principal.from_user(User(id=1, email="types@example.com"))
+
+
+def _get(route, user, **kwargs):
+    response = asyncio.run(route(user=user, **kwargs))
+    return response, json.loads(response.body) if response.body else None
+
+
+def _list(user, category=None, item_class=None, if_none_match=None):
+    return _get(list_item_types, user, category=category, item_class=item_class, if_none_match=if_none_match)
+
+
+def test_filters_and_payloads_come_from_one_load(engine, user):
+    loads = item_type_catalog.catalog_metrics()["loads"]
+
+    response, payload = _list(user)
+    assert response.media_type == "application/json"
+    assert [t["name"] for t in payload["item_types"]] == ["Netflix", "Passport", "Visa"]
+    assert payload["total"] == 3
+    passport = payload["item_types"][1]
+    assert passport["fields"] == FIELDS
+    assert passport["icon"] == "🛂"
+    assert isinstance(passport["created_at"], str)
+
+    assert [t["name"] for t in _list(user, category="Travel")[1]["item_types"]] == ["Passport", "Visa"]
+    assert [t["name"] for t in _list(user, item_class="subscription")[1]["item_types"]] == ["Netflix"]
+    assert _list(user, category="Travel", item_class="subscription")[1] == {"item_types": [], "total": 0}
+    assert _list(user, category="Pets")[1] == {"item_types": [], "total": 0}
+
+    assert _get(get_categories, user, if_none_match=None)[1] == {"categories": {
+        "Travel": {"documents": 1, "subscriptions": 0},
+        "Subscriptions": {"documents": 0, "subscriptions": 1},
+    }}
+    # Inactive types stay reachable by id, as before
+    fax_line_id = 4
+    assert _get(get_item_type, user, item_type_id=fax_line_id, if_none_match=None)[1]["is_active"] is False
+    with pytest.raises(HTTPException) as exc:
+        _get(get_item_type, user, item_type_id=99, if_none_match=None)
+    assert exc.value.status_code == 404
+
+    assert item_type_catalog.catalog_metrics()["loads"] == loads + 1
+
+
+def test_etag_and_304(engine, user):
+    response, _ = _list(user, category="Travel")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert etag != _list(user)[0].headers["etag"]
+
+    not_modified, body = _list(user, category="Travel", if_none_match=f'"other", W/{etag}')
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert body is None
+
+    # ETags follow the content, not the worker's version counter
+    item_type_catalog.invalidate_item_type_catalog()
+    assert _list(user, category="Travel", if_none_match=etag)[0].status_code == 304
+
+
+def test_committed_writes_replace_the_snapshot(engine, user, monkeypatch):
+    etag = _list(user)[0].headers["etag"]
+
+    with Session(engine) as session:
+        session.add(ItemType(name="Gym", category="Subscriptions", item_class="subscription"))
+        session.flush()
+        session.rollback()
+    assert _list(user, if_none_match=etag)[0].status_code == 304
+
+    with Session(engine) as session:
+        session.get(ItemType, 2).is_active = False
+        session.commit()
+    response, payload = _list(user, if_none_match=etag)
+    assert response.status_code == 200
+    assert [t["name"] for t in payload["item_types"]] == ["Netflix", "Passport"]
+
+    # Writes from another process show up once the snapshot expires
+    with engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE item_types SET name = 'Passport (EU)' WHERE id = 1")
+    assert [t["name"] for t in _list(user, category="Travel")[1]["item_types"]] == ["Passport"]
+    monkeypatch.setattr(item_type_catalog, "ITEM_TYPE_CATALOG_TTL", 0)
+    assert [t["name"] for t in _list(user, category="Travel")[1]["item_types"]] == ["Passport (EU)"]
@@ -0,0 +1,95 @@
+"""
+Tests for the set-based mark-read paths in notification_service
+"""
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, select, func
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.item import Item
+from models.notification import Notification
+from models.user import User
+from routes.notifications.crud import MarkReadRequest, mark_many_as_read
+from utils.notification_service import mark_all_read, mark_notification_read, mark_notifications_read
+from utils.principal import Principal
+
+
+@pytest.fixture
+def session(db_engines):
+    with Session(db_engines[0]) as session:
+        yield session
+
+
+def _seed(session, email):
+    user = User(email=email)
+    session.add(user)
+    session.commit()
+    items = [Item(name=f"Item {n}", category="Travel", type="document", user_id=user.id) for n in range(2)]
+    session.add_all(items)
+    session.commit()
+    session.add_all([
+        Notification(user_id=user.id, item_id=items[n % 2].id, title=f"n{n}", message="m")
+        for n in range(6)
+    ])
+    session.commit()
+    return user.id, [item.id for item in items]
+
+
+def _unread(session, user_id):
+    return session.exec(
+        select(func.count()).select_from(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read == False)
+    ).one()
+
+
+def test_mark_all_read_returns_rowcount_and_scopes_to_user(session):
+    user_id, _ = _seed(session, "a@example.com")
+    other_id, _ = _seed(session, "b@example.com")
+
+    assert mark_all_read(user_id, session) == 6
+    assert mark_all_read(user_id, session) == 0
+    assert _unread(session, other_id) == 6
+    assert all(n.read_at for n in session.exec(select(Notification).where(Notification.user_id == user_id)))
+
+
+def test_mark_by_item_and_by_ids(session):
+    user_id, item_ids = _seed(session, "a@example.com")
+    other_id, _ = _seed(session, "b@example.com")
+    other_ids = session.exec(select(Notification.id).where(Notification.user_id == other_id)).all()
+
+    assert mark_notifications_read(user_id, session, item_id=item_ids[0]) == 3
+
+    unread_ids = session.exec(
+        select(Notification.id).where(Notification.user_id == user_id, Notification.is_read == False)
+    ).all()
+    # Ids owned by someone else are ignored
+    assert mark_notifications_read(user_id, session, notification_ids=unread_ids[:2] + other_ids) == 2
+    assert _unread(session, user_id) == 1
+    assert _unread(session, other_id) == 6
+
+
+def test_mark_single_keeps_existence_semantics(session):
+    user_id, _ = _seed(session, "a@example.com")
+    other_id, _ = _seed(session, "b@example.com")
+    notification_id = session.exec(select(Notification.id).where(Notification.user_id == user_id)).first()
+
+    assert mark_notification_read(notification_id, user_id, session)
+    # Already read still counts as found; another user's id does not
+    assert mark_notification_read(notification_id, user_id, session)
+    assert not mark_notification_read(notification_id, other_id, session)
+
+
+def test_mark_read_route_requires_a_filter(call_async_route, session):
+    user_id, item_ids = _seed(session, "a@example.com")
+    principal = Principal.from_user(session.get(User, user_id))
+
+    with pytest.raises(HTTPException) as exc:
+        call_async_route(mark_many_as_read, data=MarkReadRequest(), user=principal)
+    assert exc.value.status_code == 400
+
+    result = call_async_route(mark_many_as_read, data=MarkReadRequest(item_id=item_ids[1]), user=principal)
+    assert result["count"] == 3
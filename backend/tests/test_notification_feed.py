@@ -0,0 +1,116 @@
+"""
+Tests for the cursor-paginated notification feed and the retention job
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlmodel import Session, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.item import Item
+from models.notification import Notification, NotificationArchive
+from models.user import User
+from routes.notifications.list import get_notifications
+from utils.notification_retention import run_notification_retention
+from utils.principal import Principal
+
+NOW = datetime(2026, 6, 1, 12, 0)
+
+
+@pytest.fixture
+def session(db_engines):
+    with Session(db_engines[0]) as session:
+        yield session
+
+
+@pytest.fixture
+def user(session):
+    user = User(email="feed@example.com")
+    session.add(user)
+    session.commit()
+    item = Item(name="Passport", category="Travel", type="document", user_id=user.id)
+    session.add(item)
+    session.commit()
+    # One notification per day going back 30 days; pairs share a timestamp
+    session.add_all([
+        Notification(
+            user_id=user.id, item_id=item.id, title=f"n{n}", message="m",
+            is_read=n >= 10, created_at=NOW - timedelta(days=n // 2)
+        )
+        for n in range(60)
+    ])
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def _page(call_async_route, user, **kwargs):
+    response = Response()
+    params = dict(unread_only=False, limit=50, cursor=None)
+    params.update(kwargs)
+    items = call_async_route(get_notifications, response=response, user=Principal.from_user(user), **params)
+    return items, response.headers.get("x-next-cursor")
+
+
+def test_cursor_walk_is_newest_first_without_gaps(call_async_route, session, user):
+    expected = session.exec(
+        select(Notification.id).order_by(Notification.created_at.desc(), Notification.id.desc())
+    ).all()
+
+    ids, cursor, pages = [], None, 0
+    while True:
+        items, cursor = _page(call_async_route, user, limit=7, cursor=cursor)
+        ids.extend(n.id for n in items)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert ids == expected
+    assert pages == 9
+
+
+def test_unread_only_and_last_page_has_no_cursor(call_async_route, user):
+    items, cursor = _page(call_async_route, user, unread_only=True)
+
+    assert len(items) == 10 and not any(n.is_read for n in items)
+    assert cursor is None
+
+
+def test_garbage_cursor_is_rejected(call_async_route, user):
+    with pytest.raises(HTTPException) as exc:
+        _page(call_async_route, user, cursor="garbage")
+    assert exc.value.status_code == 400
+
+
+def test_retention_archives_old_read_notifications_in_batches(session, user):
+    report = run_notification_retention(session, retention_days=20, mode="archive", batch_size=7, now=NOW)
+
+    # Days 20..29 are older than the cutoff: n = 42..59, all read
+    assert report.rows == 18
+    assert report.batches == 3
+    archived = session.exec(select(NotificationArchive)).all()
+    assert sorted(a.title for a in archived) == sorted(f"n{n}" for n in range(42, 60))
+    assert all(a.archived_at is not None for a in archived)
+    assert len(session.exec(select(Notification)).all()) == 42
+
+
+def test_retention_never_touches_unread(session, user):
+    for notification in session.exec(select(Notification)).all():
+        notification.is_read = False
+        session.add(notification)
+    session.commit()
+
+    report = run_notification_retention(session, retention_days=10, mode="delete", now=NOW)
+
+    assert report.rows == 0
+
+
+def test_retention_rejects_windows_the_sweep_depends_on(session):
+    with pytest.raises(ValueError):
+        run_notification_retention(session, retention_days=7)
+    with pytest.raises(ValueError):
+        run_notification_retention(session, mode="truncate")
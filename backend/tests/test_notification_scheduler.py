@@ -0,0 +1,157 @@
+"""
+Tests for the timezone-aware, sharded expiry sweep scheduler
+"""
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.item import Item
+from models.notification import Notification
+from models.sweep_run import SweepShardRun
+from models.user import User
+from routes.notifications.crud import trigger_expiry_check
+from utils import auth
+from utils.notification_scheduler import (
+    claim_run,
+    run_due_shards,
+    schedule_due_runs,
+    timezone_buckets,
+)
+from utils.reminder_schedule import reschedule_items
+
+# Tokyo is 15:00 and UTC is 06:00; only Tokyo has reached the 08:00 send hour
+NOW = datetime(2026, 1, 15, 6, 0)
+
+
+@pytest.fixture
+def engine(db_engines):
+    return db_engines[0]
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+def _user(session, email, tz, **kwargs):
+    user = User(email=email, full_name="Test User", timezone=tz, **kwargs)
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def _item(session, user, expiry):
+    item = Item(name="Passport", category="Travel", type="document", expiration_date=expiry, user_id=user.id)
+    item.refresh_effective_expiry()
+    session.add(item)
+    session.commit()
+    reschedule_items(session, user.id, [item.id], today=date(2026, 1, 15))
+    session.commit()
+
+
+def _runs(session):
+    return session.exec(select(SweepShardRun).order_by(SweepShardRun.id)).all()
+
+
+def test_buckets_group_timezones_by_current_offset(session):
+    _user(session, "utc@example.com", "UTC")
+    _user(session, "london@example.com", "Europe/London")
+    _user(session, "bad@example.com", "Not/AZone")
+    _user(session, "tokyo@example.com", "Asia/Tokyo")
+    _user(session, "ny@example.com", "America/New_York")
+
+    buckets = timezone_buckets(session, NOW)
+    # Unknown names count as UTC; London is on GMT in January
+    assert sorted(buckets[0]) == ["Europe/London", "Not/AZone", "UTC"]
+    assert buckets[9 * 60] == ["Asia/Tokyo"]
+    assert buckets[-5 * 60] == ["America/New_York"]
+    assert timezone_buckets(session, datetime(2026, 7, 15, 6, 0))[-4 * 60] == ["America/New_York"]
+
+
+def test_schedules_each_bucket_once_per_local_date(session):
+    _user(session, "utc@example.com", "UTC")
+    _user(session, "tokyo@example.com", "Asia/Tokyo")
+
+    assert schedule_due_runs(session, NOW, shard_count=2, send_hour=8) == 2
+    assert schedule_due_runs(session, NOW + timedelta(minutes=5), shard_count=2, send_hour=8) == 0
+    assert {(run.utc_offset_minutes, run.run_date, run.shard) for run in _runs(session)} == {
+        (540, date(2026, 1, 15), 0),
+        (540, date(2026, 1, 15), 1),
+    }
+
+    # UTC reaches its send hour, then Tokyo its next morning
+    assert schedule_due_runs(session, NOW + timedelta(hours=2), shard_count=2, send_hour=8) == 2
+    assert schedule_due_runs(session, NOW + timedelta(hours=16), shard_count=2, send_hour=8) == 0
+    assert schedule_due_runs(session, NOW + timedelta(hours=17), shard_count=2, send_hour=8) == 2
+    assert (540, date(2026, 1, 16)) in {(run.utc_offset_minutes, run.run_date) for run in _runs(session)}
+
+
+def test_lease_is_exclusive_until_it_expires(session):
+    _user(session, "tokyo@example.com", "Asia/Tokyo")
+    schedule_due_runs(session, NOW, shard_count=1, send_hour=8)
+
+    run = claim_run(session, "worker-a", now=NOW)
+    assert run is not None and run.owner == "worker-a"
+    assert claim_run(session, "worker-b", now=NOW) is None
+
+    # A worker that died keeps the shard only until its lease runs out
+    taken_over = claim_run(session, "worker-b", now=NOW + timedelta(hours=1))
+    assert taken_over.id == run.id
+    assert taken_over.owner == "worker-b"
+    assert taken_over.attempts == 2
+
+
+def test_due_shards_sweep_only_their_users_on_their_local_date(engine, session):
+    tokyo = [_user(session, f"tokyo{n}@example.com", "Asia/Tokyo") for n in range(2)]
+    utc = _user(session, "utc@example.com", "UTC")
+    for user in tokyo + [utc]:
+        _item(session, user, date(2026, 1, 18))
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("utils.notification_scheduler.NOTIFICATION_SCHEDULER_SHARDS", 2)
+        mp.setattr("utils.notification_scheduler.NOTIFICATION_SCHEDULER_SEND_HOUR", 8)
+        assert schedule_due_runs(session, NOW) == 2
+        assert run_due_shards(engine, now=NOW) == 2
+
+    session.expire_all()
+    notifications = session.exec(select(Notification)).all()
+    assert sorted(n.user_id for n in notifications) == sorted(user.id for user in tokyo)
+    # Three days out from the local date of the bucket
+    assert all("3 days" in n.message for n in notifications)
+    assert [run.status for run in _runs(session)] == ["done", "done"]
+    assert sum(run.notifications_created for run in _runs(session)) == 2
+
+
+def test_check_expiring_is_an_admin_only_enqueue(monkeypatch, session):
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", {"admin@example.com"})
+    monkeypatch.setattr("utils.notification_scheduler.NOTIFICATION_SCHEDULER_SHARDS", 2)
+    user = _user(session, "user@example.com", "UTC", email_verified=True)
+    admin = _user(session, "Admin@Example.com", "Asia/Tokyo")
+
+    # Unverified accounts are not trusted with an admin address
+    for account in (user, admin):
+        with pytest.raises(HTTPException) as exc:
+            auth.get_current_admin(account)
+        assert exc.value.status_code == 403
+    admin.email_verified = True
+    assert auth.get_current_admin(admin) is admin
+
+    # Queues both buckets regardless of local time, without sweeping in the request
+    assert trigger_expiry_check(admin=admin, session=session)["runs_queued"] == 4
+    assert session.exec(select(Notification)).all() == []
+
+    # Finished runs are queued again
+    for run in _runs(session):
+        run.status = "done"
+        session.add(run)
+    session.commit()
+    assert trigger_expiry_check(admin=admin, session=session)["runs_queued"] == 4
+    assert all(run.status == "pending" for run in _runs(session))
@@ -0,0 +1,93 @@
+"""
+Tests for the cached principal behind the hot read routes
+"""
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.user import User
+from routes.auth._schemas import SettingsUpdate
+from routes.auth.settings import update_settings
+from utils import principal as principal_cache
+from utils.auth import create_access_token, get_current_principal
+from utils.principal import Principal, invalidate_principal
+
+
+@pytest.fixture
+def session(db_engines):
+    principal_cache._cache.clear()
+    with Session(db_engines[0]) as session:
+        yield session
+
+
+@pytest.fixture
+def user(session):
+    user = User(email="principal@example.com", email_verified=True)
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def _principal(call_async_route, user_id):
+    token = create_access_token({"sub": str(user_id)})
+    return call_async_route(get_current_principal, token=token)
+
+
+def test_second_lookup_is_a_cache_hit(call_async_route, user):
+    before = principal_cache._cache.stats()
+
+    first = _principal(call_async_route, user.id)
+    second = _principal(call_async_route, user.id)
+
+    stats = principal_cache._cache.stats()
+    assert first == second == Principal.from_user(user)
+    assert stats["misses"] - before["misses"] == 1
+    assert stats["hits"] - before["hits"] == 1
+
+
+def test_principal_is_read_only(call_async_route, user):
+    principal = _principal(call_async_route, user.id)
+
+    with pytest.raises(AttributeError):
+        principal.email_verified = False
+    assert principal.can_add_items(19) and not principal.can_add_items(20)
+
+
+def test_user_writes_invalidate(call_async_route, session, user):
+    assert _principal(call_async_route, user.id).subscription_plan == "free"
+
+    # Same column writes as the subscription webhooks
+    user.subscription_plan = "premium"
+    user.subscription_status = "active"
+    session.add(user)
+    session.commit()
+    assert _principal(call_async_route, user.id).subscription_plan == "free"
+
+    invalidate_principal(user.id)
+    assert _principal(call_async_route, user.id).is_premium()
+
+
+def test_settings_update_invalidates(call_async_route, session, user):
+    _principal(call_async_route, user.id)
+
+    update_settings(SettingsUpdate(language="de"), user=user, session=session)
+
+    assert principal_cache.get_cached_principal(user.id) is None
+
+
+def test_deleted_user_is_rejected_after_invalidation(call_async_route, session, user):
+    user_id = user.id
+    _principal(call_async_route, user_id)
+    session.delete(user)
+    session.commit()
+    invalidate_principal(user_id)
+
+    with pytest.raises(HTTPException) as exc:
+        _principal(call_async_route, user_id)
+    assert exc.value.status_code == 401
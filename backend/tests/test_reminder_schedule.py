@@ -0,0 +1,197 @@
+"""
+Tests for the reminder_schedule due-date queue and the routes that maintain it
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.item import Item, ItemUpdate
+from models.notification import Notification
+from models.reminder_schedule import ReminderSchedule
+from models.user import User
+from routes.auth._schemas import SettingsUpdate
+from routes.auth.settings import get_settings, update_settings
+from routes.items.crud import update_item
+from utils import expiry_sweep
+from utils.expiry_sweep import run_expiry_sweep
+from utils.principal import Principal
+from utils.reminder_schedule import plan_stages, reschedule_items, resolve_offsets
+
+TODAY = date(2026, 3, 1)
+
+
+@pytest.fixture
+def session(db_engines):
+    with Session(db_engines[0]) as session:
+        yield session
+
+
+def _user(session, **kwargs):
+    user = User(email="a@example.com", full_name="Test User", email_verified=True, **kwargs)
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def _item(session, user, expiry, today=TODAY, **kwargs):
+    item = Item(name="Passport", category="Travel", type="document", expiration_date=expiry, user_id=user.id, **kwargs)
+    item.refresh_effective_expiry()
+    session.add(item)
+    session.commit()
+    reschedule_items(session, user.id, [item.id], today=today)
+    session.commit()
+    session.refresh(item)
+    return item
+
+
+def _schedule(session, item_id):
+    session.expire_all()
+    rows = session.exec(select(ReminderSchedule).where(ReminderSchedule.item_id == item_id)).all()
+    return {row.stage: row.fire_date for row in rows}
+
+
+def _messages(session, item_id):
+    return [n.message for n in session.exec(
+        select(Notification).where(Notification.item_id == item_id).order_by(Notification.id)
+    )]
+
+
+def test_plan_stages():
+    expiry = TODAY + timedelta(days=10)
+    assert plan_stages(expiry, [30, 7, 1], TODAY) == {
+        # Already inside the 30 day window: that warning goes out today
+        "before:30": ("expiry_warning", TODAY),
+        "before:7": ("expiry_warning", TODAY + timedelta(days=3)),
+        "before:1": ("expiry_warning", TODAY + timedelta(days=9)),
+        "expired": ("expired", TODAY + timedelta(days=11)),
+    }
+    # Only the latest of the stages already passed fires
+    assert plan_stages(expiry, [30, 10], TODAY) == {
+        "before:10": ("expiry_warning", TODAY),
+        "expired": ("expired", TODAY + timedelta(days=11)),
+    }
+    assert plan_stages(TODAY - timedelta(days=5), [7], TODAY) == {"expired": ("expired", TODAY)}
+
+    assert resolve_offsets("[1, 30, 7, 7]", 3, "[14]", 7) == [30, 7, 1]
+    assert resolve_offsets(None, 3, "[14]", 7) == [3]
+    assert resolve_offsets("not json", None, "[14, 2]", 7) == [14, 2]
+    assert resolve_offsets(None, None, None, 7) == [7]
+
+
+def test_daily_sweeps_fire_each_stage_once_and_only_read_due_rows(session):
+    user = _user(session, reminder_offsets="[30, 7, 1]")
+    item = _item(session, user, TODAY + timedelta(days=10))
+    # Far off items are scheduled but never read until they are due
+    for n in range(20):
+        _item(session, user, TODAY + timedelta(days=200 + n))
+
+    scanned = []
+    for day in range(21):
+        report = run_expiry_sweep(session, send_emails=False, today=TODAY + timedelta(days=day))
+        scanned.append(report.items_scanned)
+
+    assert _messages(session, item.id) == [
+        "Your document 'Passport' expires in 10 days.",
+        "Your document 'Passport' expires in 7 days.",
+        "Your document 'Passport' expires in 1 day.",
+        "Your document 'Passport' expired 1 day ago.",
+        "Your document 'Passport' expired 8 days ago.",
+    ]
+    assert sum(scanned) == 5
+    assert _schedule(session, item.id) == {
+        "before:30": None, "before:7": None, "before:1": None, "expired": TODAY + timedelta(days=25),
+    }
+
+
+def test_overlapping_sweeps_notify_each_stage_once(db_engines, monkeypatch, session):
+    user = _user(session)
+    items = [_item(session, user, TODAY + timedelta(days=n)) for n in range(5)]
+
+    # A second sweep runs to completion between this sweep's read and its claim
+    claim = expiry_sweep._claim
+
+    def claim_after_other_sweep(claiming_session, reminder_ids, today):
+        monkeypatch.setattr(expiry_sweep, "_claim", claim)
+        with Session(db_engines[0]) as other:
+            assert run_expiry_sweep(other, send_emails=False, today=today).notifications_created == 5
+        return claim(claiming_session, reminder_ids, today)
+
+    monkeypatch.setattr(expiry_sweep, "_claim", claim_after_other_sweep)
+    report = run_expiry_sweep(session, send_emails=False, today=TODAY)
+
+    assert report.items_scanned == 5
+    assert report.notifications_created == 0
+    assert len(session.exec(select(Notification)).all()) == 5
+
+    # The stage key itself is unique
+    session.add(ReminderSchedule(
+        item_id=items[0].id, user_id=user.id, stage="expired", kind="expired", expiry_date=TODAY, fire_date=TODAY,
+    ))
+    with pytest.raises(IntegrityError):
+        session.commit()
+
+
+def test_item_edits_keep_fired_stages(call_async_route, session):
+    user = _user(session, notification_days_before=3)
+    today = date.today()
+    item = _item(session, user, today + timedelta(days=30), today=today)
+    principal = Principal.from_user(user)
+    assert _schedule(session, item.id) == {"before:3": today + timedelta(days=27), "expired": today + timedelta(days=31)}
+
+    call_async_route(update_item, item_id=item.id, item=ItemUpdate(reminder_offsets="[14, 60, 14]"), user=principal)
+    session.refresh(item)
+    assert item.reminder_offsets == "[60, 14]"
+    assert _schedule(session, item.id) == {
+        "before:60": today, "before:14": today + timedelta(days=16), "expired": today + timedelta(days=31),
+    }
+
+    # Fired today, then edited: the fired stage does not go out again
+    assert run_expiry_sweep(session, send_emails=False).notifications_created == 1
+    call_async_route(update_item, item_id=item.id, item=ItemUpdate(name="Renamed"), user=principal)
+    assert _schedule(session, item.id)["before:60"] is None
+    assert run_expiry_sweep(session, send_emails=False).notifications_created == 0
+
+    # A new expiry date starts the stages over
+    call_async_route(update_item, item_id=item.id, item=ItemUpdate(expiration_date=today + timedelta(days=90)), user=principal)
+    assert _schedule(session, item.id) == {
+        "before:60": today + timedelta(days=30), "before:14": today + timedelta(days=76), "expired": today + timedelta(days=91),
+    }
+
+    with pytest.raises(HTTPException) as exc:
+        call_async_route(update_item, item_id=item.id, item=ItemUpdate(reminder_offsets="[400]"), user=principal)
+    assert exc.value.status_code == 422
+
+    # Dropping the date drops every stage
+    call_async_route(update_item, item_id=item.id, item=ItemUpdate(expiration_date=None), user=principal)
+    assert _schedule(session, item.id) == {}
+
+
+def test_settings_changes_reschedule_every_item(session):
+    user = _user(session, notification_days_before=3)
+    today = date.today()
+    items = [_item(session, user, today + timedelta(days=10 + n), today=today) for n in range(3)]
+
+    update_settings(SettingsUpdate(notification_days=30), user=user, session=session)
+    assert all(_schedule(session, item.id)["before:30"] == today for item in items)
+
+    update_settings(SettingsUpdate(reminder_offsets=[2, 14, 2]), user=user, session=session)
+    assert get_settings(user=user)["reminder_offsets"] == [14, 2]
+    assert _schedule(session, items[0].id) == {
+        "before:14": today, "before:2": today + timedelta(days=8), "expired": today + timedelta(days=11),
+    }
+    with pytest.raises(ValueError):
+        SettingsUpdate(reminder_offsets=list(range(11)))
+
+    update_settings(SettingsUpdate(email_notifications_enabled=False), user=user, session=session)
+    assert session.exec(select(ReminderSchedule)).all() == []
+
+    update_settings(SettingsUpdate(email_notifications_enabled=True), user=user, session=session)
+    assert len(session.exec(select(ReminderSchedule)).all()) == 9
@@ -1,5 +1,7 @@
 """Tests for the SMTP relay module and contact endpoint"""
 import os
+import smtplib
+import socket
 import sys
 from unittest.mock import patch, MagicMock
 
@@ -10,7 +12,9 @@ os.environ["SECRET_KEY"] = "test-secret-key-for-testing"
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from utils.smtp_relay import send_email, VALID_FROM_ADDRESSES
+from utils import smtp_relay
+from utils.local_smtp import LocalSMTPServer
+from utils.smtp_relay import SMTPConnectionPool, build_message, send_email, VALID_FROM_ADDRESSES
 from main import app
 from fastapi.testclient import TestClient
 
@@ -34,7 +38,7 @@ class TestSendEmail:
     def test_accepts_valid_from_addresses(self):
         for addr in VALID_FROM_ADDRESSES:
             with patch("utils.smtp_relay.smtplib.SMTP") as mock_smtp:
-                mock_server = MagicMock()
+                mock_server = mock_smtp.return_value  # SMTP.__enter__ returns the connection
                 mock_smtp.return_value.__enter__ = MagicMock(return_value=mock_server)
                 mock_smtp.return_value.__exit__ = MagicMock(return_value=False)
 
@@ -48,7 +52,7 @@ class TestSendEmail:
 
     def test_uses_smtp_relay_host(self):
         with patch("utils.smtp_relay.smtplib.SMTP") as mock_smtp:
-            mock_server = MagicMock()
+            mock_server = mock_smtp.return_value
             mock_smtp.return_value.__enter__ = MagicMock(return_value=mock_server)
             mock_smtp.return_value.__exit__ = MagicMock(return_value=False)
 
@@ -59,11 +63,11 @@ class TestSendEmail:
                 from_email="no-reply@remindes.com",
             )
 
-            mock_smtp.assert_called_once_with("smtp-relay.gmail.com", 587)
+            mock_smtp.assert_called_once_with("smtp-relay.gmail.com", 587, timeout=30.0)
 
     def test_does_not_call_login(self):
         with patch("utils.smtp_relay.smtplib.SMTP") as mock_smtp:
-            mock_server = MagicMock()
+            mock_server = mock_smtp.return_value
             mock_smtp.return_value.__enter__ = MagicMock(return_value=mock_server)
             mock_smtp.return_value.__exit__ = MagicMock(return_value=False)
 
@@ -78,7 +82,7 @@ class TestSendEmail:
 
     def test_calls_starttls(self):
         with patch("utils.smtp_relay.smtplib.SMTP") as mock_smtp:
-            mock_server = MagicMock()
+            mock_server = mock_smtp.return_value
             mock_smtp.return_value.__enter__ = MagicMock(return_value=mock_server)
             mock_smtp.return_value.__exit__ = MagicMock(return_value=False)
 
@@ -105,13 +109,79 @@ class TestSendEmail:
             assert result is False
 
 
+# ------ Pooled relay sessions ------
+
+@pytest.fixture
+def local_relay(monkeypatch):
+    with LocalSMTPServer() as server:
+        monkeypatch.setattr(smtp_relay, "SMTP_RELAY_HOST", server.host)
+        monkeypatch.setattr(smtp_relay, "SMTP_RELAY_PORT", server.port)
+        monkeypatch.setattr(smtp_relay, "SMTP_RELAY_STARTTLS", False)
+        monkeypatch.setattr(smtp_relay, "SMTP_RELAY_TIMEOUT", 5.0)
+        yield server
+
+
+def _messages(count):
+    return [build_message("user@example.com", f"Message {n}", "<p>Hi</p>") for n in range(count)]
+
+
+class TestConnectionPool:
+    """Tests for SMTPConnectionPool.send_many against the local stand-in"""
+
+    def test_many_messages_share_one_session(self, local_relay):
+        pool = SMTPConnectionPool(size=2)
+        assert pool.send_many(_messages(5)) == [None] * 5
+        assert pool.send_many(_messages(3)) == [None] * 3
+        pool.close()
+
+        assert len(local_relay.messages) == 8
+        assert local_relay.connections == 1
+
+    def test_sessions_are_recycled_at_the_message_cap(self, local_relay):
+        pool = SMTPConnectionPool(max_messages=2)
+        assert pool.send_many(_messages(5)) == [None] * 5
+        pool.close()
+
+        assert local_relay.connections == 3
+        assert pool.stats()["recycled"] == 2
+
+    def test_dropped_session_is_reopened_once(self, local_relay):
+        pool = SMTPConnectionPool()
+        pool.send_many(_messages(1))
+        # The relay hung up on the idle session
+        pool._idle[0].server.sock.shutdown(socket.SHUT_RDWR)
+
+        assert pool.send_many(_messages(1)) == [None]
+        pool.close()
+        assert len(local_relay.messages) == 2
+        assert pool.stats()["reconnects"] == 1
+
+    def test_rejected_message_keeps_the_session(self, local_relay):
+        local_relay.fail_next = 1
+        pool = SMTPConnectionPool()
+        results = pool.send_many(_messages(2))
+        pool.close()
+
+        assert isinstance(results[0], smtplib.SMTPSenderRefused)
+        assert results[1] is None
+        assert local_relay.connections == 1
+
+    def test_unreachable_relay_fails_the_whole_batch(self, local_relay):
+        local_relay.stop()
+        pool = SMTPConnectionPool()
+        results = pool.send_many(_messages(3))
+
+        assert all(isinstance(result, OSError) for result in results)
+        assert pool.stats()["connects"] == 0
+
+
 # ------ Contact endpoint tests ------
 
 class TestContactEndpoint:
     """Tests for the /contact/ endpoint"""
 
     def test_contact_valid_submission(self):
-        with patch("routes.contact.send_email", return_value=True):
+        with patch("routes.contact.enqueue_email", return_value=1):
             res = client.post("/contact/", json={
                 "name": "John Doe",
                 "email": "john@example.com",
@@ -157,18 +227,18 @@ class TestContactEndpoint:
         })
         assert res.status_code == 422  # Pydantic validation error
 
-    def test_contact_email_failure_returns_503(self):
-        with patch("routes.contact.send_email", return_value=False):
+    def test_contact_queue_failure_returns_503(self):
+        with patch("routes.contact.enqueue_email", side_effect=Exception("database is locked")):
             res = client.post("/contact/", json={
                 "name": "John Doe",
                 "email": "john@example.com",
                 "type": "Technical Support",
-                "message": "This should fail because email sending fails."
+                "message": "This should fail because queueing the email fails."
             })
             assert res.status_code == 503
 
     def test_contact_routes_to_correct_email(self):
-        with patch("routes.contact.send_email", return_value=True) as mock_send:
+        with patch("routes.contact.enqueue_email", return_value=1) as mock_send:
             res = client.post("/contact/", json={
                 "name": "Jane",
                 "email": "jane@example.com",
@@ -0,0 +1,139 @@
+"""
+Tests for the background thumbnail jobs of uploaded images and PDFs
+"""
+import asyncio
+import io
+import os
+import sys
+
+import pypdfium2
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+from sqlmodel import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.item import Item
+from models.user import User
+from utils import storage as storage_utils, thumbnails
+from utils.blob_store import attach_upload, purge_uploads, release_uploads
+from utils.file import save_upload
+from utils.storage import shard_path
+from utils.thumbnails import (
+    ThumbnailPipeline, existing_thumbnail, render_thumbnail, thumbnail_key, thumbnail_metrics,
+)
+
+
+def _png(width=1200, height=800) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (20, 120, 200)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _pdf(path, width=612, height=792):
+    pdf = pypdfium2.PdfDocument.new()
+    pdf.new_page(width, height)
+    pdf.save(path)
+    pdf.close()
+
+
+@pytest.mark.parametrize("kind, size", [("image", (320, 213)), ("pdf", (248, 320))])
+def test_renders_small_webp_thumbnails(tmp_path, kind, size):
+    source = tmp_path / "source"
+    if kind == "pdf":
+        _pdf(str(source))
+    else:
+        source.write_bytes(_png())
+    out = tmp_path / "thumb.webp"
+
+    render_thumbnail(str(source), kind, str(out), 320, 80)
+
+    with Image.open(out) as thumbnail:
+        assert thumbnail.format == "WEBP"
+        assert thumbnail.size == size
+    assert out.stat().st_size < 10_000
+
+
+def _item(session, user_id, file_path):
+    item = Item(name="Passport", category="Identity", type="document", file_path=file_path, user_id=user_id)
+    session.add(item)
+    return item
+
+
+def test_pipeline_stores_thumbnail_next_to_blob_and_sets_items(storage_backend, db_engines, monkeypatch):
+    monkeypatch.setattr(storage_utils, "_storage", storage_backend)
+    sync_engine = db_engines[0]
+    before = thumbnail_metrics()
+
+    with Session(sync_engine) as session:
+        user = User(email="thumbs@example.com", hashed_password="x")
+        session.add(user)
+        session.flush()
+        stored = asyncio.run(save_upload(UploadFile(file=io.BytesIO(_png()), filename="card.png")))
+        file_path = asyncio.run(attach_upload(session, stored))
+        items = [_item(session, user.id, file_path) for _ in range(2)] + [_item(session, user.id, "/uploads/notes.txt")]
+        session.commit()
+        item_ids = [item.id for item in items]
+
+    async def run(*file_paths):
+        pipeline = ThumbnailPipeline(workers=1, engine=sync_engine)
+        pipeline.start()
+        try:
+            assert all([pipeline.enqueue(path) for path in file_paths])
+            await pipeline.drain()
+        finally:
+            pipeline.stop()
+
+    asyncio.run(run(file_path, "/uploads/notes.txt"))
+
+    key = thumbnail_key(file_path)
+    assert key == f"{stored.sha256}.thumb.webp"
+    thumbnail_path = f"/uploads/{key}"
+    with Session(sync_engine) as session:
+        assert [session.get(Item, item_id).thumbnail_path for item_id in item_ids] == [thumbnail_path] * 2 + [None]
+    assert asyncio.run(storage_backend.size(key)) > 0
+    if storage_backend.local_path(key):
+        # Same shard directory as the blob
+        assert os.path.dirname(shard_path(key)) == os.path.dirname(shard_path(os.path.basename(file_path)))
+
+    # The same content is not rendered again
+    assert asyncio.run(existing_thumbnail(file_path)) == thumbnail_path
+    asyncio.run(run(file_path))
+    after = thumbnail_metrics()
+    assert after["rendered"] - before["rendered"] == 1
+    assert after["reused"] - before["reused"] == 1
+    assert after["unsupported"] - before["unsupported"] == 1
+    assert after["render"]["count"] > before["render"]["count"]
+
+    # The thumbnail goes with the last reference to its content
+    with Session(sync_engine) as session:
+        released = release_uploads(session, [file_path, file_path])
+        session.commit()
+        assert asyncio.run(purge_uploads(session, released)) == 1
+    assert asyncio.run(storage_backend.size(key)) is None
+
+
+def test_failed_and_dropped_jobs_are_counted(tmp_path, db_engines, monkeypatch):
+    monkeypatch.setattr(storage_utils, "_storage", storage_utils.LocalStorage(str(tmp_path / "uploads")))
+    before = thumbnail_metrics()
+
+    async def run():
+        # Not started: renders in the default thread pool
+        pipeline = ThumbnailPipeline(engine=db_engines[0], queue_max=1)
+        assert pipeline.enqueue(f"/uploads/{'a' * 64}.png")
+        assert not pipeline.enqueue(f"/uploads/{'b' * 64}.png")
+        await pipeline.drain()
+        assert pipeline.pending() == 0
+
+    asyncio.run(run())
+
+    after = thumbnail_metrics()
+    assert after["failed"] - before["failed"] == 1
+    assert after["dropped"] - before["dropped"] == 1
+    assert os.listdir(tmp_path / "uploads" / ".staging") == []
+
+
+def test_enqueue_is_a_no_op_without_workers(monkeypatch):
+    monkeypatch.setattr(thumbnails, "_pipeline", None)
+    assert not thumbnails.enqueue_thumbnail(f"/uploads/{'a' * 64}.png")
@@ -0,0 +1,91 @@
+"""
+Tests for the COUNT-based, ETag-aware unread notification counter
+"""
+import os
+import sys
+
+import pytest
+from fastapi import Response
+from sqlalchemy import text
+from sqlmodel import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models.item import Item
+from models.notification import Notification
+from models.user import User
+from routes.notifications.list import get_unread_count
+from utils import unread_counts
+from utils.notification_service import mark_all_read, mark_notification_read
+from utils.principal import Principal
+
+
+@pytest.fixture
+def session(db_engines):
+    unread_counts._cache.clear()
+    with Session(db_engines[0]) as session:
+        yield session
+
+
+@pytest.fixture
+def user(session):
+    user = User(email="unread@example.com")
+    session.add(user)
+    session.commit()
+    item = Item(name="Passport", category="Travel", type="document", user_id=user.id)
+    session.add(item)
+    session.commit()
+    session.add_all([
+        Notification(user_id=user.id, item_id=item.id, title="t", message="m", is_read=n % 3 == 0)
+        for n in range(10)
+    ])
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def _unread(call_async_route, user, if_none_match=None):
+    response = Response()
+    result = call_async_route(
+        get_unread_count, response=response, if_none_match=if_none_match, user=Principal.from_user(user)
+    )
+    return result, response
+
+
+def test_count_and_etag(call_async_route, user):
+    result, response = _unread(call_async_route, user)
+
+    assert result == {"count": 6}
+    assert response.headers["etag"] == 'W/"unread-6"'
+
+
+def test_matching_etag_is_not_modified_without_db_work(call_async_route, user):
+    _, response = _unread(call_async_route, user)
+    misses = unread_counts._cache.stats()["misses"]
+
+    result, _ = _unread(call_async_route, user, if_none_match=response.headers["etag"])
+
+    assert result.status_code == 304
+    assert unread_counts._cache.stats()["misses"] == misses
+
+
+def test_reads_invalidate_the_cached_count(call_async_route, session, user):
+    _, response = _unread(call_async_route, user)
+    unread_id = session.exec(
+        text("SELECT id FROM notifications WHERE is_read = 0 LIMIT 1")
+    ).scalar()
+
+    assert mark_notification_read(unread_id, user.id, session)
+    result, _ = _unread(call_async_route, user, if_none_match=response.headers["etag"])
+    assert result == {"count": 5}
+
+    assert mark_all_read(user.id, session) == 5
+    assert _unread(call_async_route, user)[0] == {"count": 0}
+
+
+def test_count_uses_composite_index(session, user):
+    plan = session.exec(text(
+        "EXPLAIN QUERY PLAN SELECT count(*) FROM notifications WHERE user_id = :user_id AND is_read = 0"
+    ).bindparams(user_id=user.id)).all()
+
+    assert "ix_notifications_user_id_is_read" in " ".join(str(row) for row in plan)
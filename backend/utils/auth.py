@@ -10,9 +10,11 @@ import jwt  # PyJWT library (replaces python-jose to avoid ecdsa vulnerability)
 from jwt.exceptions import PyJWTError
 from passlib.context import CryptContext
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from database import get_session
+from database import get_session, get_async_session
 from models.user import User
+from utils.principal import Principal, cache_principal, get_cached_principal
 
 # ✅ Load environment variables
 load_dotenv()
@@ -40,6 +42,9 @@ try:
 except ValueError:
     raise ValueError("❌ REFRESH_TOKEN_EXPIRE_DAYS must be a valid integer")
 
+# ✅ Admin accounts (comma-separated emails, verified accounts only)
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -77,19 +82,44 @@ def decode_token(token: str):
     except PyJWTError:
         return None
 
+def _user_id_from_token(token: str) -> int:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return int(payload.get("sub"))
+    except PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
 # Get current user from token
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     session: Session = Depends(get_session)
 ):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = int(payload.get("sub"))
-    except PyJWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    user = session.get(User, _user_id_from_token(token))
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
 
-    user = session.get(User, user_id)
+    return user
+
+# Admin-only routes
+def get_current_admin(user: User = Depends(get_current_user)):
+    if not user.email_verified or user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return user
+
+# Cached principal for hot read routes on get_async_session: the User row is
+# only loaded on a cache miss (see utils/principal.py)
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session)
+) -> Principal:
+    user_id = _user_id_from_token(token)
+    principal = get_cached_principal(user_id)
+    if principal is not None:
+        return principal
+
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
-    return user
\ No newline at end of file
+    return cache_principal(user)
@@ -0,0 +1,185 @@
+# utils/blob_store.py
+"""
+Content-addressed, deduplicated upload storage.
+
+Uploads are stored once per content and extension as /uploads/<sha256>.<ext>
+(utils/file.py). upload_blobs keeps a reference count per stored path: one
+per Item.file_path that points at it.
+
+- attach_upload() bumps the count with INSERT ... ON CONFLICT DO UPDATE and
+  only then puts the streamed file into the upload storage
+  (utils/storage.py), while the blob row is locked by the caller's
+  transaction.
+- release_uploads() decrements the counts of the paths items stop using,
+  in the caller's transaction. It never unlinks.
+- purge_uploads() runs after that transaction commits. It deletes the rows
+  that reached zero and their stored files in one transaction, so a
+  concurrent upload of the same content either re-references the row first
+  or re-creates row and file after it. The thumbnail of the content goes
+  with its last stored copy.
+
+Files uploaded before the blob store have no row and are unlinked as soon
+as their item lets go of them, as before.
+
+attach_upload() and purge_uploads() take a Session or an AsyncSession.
+
+Print a report of the bytes saved with `python -m utils.blob_store`.
+"""
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Iterable, Optional, Union
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.upload_blob import UploadBlob
+from utils import metrics
+from utils.file import StoredUpload, delete_upload, discard_upload, place_upload
+from utils.storage import is_content_addressed
+from utils.thumbnails import thumbnail_key
+
+logger = logging.getLogger(__name__)
+
+_totals_lock = threading.Lock()
+_totals = {"uploads": 0, "deduplicated": 0, "bytes_deduplicated": 0, "purged": 0}
+
+
+async def _run(session: Union[Session, AsyncSession], fn: Callable[[Session], object]):
+    """Run a step on the sync session behind either kind of session"""
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(fn)
+    return fn(session)
+
+
+def _reference(session: Session, stored: StoredUpload) -> int:
+    now = datetime.utcnow()
+    insert = postgresql.insert if session.get_bind().dialect.name == "postgresql" else sqlite.insert
+    return session.exec(
+        insert(UploadBlob)
+        .values(
+            path=stored.path, sha256=stored.sha256, size=stored.size, mime_type=stored.mime_type,
+            ref_count=1, created_at=now, last_referenced_at=now,
+        )
+        .on_conflict_do_update(
+            index_elements=["path"],
+            set_={"ref_count": UploadBlob.ref_count + 1, "last_referenced_at": now},
+        )
+        .returning(UploadBlob.ref_count)
+    ).scalar_one()
+
+
+async def attach_upload(session: Union[Session, AsyncSession], stored: StoredUpload) -> str:
+    """
+    Reference a streamed upload from an item written in the caller's
+    transaction; returns the file_path to store on the item
+    """
+    try:
+        ref_count = await _run(session, lambda sync_session: _reference(sync_session, stored))
+        # Same bytes under the same key, so replacing an existing copy is safe
+        await place_upload(stored)
+    except BaseException:
+        await discard_upload(stored)
+        raise
+
+    with _totals_lock:
+        _totals["uploads"] += 1
+        if ref_count > 1:
+            _totals["deduplicated"] += 1
+            _totals["bytes_deduplicated"] += stored.size
+    return stored.path
+
+
+def release_uploads(session: Session, file_paths: Iterable[Optional[str]]) -> list[str]:
+    """
+    Drop one reference per file_path in the caller's transaction; returns
+    the paths to pass to purge_uploads() once it has committed
+    """
+    released = Counter(path for path in file_paths if path)
+    for path, count in released.items():
+        session.exec(
+            update(UploadBlob)
+            .where(UploadBlob.path == path)
+            .values(ref_count=UploadBlob.ref_count - count)
+            .execution_options(synchronize_session=False)
+        )
+    return list(released)
+
+
+def _unreferenced(session: Session, file_paths: list[str]) -> tuple[list[str], list[str]]:
+    """
+    Delete the rows of released paths nothing references; returns their
+    paths, and those whose content is not stored under another extension
+    """
+    rows = session.exec(
+        delete(UploadBlob)
+        .where(UploadBlob.path.in_(file_paths), UploadBlob.ref_count <= 0)
+        .returning(UploadBlob.path, UploadBlob.sha256)
+    ).all()
+    hashes = {sha256 for _, sha256 in rows}
+    kept = set(session.exec(select(UploadBlob.sha256).where(UploadBlob.sha256.in_(hashes))).all()) if hashes else set()
+    return [path for path, _ in rows], [path for path, sha256 in rows if sha256 not in kept]
+
+
+async def purge_uploads(session: Union[Session, AsyncSession], file_paths: Iterable[str]) -> int:
+    """Delete released files nothing references any more; returns how many were deleted"""
+    file_paths = list(file_paths)
+    if not file_paths:
+        return 0
+    unreferenced, last_copies = await _run(session, lambda sync_session: _unreferenced(sync_session, file_paths))
+    # Deleted before commit: an upload of the same content waits on these rows
+    deleted = 0
+    for path in unreferenced:
+        deleted += await delete_upload(path)
+    # Thumbnails are keyed by content alone (utils/thumbnails.py)
+    for path in last_copies:
+        await delete_upload(thumbnail_key(path))
+    await _run(session, lambda sync_session: sync_session.commit())
+    # Files from before the blob store belonged to a single item
+    for path in file_paths:
+        if not is_content_addressed(path):
+            deleted += await delete_upload(path)
+    with _totals_lock:
+        _totals["purged"] += deleted
+    return deleted
+
+
+def storage_report(session: Session) -> dict:
+    """Bytes stored versus the bytes the same references would take without deduplication"""
+    blobs, references, stored_bytes, referenced_bytes = session.exec(
+        select(
+            func.count(UploadBlob.id),
+            func.coalesce(func.sum(UploadBlob.ref_count), 0),
+            func.coalesce(func.sum(UploadBlob.size), 0),
+            func.coalesce(func.sum(UploadBlob.size * UploadBlob.ref_count), 0),
+        ).where(UploadBlob.ref_count > 0)
+    ).one()
+    return {
+        "blobs": blobs,
+        "references": references,
+        "stored_bytes": stored_bytes,
+        "referenced_bytes": referenced_bytes,
+        "bytes_saved": referenced_bytes - stored_bytes,
+    }
+
+
+def blob_store_metrics() -> dict:
+    with _totals_lock:
+        return dict(_totals)
+
+
+metrics.register("blob_store", blob_store_metrics)
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    with Session(engine) as session:
+        report = storage_report(session)
+    print(f"📦 {report['blobs']} blobs, {report['references']} references")
+    print(f"💾 Stored {report['stored_bytes'] / 1024 / 1024:.2f}MB for "
+          f"{report['referenced_bytes'] / 1024 / 1024:.2f}MB of attachments")
+    print(f"✅ Saved {report['bytes_saved'] / 1024 / 1024:.2f}MB by deduplication")
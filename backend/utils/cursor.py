@@ -0,0 +1,22 @@
+# utils/cursor.py
+"""
+Opaque pagination cursors: URL-safe base64 of a compact JSON payload.
+
+Cursors are not signed; callers must validate every decoded field.
+"""
+import base64
+import json
+
+
+def encode_cursor_payload(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor_payload(cursor: str) -> dict:
+    """Inverse of encode_cursor_payload; raises ValueError on malformed input"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if not isinstance(payload, dict):
+        raise ValueError("cursor payload is not an object")
+    return payload
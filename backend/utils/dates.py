@@ -1,7 +1,24 @@
-from datetime import datetime, date
+from datetime import datetime, date, timezone, tzinfo
 from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 def parse_date(value: Optional[str]) -> Optional[date]:
     if not value:
         return None
-    return datetime.strptime(value, "%Y-%m-%d").date()
\ No newline at end of file
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def resolve_timezone(name: Optional[str]) -> tzinfo:
+    """ZoneInfo for a stored timezone name; unknown or empty names fall back to UTC"""
+    if not name:
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def local_today(timezone_name: Optional[str], now: Optional[datetime] = None) -> date:
+    """The current date in a user's timezone (`now` being naive UTC)"""
+    now = now or datetime.utcnow()
+    return now.replace(tzinfo=timezone.utc).astimezone(resolve_timezone(timezone_name)).date()
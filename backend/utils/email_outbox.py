@@ -0,0 +1,377 @@
+# utils/email_outbox.py
+"""
+Durable outbox for outbound email.
+
+Request handlers and the expiry sweep call enqueue_email(), which only
+inserts an email_outbox row, so a slow or unreachable relay never adds to
+request latency. A pool of worker threads started with the app drains the
+table:
+
+1. claim   - one UPDATE ... RETURNING flips up to EMAIL_OUTBOX_BATCH due rows
+   to "sending" and leases them for EMAIL_OUTBOX_LEASE_SECONDS, so several
+   workers (or processes) never pick up the same row. A worker that dies
+   mid-send leaves the lease to expire and the row is claimed again.
+2. deliver - the claimed batch goes out over one pooled relay session
+   (smtp_relay.send_many).
+3. record  - delivered rows become "sent" (and flag their notification as
+   is_sent_via_email) and their bodies are blanked, so password-reset and
+   verification links do not outlive delivery; failures are retried with
+   exponential backoff until max_attempts, then marked "failed".
+4. purge   - every EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS an idle worker
+   deletes sent and failed rows older than EMAIL_OUTBOX_RETENTION_DAYS.
+
+Delivery is at-least-once. Queue depth, send latency and failures are
+exposed under "email_outbox" on GET /metrics.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, delete, select, func
+
+from models.email_outbox import EmailOutbox
+from models.notification import Notification
+from utils import metrics, smtp_relay
+
+logger = logging.getLogger(__name__)
+
+EMAIL_OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", "2"))
+EMAIL_OUTBOX_BATCH = int(os.getenv("EMAIL_OUTBOX_BATCH", "10"))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "2"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+EMAIL_OUTBOX_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "30"))
+EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+EMAIL_OUTBOX_LEASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "300"))
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv("EMAIL_OUTBOX_RETENTION_DAYS", "30"))
+EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS = float(os.getenv("EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS", "3600"))
+EMAIL_OUTBOX_PURGE_BATCH = 1000
+
+OUTBOX_STATUSES = ("pending", "sending", "sent", "failed")
+
+_send_timer = metrics.Timer()
+_counters_lock = threading.Lock()
+_counters = {"enqueued": 0, "sent": 0, "retried": 0, "failed": 0, "purged": 0}
+_pool: Optional["OutboxWorkerPool"] = None
+
+
+def _count(name: str, n: int = 1):
+    with _counters_lock:
+        _counters[name] += n
+
+
+def _default_engine() -> Engine:
+    from database import engine
+    return engine
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next try after `attempts` failed deliveries"""
+    seconds = EMAIL_OUTBOX_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, EMAIL_OUTBOX_BACKOFF_MAX_SECONDS))
+
+
+def enqueue_email(
+    to_email: str,
+    subject: str,
+    html_body: str,
+    from_email: str = "no-reply@remindes.com",
+    from_name: str | None = None,
+    plain_body: str | None = None,
+    notification_id: Optional[int] = None,
+    session: Optional[Session] = None,
+    notification_ids: Optional[list[int]] = None,
+) -> Optional[int]:
+    """
+    Queue an email for delivery.
+
+    `notification_id` (or `notification_ids` for a digest) are flagged as
+    is_sent_via_email once the email is delivered.
+
+    With `session` the row is only added to it and goes out once the caller
+    commits, so the email is part of the caller's transaction. Without it the
+    row is committed in a session of its own and the workers are woken.
+
+    Returns the outbox id (None when added to a caller's session), or
+    raises ValueError for an invalid sender.
+    """
+    if from_email not in smtp_relay.VALID_FROM_ADDRESSES:
+        raise ValueError(f"Invalid from_email '{from_email}'. Must be one of {smtp_relay.VALID_FROM_ADDRESSES}")
+
+    row = EmailOutbox(
+        to_email=to_email,
+        subject=subject,
+        html_body=html_body,
+        from_email=from_email,
+        from_name=from_name,
+        plain_body=plain_body,
+        notification_id=notification_id,
+        notification_ids=json.dumps(notification_ids) if notification_ids else None,
+        max_attempts=EMAIL_OUTBOX_MAX_ATTEMPTS,
+    )
+    _count("enqueued")
+
+    if session is not None:
+        session.add(row)
+        return None
+
+    with Session(_default_engine()) as own_session:
+        own_session.add(row)
+        own_session.commit()
+        outbox_id = row.id
+    wake_outbox_workers()
+    logger.info(f"📬 Queued email #{outbox_id} to {to_email} (subject: {subject})")
+    return outbox_id
+
+
+def _claim(session: Session, limit: int, now: datetime) -> list[EmailOutbox]:
+    """Lease up to `limit` due rows to this worker"""
+    due = (
+        select(EmailOutbox.id)
+        .where(
+            EmailOutbox.status.in_(("pending", "sending")),
+            EmailOutbox.next_attempt_at <= now
+        )
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+    )
+    claimed_ids = session.exec(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due.scalar_subquery()))
+        # Re-checked by the UPDATE itself, so a concurrent claimer loses cleanly
+        .where(EmailOutbox.next_attempt_at <= now)
+        .values(
+            status="sending",
+            attempts=EmailOutbox.attempts + 1,
+            next_attempt_at=now + timedelta(seconds=EMAIL_OUTBOX_LEASE_SECONDS),
+        )
+        .returning(EmailOutbox.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    session.commit()
+
+    if not claimed_ids:
+        return []
+    rows = session.exec(select(EmailOutbox).where(EmailOutbox.id.in_(claimed_ids)).order_by(EmailOutbox.id)).all()
+    for row in rows:
+        session.expunge(row)
+    return rows
+
+
+def _deliver(rows: list[EmailOutbox]) -> list[Optional[str]]:
+    """Send claimed rows over one pooled relay session; returns None or the error text per row"""
+    errors: list[Optional[str]] = [None] * len(rows)
+    messages, positions = [], []
+    for n, row in enumerate(rows):
+        try:
+            messages.append(smtp_relay.build_message(
+                row.to_email, row.subject, row.html_body, row.from_email, row.from_name, row.plain_body
+            ))
+            positions.append(n)
+        except ValueError as e:
+            errors[n] = f"{type(e).__name__}: {e}"
+    if not messages:
+        return errors
+
+    started = time.perf_counter()
+    results = smtp_relay.send_many(messages)
+    per_message = (time.perf_counter() - started) / len(messages)
+    for n, result in zip(positions, results):
+        _send_timer.observe(per_message)
+        if result is not None:
+            errors[n] = f"{type(result).__name__}: {result}"
+    return errors
+
+
+def _record(session: Session, row: EmailOutbox, error: Optional[str]):
+    now = datetime.utcnow()
+    if error is None:
+        values = {"status": "sent", "sent_at": now, "last_error": None, "html_body": "", "plain_body": None}
+        notification_ids = json.loads(row.notification_ids) if row.notification_ids else []
+        if row.notification_id:
+            notification_ids.append(row.notification_id)
+        if notification_ids:
+            session.exec(
+                update(Notification)
+                .where(Notification.id.in_(notification_ids))
+                .values(is_sent_via_email=True)
+            )
+        _count("sent")
+        logger.info(f"✅ Email #{row.id} sent to {row.to_email} (subject: {row.subject})")
+    elif row.attempts >= row.max_attempts:
+        values = {"status": "failed", "last_error": error}
+        _count("failed")
+        logger.error(f"❌ Email #{row.id} to {row.to_email} failed after {row.attempts} attempts: {error}")
+    else:
+        values = {"status": "pending", "next_attempt_at": now + retry_delay(row.attempts), "last_error": error}
+        _count("retried")
+        logger.warning(f"⚠️ Email #{row.id} to {row.to_email} failed (attempt {row.attempts}), retrying: {error}")
+
+    session.exec(
+        update(EmailOutbox)
+        .where(EmailOutbox.id == row.id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+
+
+def drain_outbox(engine: Optional[Engine] = None, limit: int = EMAIL_OUTBOX_BATCH, now: Optional[datetime] = None) -> int:
+    """Claim and deliver one batch of due emails; returns how many were attempted"""
+    with Session(engine or _default_engine()) as session:
+        rows = _claim(session, limit, now or datetime.utcnow())
+        if rows:
+            for row, error in zip(rows, _deliver(rows)):
+                _record(session, row, error)
+    return len(rows)
+
+
+def purge_outbox(engine: Optional[Engine] = None, now: Optional[datetime] = None) -> int:
+    """
+    Delete sent and failed rows older than EMAIL_OUTBOX_RETENTION_DAYS, in
+    batches; returns how many rows were deleted
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=EMAIL_OUTBOX_RETENTION_DAYS)
+    expired = or_(
+        and_(EmailOutbox.status == "sent", EmailOutbox.sent_at < cutoff),
+        and_(EmailOutbox.status == "failed", EmailOutbox.created_at < cutoff),
+    )
+    deleted = 0
+    with Session(engine or _default_engine()) as session:
+        while True:
+            batch = select(EmailOutbox.id).where(expired).limit(EMAIL_OUTBOX_PURGE_BATCH)
+            result = session.exec(
+                delete(EmailOutbox)
+                .where(EmailOutbox.id.in_(batch.scalar_subquery()))
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            deleted += result.rowcount
+            if result.rowcount < EMAIL_OUTBOX_PURGE_BATCH:
+                break
+    if deleted:
+        _count("purged", deleted)
+        logger.info(f"🧹 Email outbox: purged {deleted} rows older than {EMAIL_OUTBOX_RETENTION_DAYS} days")
+    return deleted
+
+
+class OutboxWorkerPool:
+    """Background threads that keep draining the outbox"""
+
+    def __init__(
+        self,
+        workers: int = EMAIL_OUTBOX_WORKERS,
+        poll_seconds: float = EMAIL_OUTBOX_POLL_SECONDS,
+        engine: Optional[Engine] = None,
+    ):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.engine = engine
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._purge_lock = threading.Lock()
+        self._next_purge = 0.0
+
+    def start(self):
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"email-outbox-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"✅ Email outbox: {self.workers} workers started")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                attempted = drain_outbox(self.engine)
+            except Exception as e:
+                logger.error(f"❌ Email outbox worker error: {e}")
+                attempted = 0
+            if not attempted:
+                self._maybe_purge()
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def _maybe_purge(self):
+        """Run purge_outbox() from one idle worker per interval"""
+        if time.monotonic() < self._next_purge or not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_purge = time.monotonic() + EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS
+            purge_outbox(self.engine)
+        except Exception as e:
+            logger.error(f"❌ Email outbox purge error: {e}")
+        finally:
+            self._purge_lock.release()
+
+
+def start_outbox_workers(workers: int = EMAIL_OUTBOX_WORKERS, engine: Optional[Engine] = None) -> Optional[OutboxWorkerPool]:
+    """Start the process-wide worker pool (no-op with EMAIL_OUTBOX_WORKERS=0)"""
+    global _pool
+    if workers <= 0 or (_pool and _pool.is_running()):
+        return _pool
+    _pool = OutboxWorkerPool(workers=workers, engine=engine)
+    _pool.start()
+    return _pool
+
+
+def stop_outbox_workers():
+    global _pool
+    if _pool:
+        _pool.stop()
+        _pool = None
+    smtp_relay.close_smtp_pool()
+
+
+def wake_outbox_workers():
+    """Nudge idle workers after committing new outbox rows"""
+    if _pool:
+        _pool.wake()
+
+
+def _outbox_depth() -> tuple[dict, Optional[datetime]]:
+    with Session(_default_engine()) as session:
+        by_status = dict(session.exec(
+            select(EmailOutbox.status, func.count()).group_by(EmailOutbox.status)
+        ).all())
+        oldest_pending = session.exec(
+            select(func.min(EmailOutbox.created_at)).where(EmailOutbox.status == "pending")
+        ).one()
+    return by_status, oldest_pending
+
+
+_sampled_depth = metrics.Sampled(_outbox_depth)
+
+
+def outbox_metrics() -> dict:
+    by_status, oldest_pending = _sampled_depth()
+    with _counters_lock:
+        counters = dict(_counters)
+    return {
+        "depth": {status: by_status.get(status, 0) for status in OUTBOX_STATUSES},
+        "oldest_pending_seconds": round((datetime.utcnow() - oldest_pending).total_seconds(), 1) if oldest_pending else 0.0,
+        "workers": len(_pool._threads) if _pool else 0,
+        "send_latency": _send_timer.stats(),
+        **counters,
+    }
+
+
+metrics.register("email_outbox", outbox_metrics)
@@ -1,387 +1,191 @@
 # utils/email_service.py
+"""
+Expiry notification emails, rendered from the precompiled templates in
+templates/email (utils/email_templates.py) and queued in the email outbox.
+"""
 import os
+from dataclasses import dataclass
 from datetime import date
+from typing import Optional
 
-from utils.smtp_relay import send_email
+from sqlmodel import Session
 
-def send_expiry_notification_email(
-    to_email: str,
-    user_name: str,
-    item_name: str,
-    item_type: str,
-    expiry_date: date,
-    days_until_expiry: int
-):
-    """Send an expiry notification email"""
-    
-    subject = f"⚠️ {item_name} expiring in {days_until_expiry} day{'s' if days_until_expiry != 1 else ''}"
-    
-    # Plain text version
-    text = f"""
-Hello {user_name},
+from utils.email_outbox import enqueue_email
+from utils.email_templates import render_template, render_templates
 
-This is a reminder that your {item_type} "{item_name}" is expiring soon.
+NOTIFICATION_TEMPLATES = {"expiry_warning": "expiry_warning", "expired": "expired"}
 
-Expiry Date: {expiry_date.strftime('%B %d, %Y')}
-Days Remaining: {days_until_expiry} day{'s' if days_until_expiry != 1 else ''}
 
-Please take action to renew or update this item.
+@dataclass
+class RenderedEmail:
+    subject: str
+    html_body: str
+    plain_body: Optional[str] = None
 
----
-Remindes - Never miss an important date
-    """
 
-    # HTML version
-    html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            max-width: 600px;
-            margin: 0 auto;
-            padding: 20px;
-        }}
-        .container {{
-            background: linear-gradient(135deg, #14b8a6 0%, #06b6d4 100%);
-            border-radius: 16px;
-            padding: 1px;
-            margin: 20px 0;
-        }}
-        .content {{
-            background: white;
-            border-radius: 15px;
-            padding: 30px;
-        }}
-        .header {{
-            text-align: center;
-            margin-bottom: 30px;
-        }}
-        .logo {{
-            font-size: 28px;
-            font-weight: bold;
-            background: linear-gradient(135deg, #14b8a6 0%, #06b6d4 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-        }}
-        .alert-box {{
-            background: #fef3c7;
-            border-left: 4px solid #f59e0b;
-            padding: 20px;
-            border-radius: 8px;
-            margin: 20px 0;
-        }}
-        .alert-title {{
-            font-size: 20px;
-            font-weight: bold;
-            color: #92400e;
-            margin-bottom: 10px;
-        }}
-        .item-details {{
-            background: #f3f4f6;
-            padding: 20px;
-            border-radius: 8px;
-            margin: 20px 0;
-        }}
-        .detail-row {{
-            display: flex;
-            justify-content: space-between;
-            padding: 10px 0;
-            border-bottom: 1px solid #e5e7eb;
-        }}
-        .detail-row:last-child {{
-            border-bottom: none;
-        }}
-        .detail-label {{
-            font-weight: 600;
-            color: #6b7280;
-        }}
-        .detail-value {{
-            color: #111827;
-            font-weight: 500;
-        }}
-        .days-remaining {{
-            font-size: 32px;
-            font-weight: bold;
-            color: #f59e0b;
-            text-align: center;
-            margin: 20px 0;
-        }}
-        .footer {{
-            text-align: center;
-            color: #6b7280;
-            font-size: 14px;
-            margin-top: 30px;
-            padding-top: 20px;
-            border-top: 1px solid #e5e7eb;
-        }}
-        .button {{
-            display: inline-block;
-            background: linear-gradient(135deg, #14b8a6 0%, #06b6d4 100%);
-            color: white;
-            padding: 12px 30px;
-            border-radius: 8px;
-            text-decoration: none;
-            font-weight: 600;
-            margin: 20px 0;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="content">
-            <div class="header">
-                <div class="logo">✨ Remindes</div>
-                <p style="color: #6b7280; margin-top: 5px;">Never miss an important date</p>
-            </div>
-            
-            <div class="alert-box">
-                <div class="alert-title">⚠️ Expiry Warning</div>
-                <p style="margin: 0; color: #92400e;">Your {item_type} is expiring soon and needs your attention.</p>
-            </div>
-            
-            <p>Hello <strong>{user_name}</strong>,</p>
-            
-            <p>This is a friendly reminder about an upcoming expiry:</p>
-            
-            <div class="item-details">
-                <div class="detail-row">
-                    <span class="detail-label">Item Name:</span>
-                    <span class="detail-value">{item_name}</span>
-                </div>
-                <div class="detail-row">
-                    <span class="detail-label">Type:</span>
-                    <span class="detail-value">{item_type}</span>
-                </div>
-                <div class="detail-row">
-                    <span class="detail-label">Expiry Date:</span>
-                    <span class="detail-value">{expiry_date.strftime('%B %d, %Y')}</span>
-                </div>
-            </div>
-            
-            <div class="days-remaining">
-                {days_until_expiry} day{'s' if days_until_expiry != 1 else ''} remaining
-            </div>
-            
-            <p style="text-align: center;">
-                <a href="{os.getenv('FRONTEND_URL', 'http://localhost:5173')}/dashboard" class="button">
-                    View in Dashboard
-                </a>
-            </p>
-            
-            <p style="color: #6b7280;">Please take action to renew or update this item before it expires.</p>
-            
-            <div class="footer">
-                <p>You're receiving this email because you have email notifications enabled in Remindes.</p>
-                <p style="margin-top: 10px;">
-                    <a href="{os.getenv('FRONTEND_URL', 'http://localhost:5173')}/settings" style="color: #14b8a6;">Manage notification preferences</a>
-                </p>
-            </div>
-        </div>
-    </div>
-</body>
-</html>
+def _plural(count: int) -> str:
+    return "s" if count != 1 else ""
+
+
+def _frontend_url() -> str:
+    return os.getenv('FRONTEND_URL', 'http://localhost:5173')
+
+
+def _subject(notification_type: str, item_name: str, days: int) -> str:
+    if notification_type == "expiry_warning":
+        return f"⚠️ {item_name} expiring in {days} day{_plural(days)}"
+    return f"❌ {item_name} has expired"
+
+
+def render_notification_emails(notification_type: str, rows: list[dict]) -> list[RenderedEmail]:
+    """
+    Render expiry_warning or expired emails for many items in one pass.
+    Each row has user_name, item_name, item_type, expiry_date and days.
     """
-    return send_email(
+    template = NOTIFICATION_TEMPLATES[notification_type]
+    frontend_url = _frontend_url()
+    values = [
+        {
+            "user_name": row["user_name"],
+            "item_name": row["item_name"],
+            "item_type": row["item_type"],
+            "expiry_date": row["expiry_date"].strftime('%B %d, %Y'),
+            "days": row["days"],
+            "plural": _plural(row["days"]),
+            "frontend_url": frontend_url,
+        }
+        for row in rows
+    ]
+    html_bodies = render_templates(f"{template}.html", values)
+    plain_bodies = render_templates(f"{template}.txt", values)
+    return [
+        RenderedEmail(_subject(notification_type, row["item_name"], row["days"]), html_body, plain_body)
+        for row, html_body, plain_body in zip(rows, html_bodies, plain_bodies)
+    ]
+
+
+def _queue_notification_email(
+    notification_type: str,
+    to_email: str,
+    row: dict,
+    notification_id: Optional[int],
+    session: Optional[Session]
+):
+    email = render_notification_emails(notification_type, [row])[0]
+    return enqueue_email(
         to_email=to_email,
-        subject=subject,
-        html_body=html,
+        subject=email.subject,
+        html_body=email.html_body,
         from_email="no-reply@remindes.com",
-        plain_body=text,
+        plain_body=email.plain_body,
+        notification_id=notification_id,
+        session=session,
     )
 
 
-def send_expired_notification_email(
+def send_expiry_notification_email(
     to_email: str,
     user_name: str,
     item_name: str,
     item_type: str,
     expiry_date: date,
-    days_expired: int
+    days_until_expiry: int,
+    notification_id: Optional[int] = None,
+    session: Optional[Session] = None
 ):
-    """Send an expired item notification email"""
-    
-    subject = f"❌ {item_name} has expired"
+    """Queue an expiry notification email (see enqueue_email for `session`)"""
+    row = {"user_name": user_name, "item_name": item_name, "item_type": item_type,
+           "expiry_date": expiry_date, "days": days_until_expiry}
+    return _queue_notification_email("expiry_warning", to_email, row, notification_id, session)
 
-    # Plain text version
-    text = f"""
-Hello {user_name},
 
-This is an urgent reminder that your {item_type} "{item_name}" has expired.
+def send_expired_notification_email(
+    to_email: str,
+    user_name: str,
+    item_name: str,
+    item_type: str,
+    expiry_date: date,
+    days_expired: int,
+    notification_id: Optional[int] = None,
+    session: Optional[Session] = None
+):
+    """Queue an expired item notification email (see enqueue_email for `session`)"""
+    row = {"user_name": user_name, "item_name": item_name, "item_type": item_type,
+           "expiry_date": expiry_date, "days": days_expired}
+    return _queue_notification_email("expired", to_email, row, notification_id, session)
 
-Expiry Date: {expiry_date.strftime('%B %d, %Y')}
-Days Overdue: {days_expired} day{'s' if days_expired != 1 else ''}
 
-Please take immediate action to renew or update this item.
+def _digest_status(entry: dict) -> str:
+    days = entry["days"]
+    if entry["notification_type"] == "expired":
+        return f"Expired {days} day{_plural(days)} ago"
+    return f"Expires in {days} day{_plural(days)}"
 
----
-Remindes - Never miss an important date
-    """
 
-    # HTML version
-    html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            max-width: 600px;
-            margin: 0 auto;
-            padding: 20px;
-        }}
-        .container {{
-            background: linear-gradient(135deg, #ef4444 0%, #dc2626 100%);
-            border-radius: 16px;
-            padding: 1px;
-            margin: 20px 0;
-        }}
-        .content {{
-            background: white;
-            border-radius: 15px;
-            padding: 30px;
-        }}
-        .header {{
-            text-align: center;
-            margin-bottom: 30px;
-        }}
-        .logo {{
-            font-size: 28px;
-            font-weight: bold;
-            background: linear-gradient(135deg, #14b8a6 0%, #06b6d4 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-        }}
-        .alert-box {{
-            background: #fee2e2;
-            border-left: 4px solid #dc2626;
-            padding: 20px;
-            border-radius: 8px;
-            margin: 20px 0;
-        }}
-        .alert-title {{
-            font-size: 20px;
-            font-weight: bold;
-            color: #991b1b;
-            margin-bottom: 10px;
-        }}
-        .item-details {{
-            background: #f3f4f6;
-            padding: 20px;
-            border-radius: 8px;
-            margin: 20px 0;
-        }}
-        .detail-row {{
-            display: flex;
-            justify-content: space-between;
-            padding: 10px 0;
-            border-bottom: 1px solid #e5e7eb;
-        }}
-        .detail-row:last-child {{
-            border-bottom: none;
-        }}
-        .detail-label {{
-            font-weight: 600;
-            color: #6b7280;
-        }}
-        .detail-value {{
-            color: #111827;
-            font-weight: 500;
-        }}
-        .days-expired {{
-            font-size: 32px;
-            font-weight: bold;
-            color: #dc2626;
-            text-align: center;
-            margin: 20px 0;
-        }}
-        .footer {{
-            text-align: center;
-            color: #6b7280;
-            font-size: 14px;
-            margin-top: 30px;
-            padding-top: 20px;
-            border-top: 1px solid #e5e7eb;
-        }}
-        .button {{
-            display: inline-block;
-            background: linear-gradient(135deg, #14b8a6 0%, #06b6d4 100%);
-            color: white;
-            padding: 12px 30px;
-            border-radius: 8px;
-            text-decoration: none;
-            font-weight: 600;
-            margin: 20px 0;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="content">
-            <div class="header">
-                <div class="logo">✨ Remindes</div>
-                <p style="color: #6b7280; margin-top: 5px;">Never miss an important date</p>
-            </div>
-            
-            <div class="alert-box">
-                <div class="alert-title">❌ Item Expired</div>
-                <p style="margin: 0; color: #991b1b;">Your {item_type} has expired and requires immediate attention.</p>
-            </div>
-            
-            <p>Hello <strong>{user_name}</strong>,</p>
-            
-            <p>This is an urgent reminder about an expired item:</p>
-            
-            <div class="item-details">
-                <div class="detail-row">
-                    <span class="detail-label">Item Name:</span>
-                    <span class="detail-value">{item_name}</span>
-                </div>
-                <div class="detail-row">
-                    <span class="detail-label">Type:</span>
-                    <span class="detail-value">{item_type}</span>
-                </div>
-                <div class="detail-row">
-                    <span class="detail-label">Expiry Date:</span>
-                    <span class="detail-value">{expiry_date.strftime('%B %d, %Y')}</span>
-                </div>
-            </div>
-            
-            <div class="days-expired">
-                Expired {days_expired} day{'s' if days_expired != 1 else ''} ago
-            </div>
-            
-            <p style="text-align: center;">
-                <a href="{os.getenv('FRONTEND_URL', 'http://localhost:5173')}/dashboard" class="button">
-                    View in Dashboard
-                </a>
-            </p>
-            
-            <p style="color: #6b7280;">Please renew or update this item as soon as possible.</p>
-            
-            <div class="footer">
-                <p>You're receiving this email because you have email notifications enabled in Remindes.</p>
-                <p style="margin-top: 10px;">
-                    <a href="{os.getenv('FRONTEND_URL', 'http://localhost:5173')}/settings" style="color: #14b8a6;">Manage notification preferences</a>
-                </p>
-            </div>
-        </div>
-    </div>
-</body>
-</html>
+def render_digest_email(user_name: str, entries: list[dict]) -> RenderedEmail:
+    """
+    Render one daily digest covering several items. Each entry has
+    item_name, item_type, expiry_date, days and notification_type
+    ("expired" or "expiry_warning").
     """
+    expired = sorted((e for e in entries if e["notification_type"] == "expired"), key=lambda e: -e["days"])
+    expiring = sorted((e for e in entries if e["notification_type"] != "expired"), key=lambda e: e["days"])
+    count = len(entries)
+
+    html_sections, text_sections = [], []
+    for title, title_color, color, group in (
+        ("❌ Expired", "#991b1b", "#dc2626", expired),
+        ("⚠️ Expiring soon", "#92400e", "#f59e0b", expiring),
+    ):
+        if not group:
+            continue
+        rows = [
+            {
+                "item_name": e["item_name"],
+                "item_type": e["item_type"],
+                "expiry_date": e["expiry_date"].strftime('%B %d, %Y'),
+                "status": _digest_status(e),
+                "color": color,
+            }
+            for e in group
+        ]
+        html_sections.append(render_template(
+            "digest_section.html",
+            title=title, title_color=title_color, rows="".join(render_templates("digest_row.html", rows)),
+        ))
+        text_sections.append(render_template(
+            "digest_section.txt",
+            title=title.split(" ", 1)[1], rows="".join(render_templates("digest_row.txt", rows)),
+        ))
+
+    html_body = render_template(
+        "digest.html",
+        user_name=user_name,
+        count=count,
+        verb_s="" if count != 1 else "s",
+        sections="".join(html_sections),
+        frontend_url=_frontend_url(),
+    )
+    plain_body = render_template("digest.txt", user_name=user_name, sections="\n".join(text_sections))
+    subject = f"📋 {count} item{_plural(count)} need{'' if count != 1 else 's'} your attention"
+    return RenderedEmail(subject, html_body, plain_body)
+
 
-    return send_email(
+def send_digest_email(
+    to_email: str,
+    user_name: str,
+    entries: list[dict],
+    notification_ids: list[int],
+    session: Optional[Session] = None
+):
+    """Queue one daily digest email covering several items (see render_digest_email)"""
+    email = render_digest_email(user_name, entries)
+    return enqueue_email(
         to_email=to_email,
-        subject=subject,
-        html_body=html,
+        subject=email.subject,
+        html_body=email.html_body,
         from_email="no-reply@remindes.com",
-        plain_body=text,
-    )
\ No newline at end of file
+        plain_body=email.plain_body,
+        notification_ids=notification_ids,
+        session=session,
+    )
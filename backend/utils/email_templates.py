@@ -0,0 +1,173 @@
+# utils/email_templates.py
+"""
+Precompiled email templates.
+
+Templates live in backend/templates/email and are compiled once (at startup
+via load_email_templates(), or lazily on first use). Compiling resolves
+`{% include "file" %}` statically and turns the template into a single
+str.format_map() pattern, so rendering a message only escapes and
+substitutes its variables.
+
+Syntax:
+    {{ name }}          variable; HTML-escaped in .html templates
+    {{ name|safe }}     variable inserted as-is (pre-rendered HTML)
+    {% include "x" %}   another template from the same directory, inlined
+
+Every variable a template uses must be passed to render(); a missing one
+raises KeyError rather than sending a half-filled email.
+"""
+import html
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Mapping, Optional
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+_INCLUDE = re.compile(r'\{%\s*include\s+"([^"]+)"\s*%\}')
+_VARIABLE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*(\|\s*safe\s*)?\}\}")
+MAX_INCLUDE_DEPTH = 5
+
+
+class TemplateError(Exception):
+    """A template could not be found or compiled"""
+
+
+class CompiledTemplate:
+    """A template reduced to a format_map() pattern plus its variable names"""
+
+    def __init__(self, name: str, source: str, autoescape: bool):
+        self.name = name
+        self.autoescape = autoescape
+        self.escaped: set[str] = set()
+        self.raw: set[str] = set()
+
+        parts, position = [], 0
+        for match in _VARIABLE.finditer(source):
+            parts.append(_escape_braces(source[position:match.start()]))
+            variable, safe = match.group(1), bool(match.group(2))
+            (self.raw if safe or not autoescape else self.escaped).add(variable)
+            parts.append("{" + variable + "}")
+            position = match.end()
+        parts.append(_escape_braces(source[position:]))
+        self._pattern = "".join(parts)
+
+        both = self.escaped & self.raw
+        if both:
+            raise TemplateError(f"{name}: {sorted(both)} used both escaped and |safe")
+
+    @property
+    def variables(self) -> set[str]:
+        return self.escaped | self.raw
+
+    def render(self, values: Mapping[str, object]) -> str:
+        substituted = {name: str(values[name]) for name in self.raw}
+        for name in self.escaped:
+            substituted[name] = html.escape(str(values[name]))
+        return self._pattern.format_map(substituted)
+
+
+def _escape_braces(literal: str) -> str:
+    return literal.replace("{", "{{").replace("}", "}}")
+
+
+class TemplateEngine:
+    """Compiles every template in a directory once and renders them by name"""
+
+    def __init__(self, directory: Path = TEMPLATE_DIR):
+        self.directory = Path(directory)
+        self._templates: dict[str, CompiledTemplate] = {}
+        self._lock = threading.Lock()
+        self.compile_ms = 0.0
+        self._renders = 0
+        self._render_seconds = 0.0
+
+    def _read(self, name: str, depth: int = 0) -> str:
+        if depth > MAX_INCLUDE_DEPTH:
+            raise TemplateError(f"{name}: includes nested deeper than {MAX_INCLUDE_DEPTH}")
+        path = self.directory / name
+        if not path.is_file():
+            raise TemplateError(f"Template not found: {name}")
+        source = path.read_text(encoding="utf-8")
+        # The directive's own line break stays, so drop the included file's last one
+        return _INCLUDE.sub(lambda m: self._read(m.group(1), depth + 1).rstrip("\n"), source)
+
+    def load(self) -> "TemplateEngine":
+        """Compile every template (files starting with "_" are include-only)"""
+        started = time.perf_counter()
+        templates = {}
+        for path in sorted(self.directory.iterdir()):
+            if path.is_file() and not path.name.startswith("_"):
+                templates[path.name] = CompiledTemplate(
+                    path.name, self._read(path.name), autoescape=path.suffix == ".html"
+                )
+        with self._lock:
+            self._templates = templates
+        self.compile_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"✅ Email templates: {len(templates)} compiled in {self.compile_ms:.1f}ms")
+        return self
+
+    def get(self, name: str) -> CompiledTemplate:
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise TemplateError(f"Template not found: {name}") from None
+
+    def render(self, template_name: str, /, **values) -> str:
+        return self.render_many(template_name, [values])[0]
+
+    def render_many(self, name: str, rows: Iterable[Mapping[str, object]]) -> list[str]:
+        """Render one template for many sets of values (e.g. a sweep chunk)"""
+        template = self.get(name)
+        started = time.perf_counter()
+        rendered = [template.render(values) for values in rows]
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._renders += len(rendered)
+            self._render_seconds += elapsed
+        return rendered
+
+    def stats(self) -> dict:
+        with self._lock:
+            renders, seconds = self._renders, self._render_seconds
+        return {
+            "templates": len(self._templates),
+            "compile_ms": round(self.compile_ms, 3),
+            "renders": renders,
+            "avg_render_us": round(seconds / renders * 1_000_000, 2) if renders else 0.0,
+        }
+
+
+_engine: Optional[TemplateEngine] = None
+_engine_lock = threading.Lock()
+
+
+def load_email_templates() -> TemplateEngine:
+    """Compile the email templates (called at startup); returns the shared engine"""
+    global _engine
+    with _engine_lock:
+        _engine = TemplateEngine().load()
+        return _engine
+
+
+def get_email_templates() -> TemplateEngine:
+    if _engine is None:
+        return load_email_templates()
+    return _engine
+
+
+def render_template(template_name: str, /, **values) -> str:
+    return get_email_templates().render(template_name, **values)
+
+
+def render_templates(name: str, rows: Iterable[Mapping[str, object]]) -> list[str]:
+    return get_email_templates().render_many(name, rows)
+
+
+metrics.register("email_templates", lambda: get_email_templates().stats())
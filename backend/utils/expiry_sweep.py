@@ -0,0 +1,508 @@
+# utils/expiry_sweep.py
+"""
+Set-based engine for the daily expiry sweep.
+
+The sweep reads the reminder stages that are due from reminder_schedule
+(see utils/reminder_schedule.py), one chunk at a time, so its cost follows
+the number of due stages instead of the number of items:
+
+1. candidates - a single reminder_schedule/items/users join per chunk that
+   range-scans the (fire_date, id) index for rows due by today.
+2. classify   - the chunk's rows are claimed with one conditional UPDATE
+   (only rows not yet fired today), so overlapping sweeps never notify the
+   same (item, stage) twice. Each claimed row maps to at most one
+   (user, item, notification_type) tuple and is moved on: a warning stage
+   is marked fired, the expired stage is due again in a week.
+3. insert     - the new notifications for the chunk are bulk-inserted with
+   INSERT ... ON CONFLICT DO NOTHING on their unique dedup_key (item, stage
+   and expiry date for a warning, item and local date for an expiry
+   notice), so a notification that already exists is never created twice,
+   whatever runs the sweep; only inserted rows go on to be emailed.
+4. email      - the chunk's emails are rendered in one batch per template and
+   an email_outbox row is queued per notification, committed in the same
+   transaction as the notifications, so a notification and its email are
+   never recorded without each other. The outbox workers
+   (utils/email_outbox.py) deliver them and set is_sent_via_email.
+   Notifications of users with daily_digest enabled are held back instead:
+   a digest_entries row is written for each, in the same transaction.
+5. digest     - after the last chunk, each user with held entries gets a
+   single email covering all of them, queued in the transaction that
+   deletes the entries. Entries left by a run that failed partway are
+   sent by the next run over the same users.
+
+Each phase is timed; the mail relay is no longer on the sweep's path.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import or_, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, delete, select
+
+from models.digest_entry import DigestEntry
+from models.item import Item
+from models.notification import Notification
+from models.reminder_schedule import ReminderSchedule
+from models.user import User
+from utils import metrics
+from utils.email_outbox import enqueue_email, wake_outbox_workers
+from utils.email_service import render_notification_emails, send_digest_email
+from utils.reminder_schedule import EXPIRED_INTERVAL
+from utils.unread_counts import invalidate_unread_count
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# An expiry notice is repeated weekly
+EXPIRED_WINDOW = EXPIRED_INTERVAL
+
+SWEEP_PHASES = ("candidates", "classify", "insert", "email", "digest")
+
+_totals_lock = threading.Lock()
+_totals = {"runs": 0, "notifications_created": 0, "emails_queued": 0, "digests_queued": 0, "emails_saved": 0}
+_last_report: Optional["SweepReport"] = None
+
+
+@dataclass
+class SweepReport:
+    """Counters and per-phase timings (seconds) for one sweep run"""
+    items_scanned: int = 0
+    chunks: int = 0
+    notifications_created: int = 0
+    emails_queued: int = 0
+    digests_queued: int = 0
+    # Per-item emails replaced by digests (items batched minus digests sent)
+    emails_saved: int = 0
+    timings: dict = field(default_factory=lambda: {phase: 0.0 for phase in SWEEP_PHASES})
+    total_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "items_scanned": self.items_scanned,
+            "chunks": self.chunks,
+            "notifications_created": self.notifications_created,
+            "emails_queued": self.emails_queued,
+            "digests_queued": self.digests_queued,
+            "emails_saved": self.emails_saved,
+            "timings": {phase: round(seconds, 4) for phase, seconds in self.timings.items()},
+            "total_seconds": round(self.total_seconds, 4),
+        }
+
+
+def describe_item(item_type: Optional[str], name: str) -> str:
+    """Human readable label used in notification messages"""
+    if item_type == "document":
+        return f"document '{name}'"
+    if item_type == "subscription":
+        return f"subscription '{name}'"
+    return f"item '{name}'"
+
+
+def _plural(count: int) -> str:
+    return "s" if count != 1 else ""
+
+
+def _due_query(after: tuple, chunk_size: int, today: date, user_filters: list):
+    """
+    Reminder stages of opted-in users due by today, with their item and
+    user, in (fire_date, id) keyset order over the reminder_schedule index.
+    """
+    return (
+        select(
+            ReminderSchedule,
+            Item,
+            User.id,
+            User.email,
+            User.full_name,
+            User.daily_digest,
+        )
+        .join(Item, Item.id == ReminderSchedule.item_id)
+        .join(User, User.id == ReminderSchedule.user_id)
+        .where(User.email_notifications == True, *user_filters)
+        .where(ReminderSchedule.fire_date <= today)
+        .where(tuple_(ReminderSchedule.fire_date, ReminderSchedule.id) > after)
+        .order_by(ReminderSchedule.fire_date, ReminderSchedule.id)
+        .limit(chunk_size)
+    )
+
+
+def _claim(session: Session, reminder_ids: list[int], today: date) -> set[int]:
+    """
+    Mark due rows as fired today; returns the ids this sweep claimed. Rows
+    another sweep has already fired today are left to it.
+    """
+    claimed = session.exec(
+        update(ReminderSchedule)
+        .where(
+            ReminderSchedule.id.in_(reminder_ids),
+            ReminderSchedule.fire_date <= today,
+            or_(ReminderSchedule.last_fired_date.is_(None), ReminderSchedule.last_fired_date < today),
+        )
+        .values(last_fired_date=today)
+        .returning(ReminderSchedule.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return {row[0] for row in claimed}
+
+
+def _skip_earlier_warnings(session: Session, fired: dict[int, int], today: date):
+    """
+    Mark the other due warning stages of items that got a warning today as
+    fired, so an item behind on several stages gets a single warning.
+    """
+    if not fired:
+        return
+    session.exec(
+        update(ReminderSchedule)
+        .where(
+            ReminderSchedule.item_id.in_(list(fired)),
+            ReminderSchedule.id.notin_(list(fired.values())),
+            ReminderSchedule.kind == "expiry_warning",
+            ReminderSchedule.fire_date <= today,
+        )
+        .values(fire_date=None, last_fired_date=today, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def dedup_key(reminder: ReminderSchedule, expiry: date, today: date) -> str:
+    """A warning stage notifies once per expiry date, the expired stage once per local date"""
+    if reminder.kind == "expired":
+        return f"{reminder.item_id}:{reminder.stage}:{today.isoformat()}"
+    return f"{reminder.item_id}:{reminder.stage}:{expiry.isoformat()}"
+
+
+def _insert_notifications(session: Session, notifications: list[Notification]) -> dict[str, int]:
+    """
+    Bulk-insert notifications, skipping those whose dedup_key already
+    exists; returns dedup_key -> id of the rows inserted.
+    """
+    insert = postgresql.insert if session.get_bind().dialect.name == "postgresql" else sqlite.insert
+    inserted = session.exec(
+        insert(Notification)
+        .values([notification.model_dump(exclude={"id"}) for notification in notifications])
+        .on_conflict_do_nothing(index_elements=["dedup_key"])
+        .returning(Notification.dedup_key, Notification.id)
+    ).all()
+    return {key: notification_id for key, notification_id in inserted}
+
+
+def _classify(row, today: date) -> Optional[dict]:
+    """Map a claimed reminder stage to the notification it needs, if any"""
+    reminder, item, user_id, email, full_name, daily_digest = row
+
+    expiry = item.get_expiry_date()
+    if not expiry:
+        return None
+
+    description = describe_item(item.type, item.name)
+
+    if reminder.kind == "expiry_warning" and expiry >= today:
+        days_until = (expiry - today).days
+        notification = Notification(
+            user_id=user_id,
+            item_id=item.id,
+            title=f"⚠️ {item.name} expiring soon",
+            message=f"Your {description} expires in {days_until} day{_plural(days_until)}.",
+            notification_type="expiry_warning",
+            is_sent_via_email=False,
+            dedup_key=dedup_key(reminder, expiry, today),
+        )
+        days = days_until
+    elif reminder.kind == "expired" and expiry < today:
+        days_expired = (today - expiry).days
+        notification = Notification(
+            user_id=user_id,
+            item_id=item.id,
+            title=f"❌ {item.name} has expired",
+            message=f"Your {description} expired {days_expired} day{_plural(days_expired)} ago.",
+            notification_type="expired",
+            is_sent_via_email=False,
+            dedup_key=dedup_key(reminder, expiry, today),
+        )
+        days = days_expired
+    else:
+        return None
+
+    return {
+        "schedule": reminder,
+        "notification": notification,
+        "notification_type": notification.notification_type,
+        "email": email,
+        "digest": bool(daily_digest),
+        "user_name": full_name or "User",
+        "item_name": item.name,
+        "item_type": (item.type or "item").capitalize(),
+        "expiry": expiry,
+        "days": days,
+    }
+
+
+def _queue_emails(entries: list[dict], session: Session):
+    """Render a chunk's emails in one batch per template and add them to the outbox"""
+    for notification_type in ("expiry_warning", "expired"):
+        group = [entry for entry in entries if entry["notification_type"] == notification_type]
+        if not group:
+            continue
+        rendered = render_notification_emails(notification_type, [
+            {
+                "user_name": entry["user_name"],
+                "item_name": entry["item_name"],
+                "item_type": entry["item_type"],
+                "expiry_date": entry["expiry"],
+                "days": entry["days"],
+            }
+            for entry in group
+        ])
+        for entry, email in zip(group, rendered):
+            enqueue_email(
+                to_email=entry["email"],
+                subject=email.subject,
+                html_body=email.html_body,
+                from_email="no-reply@remindes.com",
+                plain_body=email.plain_body,
+                notification_id=entry["id"],
+                session=session,
+            )
+
+
+def _advance(session: Session, reminder: ReminderSchedule, item: Item, today: date):
+    """Move a claimed stage on: warnings fire once, the expired stage weekly"""
+    expiry = item.get_expiry_date()
+    if expiry is None:
+        session.delete(reminder)
+        return
+    if reminder.kind == "expired":
+        reminder.fire_date = max(expiry, today) + (EXPIRED_INTERVAL if expiry < today else timedelta(days=1))
+    else:
+        reminder.fire_date = None
+    reminder.last_fired_date = today
+    reminder.updated_at = datetime.utcnow()
+    session.add(reminder)
+
+
+def _release(session: Session, rows):
+    for row in rows:
+        if row[0] in session:
+            session.expunge(row[0])
+
+
+def _hold_for_digest(session: Session, entry: dict):
+    session.add(DigestEntry(
+        user_id=entry["notification"].user_id,
+        notification_id=entry["id"],
+        to_email=entry["email"],
+        user_name=entry["user_name"],
+        notification_type=entry["notification_type"],
+        item_name=entry["item_name"],
+        item_type=entry["item_type"],
+        expiry_date=entry["expiry"],
+        days=entry["days"],
+    ))
+
+
+def delete_item_digest_entries(item_ids: Iterable[int]):
+    """DELETE statement for the held digest lines of items about to be deleted"""
+    return delete(DigestEntry).where(DigestEntry.notification_id.in_(
+        select(Notification.id).where(Notification.item_id.in_(list(item_ids)))
+    ))
+
+
+def _queue_digests(session: Session, user_filters: list, report: SweepReport, chunk_size: int):
+    """
+    Queue one email per user with held digest entries and delete the
+    entries in the same transaction, chunk_size users at a time
+    """
+    after = 0
+    while True:
+        user_ids = session.exec(
+            select(DigestEntry.user_id)
+            .join(User, User.id == DigestEntry.user_id)
+            .where(DigestEntry.user_id > after, *user_filters)
+            .group_by(DigestEntry.user_id)
+            .order_by(DigestEntry.user_id)
+            .limit(chunk_size)
+        ).all()
+        if not user_ids:
+            return
+        after = user_ids[-1]
+
+        held = session.exec(
+            select(DigestEntry).where(DigestEntry.user_id.in_(user_ids)).order_by(DigestEntry.user_id, DigestEntry.id)
+        ).all()
+        for user_id in user_ids:
+            entries = [entry for entry in held if entry.user_id == user_id]
+            send_digest_email(
+                to_email=entries[0].to_email,
+                user_name=entries[0].user_name,
+                entries=[
+                    {
+                        "notification_type": entry.notification_type,
+                        "item_name": entry.item_name,
+                        "item_type": entry.item_type,
+                        "expiry_date": entry.expiry_date,
+                        "days": entry.days,
+                    }
+                    for entry in entries
+                ],
+                notification_ids=[entry.notification_id for entry in entries],
+                session=session,
+            )
+            report.emails_saved += len(entries) - 1
+        session.exec(
+            delete(DigestEntry)
+            .where(DigestEntry.id.in_([entry.id for entry in held]))
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        for entry in held:
+            session.expunge(entry)
+        report.digests_queued += len(user_ids)
+        report.emails_queued += len(user_ids)
+
+
+def run_expiry_sweep(
+    session: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    send_emails: bool = True,
+    today: Optional[date] = None,
+    timezones: Optional[Iterable[str]] = None,
+    shard: Optional[int] = None,
+    shard_count: int = 1,
+) -> SweepReport:
+    """
+    Create the expiry notifications that are due for every opted-in user
+    in a few set-based queries per chunk of due reminders.
+
+    The scheduler narrows a run to the users whose timezone is in
+    `timezones` and, with `shard`, to user_id % shard_count == shard;
+    `today` is then the local date of those users.
+    """
+    report = SweepReport()
+    started = time.perf_counter()
+    today = today or date.today()
+    user_filters = []
+    if timezones is not None:
+        timezones = list(timezones)
+        timezone_filter = User.timezone.in_([name for name in timezones if name is not None])
+        if None in timezones:
+            timezone_filter = or_(timezone_filter, User.timezone.is_(None))
+        user_filters.append(timezone_filter)
+    if shard is not None:
+        user_filters.append(User.id % shard_count == shard)
+    after = (date.min, 0)
+
+    while True:
+        phase_start = time.perf_counter()
+        rows = session.exec(_due_query(after, chunk_size, today, user_filters)).all()
+        report.timings["candidates"] += time.perf_counter() - phase_start
+
+        if not rows:
+            break
+
+        report.chunks += 1
+        report.items_scanned += len(rows)
+        last_reminder = rows[-1][0]
+        after = (last_reminder.fire_date, last_reminder.id)
+
+        phase_start = time.perf_counter()
+        claimed = _claim(session, [row[0].id for row in rows], today)
+        # item_id -> the stage that warns today: the one closest to expiry
+        warnings: dict[int, dict] = {}
+        entries = []
+        for entry in (_classify(row, today) for row in rows if row[0].id in claimed):
+            if entry is None:
+                continue
+            if entry["notification_type"] == "expired":
+                entries.append(entry)
+                continue
+            current = warnings.get(entry["notification"].item_id)
+            if current is None or entry["schedule"].fire_date > current["schedule"].fire_date:
+                warnings[entry["notification"].item_id] = entry
+        entries.extend(warnings.values())
+        for reminder, item, *_ in rows:
+            if reminder.id in claimed:
+                _advance(session, reminder, item, today)
+        _skip_earlier_warnings(
+            session, {item_id: entry["schedule"].id for item_id, entry in warnings.items()}, today
+        )
+        for row in rows:
+            # Release the scanned items; only the new notifications are needed from here on
+            session.expunge(row[1])
+        report.timings["classify"] += time.perf_counter() - phase_start
+
+        if not entries:
+            phase_start = time.perf_counter()
+            session.commit()
+            _release(session, rows)
+            report.timings["insert"] += time.perf_counter() - phase_start
+            continue
+
+        phase_start = time.perf_counter()
+        inserted = _insert_notifications(session, [entry["notification"] for entry in entries])
+        entries = [entry for entry in entries if entry["notification"].dedup_key in inserted]
+        for entry in entries:
+            entry["id"] = inserted[entry["notification"].dedup_key]
+        notified_users = {entry["notification"].user_id for entry in entries}
+        report.timings["insert"] += time.perf_counter() - phase_start
+
+        queued = 0
+        if send_emails:
+            phase_start = time.perf_counter()
+            singles = []
+            for entry in entries:
+                if not entry["email"]:
+                    continue
+                if entry["digest"]:
+                    _hold_for_digest(session, entry)
+                else:
+                    singles.append(entry)
+            _queue_emails(singles, session)
+            queued = len(singles)
+            report.timings["email"] += time.perf_counter() - phase_start
+
+        phase_start = time.perf_counter()
+        session.commit()
+        for user_id in notified_users:
+            invalidate_unread_count(user_id)
+        report.notifications_created += len(entries)
+        report.emails_queued += queued
+        report.timings["insert"] += time.perf_counter() - phase_start
+        if queued:
+            wake_outbox_workers()
+
+        _release(session, rows)
+
+    if send_emails:
+        phase_start = time.perf_counter()
+        _queue_digests(session, user_filters, report, chunk_size)
+        report.timings["digest"] += time.perf_counter() - phase_start
+        if report.digests_queued:
+            wake_outbox_workers()
+
+    report.total_seconds = time.perf_counter() - started
+    _record_totals(report)
+    logger.info(f"✅ Expiry sweep: {report.as_dict()}")
+    return report
+
+
+def _record_totals(report: SweepReport):
+    global _last_report
+    with _totals_lock:
+        _totals["runs"] += 1
+        for name in ("notifications_created", "emails_queued", "digests_queued", "emails_saved"):
+            _totals[name] += getattr(report, name)
+        _last_report = report
+
+
+def sweep_metrics() -> dict:
+    with _totals_lock:
+        return {**_totals, "last_run": _last_report.as_dict() if _last_report else None}
+
+
+metrics.register("expiry_sweep", sweep_metrics)
@@ -1,16 +1,116 @@
-import uuid, os, shutil
+# utils/file.py
+"""
+Streaming upload stage.
 
-UPLOAD_DIR = "uploads"
+save_upload() copies an UploadFile to a staging file of the upload storage
+(utils/storage.py) in UPLOAD_CHUNK_SIZE chunks: the size cap is enforced
+while bytes flow, the MIME type is sniffed from the first chunk and a
+SHA-256 is computed incrementally. place_upload() moves the staged file into
+the storage under its content-addressed key (<sha256>.<ext>) once the blob
+store has recorded it (see utils/blob_store.py), so the data is written
+locally once and a rejected upload never leaves a file behind. Reads,
+hashing and writes run in the threadpool, off the event loop.
+"""
+import hashlib
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from typing import Optional
 
-def save_upload(file):
-    if not file:
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from utils.file_validation import MAX_FILE_SIZE, validate_file_content
+from utils.storage import StorageError, get_storage, upload_key
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+
+
+@dataclass
+class StoredUpload:
+    path: str  # URL path stored on the item, e.g. /uploads/<sha256>.pdf
+    size: int
+    sha256: str
+    mime_type: Optional[str]
+    partial_path: str  # Staging file holding the bytes until place_upload()
+
+
+async def delete_upload(file_path: Optional[str]) -> bool:
+    """Remove a stored upload; returns True if a file was deleted"""
+    if not file_path:
+        return False
+    try:
+        return await get_storage().delete(upload_key(file_path))
+    except (OSError, StorageError) as e:
+        logger.error(f"⚠️ Could not delete file {file_path}: {e}")
+        return False
+
+
+def _write_chunk(buffer, digest, chunk: bytes):
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+def _discard(buffer, partial_path: str):
+    buffer.close()
+    try:
+        os.remove(partial_path)
+    except FileNotFoundError:
+        pass
+
+
+async def place_upload(stored: StoredUpload):
+    """Move a streamed upload to its content-addressed key (identical bytes if it exists)"""
+    await get_storage().put(upload_key(stored.path), stored.partial_path, sha256=stored.sha256)
+
+
+async def discard_upload(stored: StoredUpload):
+    """Drop a streamed upload that was not placed"""
+    try:
+        await run_in_threadpool(os.remove, stored.partial_path)
+    except FileNotFoundError:
+        pass
+
+
+async def save_upload(file: Optional[UploadFile]) -> Optional[StoredUpload]:
+    """
+    Stream an upload to a staging file, raising HTTPException
+    (400 or 413) if its content is rejected
+    """
+    if not file or not file.filename:
         return None
 
-    ext = file.filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{ext}"
-    full_path = os.path.join(UPLOAD_DIR, filename)
+    ext = file.filename.rsplit(".", 1)[-1].lower()
+    partial_path = os.path.join(get_storage().staging_dir, f"{uuid.uuid4()}.part")
+
+    digest = hashlib.sha256()
+    size = 0
+    mime_type = None
+    buffer = await run_in_threadpool(open, partial_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            if size == 0:
+                is_valid, error_msg, mime_type = validate_file_content(chunk)
+                if not is_valid:
+                    raise HTTPException(status_code=400, detail=error_msg)
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                logger.warning(f"Blocked file upload exceeding size limit: {size}+ bytes")
+                raise HTTPException(status_code=413, detail="File too large. Maximum size is 10MB.")
+            await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail="File is empty")
 
-    with open(full_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+        await run_in_threadpool(buffer.close)
+    except BaseException:
+        await run_in_threadpool(_discard, buffer, partial_path)
+        raise
 
-    return f"/uploads/{filename}"
\ No newline at end of file
+    sha256 = digest.hexdigest()
+    return StoredUpload(
+        path=f"/uploads/{sha256}.{ext}", size=size, sha256=sha256, mime_type=mime_type, partial_path=partial_path
+    )
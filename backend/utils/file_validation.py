@@ -1,4 +1,5 @@
 from fastapi import HTTPException, UploadFile
+from typing import Optional
 import os
 import magic  # Install: pip install python-magic
 import logging
@@ -34,7 +35,8 @@ MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
 def validate_file(file: UploadFile) -> tuple[bool, str]:
     """
-    Validate uploaded file
+    Validate an uploaded file's name before it is read. Size and content
+    are checked while it streams to disk (utils/file.save_upload).
     Returns: (is_valid, error_message)
     """
     if not file or not file.filename:
@@ -46,33 +48,27 @@ def validate_file(file: UploadFile) -> tuple[bool, str]:
         logger.warning(f"Blocked file upload with extension: {file_ext}")
         return False, f"File type .{file_ext} is not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
     
-    # Check file size
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset to start
-    
-    if file_size > MAX_FILE_SIZE:
-        logger.warning(f"Blocked file upload exceeding size limit: {file_size} bytes")
-        return False, f"File size ({file_size / 1024 / 1024:.2f}MB) exceeds limit of 10MB"
-    
-    if file_size == 0:
-        return False, "File is empty"
-    
+    return True, ""
+
+
+def validate_file_content(head: bytes) -> tuple[bool, str, Optional[str]]:
+    """
+    Check the MIME type sniffed from the first bytes of an upload
+    Returns: (is_valid, error_message, mime_type)
+    """
     # Check MIME type (if python-magic is available)
     try:
-        file_content = file.file.read(2048)  # Read first 2KB
-        file.file.seek(0)  # Reset
-        
-        mime = magic.from_buffer(file_content, mime=True)
-        
-        if mime not in ALLOWED_MIME_TYPES:
-            logger.warning(f"Blocked file upload with MIME type: {mime}")
-            return False, f"File type {mime} is not allowed"
+        mime = magic.from_buffer(head[:2048], mime=True)  # First 2KB
     except Exception as e:
         logger.warning(f"Could not validate MIME type: {e}")
         # Continue without MIME validation if library not available
+        return True, "", None
     
-    return True, ""
+    if mime not in ALLOWED_MIME_TYPES:
+        logger.warning(f"Blocked file upload with MIME type: {mime}")
+        return False, f"File type {mime} is not allowed", mime
+    
+    return True, "", mime
 
 
 def sanitize_filename(filename: str) -> str:
@@ -0,0 +1,155 @@
+# utils/item_search.py
+"""
+Full-text search over items.
+
+On SQLite builds with FTS5 an `items_fts` virtual table mirrors each item's
+name, notes, document number and dynamic field values. Triggers on `items`
+keep it in sync for every write path, so routes never have to touch it.
+Other databases (or SQLite without FTS5) fall back to ILIKE filters.
+"""
+import logging
+import re
+import weakref
+from typing import Union
+
+from sqlalchemy import Float, Integer, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.item import Item
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "items_fts"
+
+# Engines whose database has a usable, populated items_fts table
+_fts_engines: "weakref.WeakKeyDictionary[Engine, bool]" = weakref.WeakKeyDictionary()
+
+# Scalar values of the top-level dynamic fields, space separated
+_DYNAMIC_VALUES = """
+    CASE WHEN json_valid({row}.dynamic_fields) THEN (
+        SELECT group_concat(value, ' ') FROM json_each({row}.dynamic_fields)
+        WHERE type IN ('text', 'integer', 'real')
+    ) END
+"""
+
+_INSERT_ROW = f"""
+    INSERT INTO {FTS_TABLE}(rowid, name, notes, document_number, dynamic_values)
+    VALUES (new.id, new.name, new.notes, new.document_number, {_DYNAMIC_VALUES.format(row="new")});
+"""
+
+FTS_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, notes, document_number, dynamic_values,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS items_fts_after_insert AFTER INSERT ON items BEGIN
+        {_INSERT_ROW}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS items_fts_after_delete AFTER DELETE ON items BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS items_fts_after_update
+    AFTER UPDATE OF name, notes, document_number, dynamic_fields ON items BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        {_INSERT_ROW}
+    END
+    """,
+]
+
+REBUILD_SQL = f"""
+    INSERT INTO {FTS_TABLE}(rowid, name, notes, document_number, dynamic_values)
+    SELECT items.id, items.name, items.notes, items.document_number, {_DYNAMIC_VALUES.format(row="items")}
+    FROM items
+"""
+
+# Column weights for bm25(): name matches rank above notes and dynamic values
+_BM25_WEIGHTS = "10.0, 2.0, 5.0, 1.0"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_fulltext_index(engine: Engine) -> bool:
+    """
+    Create the FTS5 table and sync triggers if the database supports them,
+    backfilling existing items on first creation. Returns True when enabled.
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE}
+            ).first()
+            for statement in FTS_SCHEMA:
+                conn.execute(text(statement))
+            if not exists:
+                conn.execute(text(REBUILD_SQL))
+    except OperationalError as e:
+        logger.warning(f"⚠️ Full-text search unavailable, using ILIKE fallback: {e}")
+        return False
+
+    _fts_engines[engine] = True
+    return True
+
+
+def register_fulltext_engine(engine: Engine):
+    """Mark another engine on an already indexed database (e.g. the async engine's sync_engine)"""
+    _fts_engines[engine] = True
+
+
+def rebuild_fulltext_index(engine: Engine):
+    """Repopulate items_fts from scratch (e.g. after bulk imports with triggers disabled)"""
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        conn.execute(text(REBUILD_SQL))
+
+
+def fulltext_enabled(session: Union[Session, AsyncSession]) -> bool:
+    # AsyncSession.get_bind() returns the sync Engine behind the AsyncEngine
+    return _fts_engines.get(session.get_bind(), False)
+
+
+def build_match_query(term: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match, each as a
+    quoted prefix so FTS operators in user input are treated literally.
+    """
+    tokens = _TOKEN_RE.findall(term)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def fulltext_matches(match_query: str):
+    """Subquery of (rowid, rank) for items matching an FTS5 query, best first"""
+    return (
+        text(
+            f"SELECT rowid AS item_id, bm25({FTS_TABLE}, {_BM25_WEIGHTS}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match_query"
+        )
+        .bindparams(match_query=match_query)
+        .columns(item_id=Integer, rank=Float)
+        .subquery("fts")
+    )
+
+
+def ilike_filter(term: str):
+    """Portable substring match used when FTS5 is not available"""
+    pattern = f"%{term}%"
+    return or_(
+        Item.name.ilike(pattern),
+        Item.notes.ilike(pattern),
+        Item.document_number.ilike(pattern),
+        Item.dynamic_fields.ilike(pattern)
+    )
@@ -0,0 +1,132 @@
+# utils/item_stats.py
+"""
+Dashboard statistics for a user's items.
+
+The whole /items/stats payload comes from one conditional-aggregation query
+grouped by category (overall totals are the sum of the groups). Results are
+cached per user for the current day and invalidated by every item write.
+"""
+import os
+import time
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case
+from sqlmodel import Session, select, func
+
+from models.item import Item
+from utils import metrics
+from utils.cache import TTLCache
+
+STATS_CACHE_TTL = int(os.getenv("STATS_CACHE_TTL", "300"))
+STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", "10000"))
+
+_cache = TTLCache(maxsize=STATS_CACHE_SIZE, ttl=STATS_CACHE_TTL)
+_query_timer = metrics.Timer()
+
+COUNTERS = (
+    "total_items",
+    "active_subscriptions",
+    "expiring_soon",
+    "expiring_this_week",
+    "expired",
+    "documents",
+    "subscriptions",
+    "subscriptions_renewing_week",
+    "items_added_this_month",
+    "items_expiring_this_month",
+)
+
+
+def _count_if(condition):
+    return func.sum(case((condition, 1), else_=0))
+
+
+def _stats_query(user_id: int, today: date, now: datetime):
+    expiry = Item.effective_expiry_date
+    seven_days_future = today + timedelta(days=7)
+    thirty_days_future = today + timedelta(days=30)
+    thirty_days_past = now - timedelta(days=30)
+    _, last_day = monthrange(today.year, today.month)
+    month_start = date(today.year, today.month, 1)
+    month_end = date(today.year, today.month, last_day)
+    is_subscription = Item.type == "subscription"
+
+    return (
+        select(
+            Item.category,
+            func.count(Item.id),
+            _count_if(is_subscription & (Item.billing_cycle.isnot(None) | Item.renewal_date.isnot(None))),
+            _count_if((expiry >= today) & (expiry <= thirty_days_future)),
+            _count_if((expiry >= today) & (expiry <= seven_days_future)),
+            _count_if(expiry < today),
+            _count_if(Item.type == "document"),
+            _count_if(is_subscription),
+            _count_if(is_subscription & (expiry >= today) & (expiry <= seven_days_future)),
+            _count_if(Item.created_at >= thirty_days_past),
+            _count_if((expiry >= month_start) & (expiry <= month_end)),
+        )
+        .where(Item.user_id == user_id)
+        .group_by(Item.category)
+    )
+
+
+def compute_item_stats(session: Session, user_id: int, today: Optional[date] = None, now: Optional[datetime] = None) -> dict:
+    """Run the single aggregate query and shape the /items/stats payload"""
+    today = today or date.today()
+    now = now or datetime.utcnow()
+
+    started = time.perf_counter()
+    rows = session.exec(_stats_query(user_id, today, now)).all()
+    _query_timer.observe(time.perf_counter() - started)
+
+    totals = dict.fromkeys(COUNTERS, 0)
+    by_category = {}
+    for category, *counts in rows:
+        by_category[category] = counts[0]
+        for name, value in zip(COUNTERS, counts):
+            totals[name] += value or 0
+
+    return {
+        "total_items": totals["total_items"],
+        "active_subscriptions": totals["active_subscriptions"],
+        "expiring_soon": totals["expiring_soon"],
+        "expiring_this_week": totals["expiring_this_week"],
+        "expired": totals["expired"],
+        "documents": totals["documents"],
+        "subscriptions": totals["subscriptions"],
+        "by_category": by_category,
+        "activity_summaries": {
+            "items_added_this_month": totals["items_added_this_month"],
+            "items_expiring_this_month": totals["items_expiring_this_month"],
+            "items_expiring_this_week": totals["expiring_this_week"],
+            "expired_items": totals["expired"],
+            "subscriptions_renewing_week": totals["subscriptions_renewing_week"],
+            "documents_total": totals["documents"]
+        }
+    }
+
+
+def get_item_stats_cached(session: Session, user_id: int) -> dict:
+    """Serve stats from the per-user cache; entries from a previous day are stale"""
+    today = date.today()
+    cached = _cache.get(user_id)
+    if cached is not None and cached[0] == today:
+        return cached[1]
+
+    result = compute_item_stats(session, user_id, today=today)
+    _cache.set(user_id, (today, result))
+    return result
+
+
+def invalidate_item_stats(user_id: int):
+    """Drop a user's cached stats; call after any item create/update/delete"""
+    _cache.invalidate(user_id)
+
+
+def stats_metrics() -> dict:
+    return {"cache": _cache.stats(), "query": _query_timer.stats()}
+
+
+metrics.register("item_stats", stats_metrics)
@@ -0,0 +1,211 @@
+# utils/item_type_catalog.py
+"""
+In-process catalog of item types for the /item-types routes.
+
+Item types are seeded by migrations and almost never change, so each worker
+loads them once into an immutable snapshot:
+
+- fields_config is parsed once per type
+- each answer is serialized once to JSON bytes, with a strong ETag of its
+  content: the full list, every category / item_class filter
+  (precomputed indexes, including both filters combined), every type by
+  id, and the categories summary
+
+A request does no query and no JSON work, and a matching If-None-Match gets
+304.
+
+Every committed ORM write to an ItemType bumps a version counter
+(SQLAlchemy mapper and session events), so the next request loads a new
+snapshot. invalidate_item_type_catalog() does the same for other kinds of
+write. Writes from other processes, such as migrations and init_db.py, are
+picked up once a snapshot is ITEM_TYPE_CATALOG_TTL seconds old. ETags come
+from content rather than the version, so every worker gives the same
+catalog the same ETag.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session as OrmSession, object_session
+from sqlmodel import Session, select
+
+from models.item_type import ItemType
+from utils import metrics
+
+ITEM_TYPE_CATALOG_TTL = int(os.getenv("ITEM_TYPE_CATALOG_TTL", "300"))
+
+_CHANGED = "item_types_changed"
+
+_lock = threading.Lock()
+_version = 0
+_catalog: Optional["ItemTypeCatalog"] = None
+_build_timer = metrics.Timer()
+_counters = {"hits": 0, "loads": 0, "not_modified": 0}
+
+
+@dataclass(frozen=True)
+class CatalogBody:
+    """A pre-serialized JSON answer and its ETag"""
+    body: bytes
+    etag: str
+
+
+def _body(payload) -> CatalogBody:
+    # Same encoding as FastAPI's JSONResponse
+    body = json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    return CatalogBody(body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+def item_type_dict(item_type: ItemType) -> dict:
+    return {
+        "id": item_type.id,
+        "name": item_type.name,
+        "category": item_type.category,
+        "item_class": item_type.item_class,
+        "description": item_type.description,
+        "icon": item_type.icon,
+        "fields": item_type.get_fields(),
+        "is_active": item_type.is_active,
+        "created_at": item_type.created_at.isoformat() if item_type.created_at else None
+    }
+
+
+def _list_body(entries: list[dict]) -> CatalogBody:
+    return _body({"item_types": entries, "total": len(entries)})
+
+
+class ItemTypeCatalog:
+    """Immutable snapshot of the item types, with every answer pre-serialized"""
+
+    def __init__(self, item_types: list[ItemType], version: int):
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+        entries = [item_type_dict(item_type) for item_type in item_types]
+        active = sorted((e for e in entries if e["is_active"]), key=lambda e: (e["category"], e["name"]))
+        self.size = len(entries)
+
+        # (category, item_class) -> active types, None matching any
+        groups: dict[tuple, list[dict]] = {}
+        for entry in active:
+            for key in (
+                (None, None),
+                (entry["category"], None),
+                (None, entry["item_class"]),
+                (entry["category"], entry["item_class"]),
+            ):
+                groups.setdefault(key, []).append(entry)
+        groups.setdefault((None, None), [])
+        self._lists = {key: _list_body(group) for key, group in groups.items()}
+        self._empty = _list_body([])
+
+        self._by_id = {entry["id"]: _body(entry) for entry in entries}
+
+        categories = {}
+        for category, item_class in {(e["category"], e["item_class"]) for e in active}:
+            counts = categories.setdefault(category, {"documents": 0, "subscriptions": 0})
+            if item_class == "document":
+                counts["documents"] += 1
+            elif item_class == "subscription":
+                counts["subscriptions"] += 1
+        self.categories = _body({"categories": categories})
+
+    def is_current(self) -> bool:
+        return self.version == _version and time.monotonic() - self.loaded_at < ITEM_TYPE_CATALOG_TTL
+
+    def list(self, category: Optional[str] = None, item_class: Optional[str] = None) -> CatalogBody:
+        """Active types, optionally filtered, ordered by category and name"""
+        return self._lists.get((category or None, item_class or None), self._empty)
+
+    def get(self, item_type_id: int) -> Optional[CatalogBody]:
+        return self._by_id.get(item_type_id)
+
+
+def _default_engine() -> Engine:
+    from database import engine
+    return engine
+
+
+def cached_catalog() -> Optional[ItemTypeCatalog]:
+    """The current snapshot, or None when it has to be (re)loaded"""
+    catalog = _catalog
+    if catalog is None or not catalog.is_current():
+        return None
+    with _lock:
+        _counters["hits"] += 1
+    return catalog
+
+
+def get_catalog(engine: Optional[Engine] = None) -> ItemTypeCatalog:
+    """The current snapshot, loading it (one query) when missing or stale"""
+    global _catalog
+    catalog = cached_catalog()
+    if catalog is not None:
+        return catalog
+
+    with _lock:
+        if _catalog is not None and _catalog.is_current():
+            return _catalog
+        # Read before the query: a write committed during the load bumps it again
+        version = _version
+        started = time.perf_counter()
+        with Session(engine or _default_engine()) as session:
+            item_types = session.exec(select(ItemType)).all()
+            _catalog = ItemTypeCatalog(item_types, version)
+        _build_timer.observe(time.perf_counter() - started)
+        _counters["loads"] += 1
+        return _catalog
+
+
+def invalidate_item_type_catalog():
+    """Make the next request load a new snapshot; call after writing item types"""
+    global _version
+    with _lock:
+        _version += 1
+
+
+def count_not_modified():
+    with _lock:
+        _counters["not_modified"] += 1
+
+
+@event.listens_for(ItemType, "after_insert")
+@event.listens_for(ItemType, "after_update")
+@event.listens_for(ItemType, "after_delete")
+def _note_item_type_write(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[_CHANGED] = True
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop(_CHANGED, False):
+        invalidate_item_type_catalog()
+
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _forget_rolled_back_writes(session, previous_transaction):
+    session.info.pop(_CHANGED, None)
+
+
+def catalog_metrics() -> dict:
+    catalog = _catalog
+    with _lock:
+        counters = dict(_counters)
+    return {
+        "version": _version,
+        "item_types": catalog.size if catalog else 0,
+        "age_seconds": round(time.monotonic() - catalog.loaded_at, 1) if catalog else None,
+        "load": _build_timer.stats(),
+        **counters,
+    }
+
+
+metrics.register("item_type_catalog", catalog_metrics)
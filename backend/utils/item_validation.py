@@ -1,5 +1,10 @@
+import json
+from typing import Optional
+
 from fastapi import HTTPException
 
+from utils.reminder_schedule import clean_reminder_offsets
+
 ALLOWED_CATEGORIES = [
     "Travel", "Health", "Finance", "Work", "Personal",
     "Subscriptions", "Legal", "Education", "Vehicle"
@@ -20,3 +25,19 @@ def validate_item_fields(name: str, item_type: str, category: str) -> None:
             status_code=422,
             detail=f"Invalid category '{category}'. Must be one of: {ALLOWED_CATEGORIES}"
         )
+
+def validate_reminder_offsets(value: Optional[str]) -> Optional[str]:
+    """
+    Validate reminder offsets given as a JSON list of days before expiry,
+    raising HTTPException on failure. Returns them normalized (deduplicated,
+    largest first), or None when unset or empty.
+    """
+    if value is None or not value.strip():
+        return None
+    try:
+        offsets = clean_reminder_offsets(json.loads(value))
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=422, detail="Reminder offsets must be a JSON list, e.g. [30, 7, 1].")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"{e}.")
+    return json.dumps(offsets) if offsets else None
@@ -0,0 +1,199 @@
+# utils/local_s3.py
+"""
+Local S3-compatible stand-in for tests and development.
+
+A minimal path-style object server (PUT, GET with Range, HEAD, DELETE on
+/<bucket>/<key>) that keeps every object in memory. Point the storage
+backend at it with
+
+    STORAGE_BACKEND=s3 S3_ENDPOINT_URL=http://127.0.0.1:9000 S3_BUCKET=uploads
+
+and run it with `python -m utils.local_s3 --port 9000`, or start one
+in-process from a test:
+
+    with LocalS3Server() as server:
+        ...  # server.endpoint_url, server.objects
+
+Signatures are not verified. With `access_key` set, a request must carry an
+AWS4-HMAC-SHA256 Authorization header for that key, or it gets 403.
+`requests` counts the requests served per method.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class _S3Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _reply(self, status: int, body: bytes = b"", headers: Optional[dict] = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _error(self, status: int, code: str):
+        self._reply(status, f"<Error><Code>{code}</Code></Error>".encode(), {"Content-Type": "application/xml"})
+
+    def _object(self) -> Optional[tuple[str, str]]:
+        """(bucket, key) of the request, after checking its credentials"""
+        owner = self.server.owner
+        owner._count(self.command)
+        authorization = self.headers.get("Authorization", "")
+        if owner.access_key and not authorization.startswith(
+            f"AWS4-HMAC-SHA256 Credential={owner.access_key}/"
+        ):
+            self._error(403, "AccessDenied")
+            return None
+        bucket, _, key = unquote(self.path.split("?", 1)[0]).lstrip("/").partition("/")
+        if not bucket or not key:
+            self._error(400, "InvalidRequest")
+            return None
+        return bucket, key
+
+    def do_PUT(self):
+        address = self._object()
+        if address is None:
+            return
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self._error(411, "MissingContentLength")
+            return
+        body = self.rfile.read(int(length))
+        self.server.owner._store(address, body)
+        self._reply(200, headers={"ETag": f'"{len(body)}"'})
+
+    def do_GET(self):
+        address = self._object()
+        if address is None:
+            return
+        data = self.server.owner.objects.get(address)
+        if data is None:
+            self._error(404, "NoSuchKey")
+            return
+
+        match = _RANGE.match(self.headers.get("Range", ""))
+        if not match:
+            self._reply(200, data, {"Accept-Ranges": "bytes"})
+            return
+        start, end = match.groups()
+        if start:
+            start, end = int(start), min(int(end) if end else len(data) - 1, len(data) - 1)
+        else:
+            start, end = max(len(data) - int(end), 0), len(data) - 1
+        if start >= len(data) or start > end:
+            self._reply(416, headers={"Content-Range": f"bytes */{len(data)}"})
+            return
+        self._reply(206, data[start:end + 1], {"Content-Range": f"bytes {start}-{end}/{len(data)}"})
+
+    def do_HEAD(self):
+        address = self._object()
+        if address is None:
+            return
+        data = self.server.owner.objects.get(address)
+        if data is None:
+            self._reply(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+
+    def do_DELETE(self):
+        address = self._object()
+        if address is None:
+            return
+        self.server.owner._remove(address)
+        self._reply(204)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    owner: "LocalS3Server"
+
+
+class LocalS3Server:
+    """In-process S3 stand-in that keeps objects in memory"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, access_key: str = ""):
+        self.host = host
+        self.port = port
+        self.access_key = access_key
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def endpoint_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _count(self, method: str):
+        with self._lock:
+            self.requests[method] += 1
+
+    def _store(self, address: tuple[str, str], data: bytes):
+        with self._lock:
+            self.objects[address] = data
+        logger.info(f"📦 Local S3 stored {address[0]}/{address[1]} ({len(data)} bytes)")
+
+    def _remove(self, address: tuple[str, str]):
+        with self._lock:
+            self.objects.pop(address, None)
+
+    def start(self) -> "LocalS3Server":
+        self._server = _Server((self.host, self.port), _S3Handler)
+        self._server.owner = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-s3", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self) -> "LocalS3Server":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local S3 stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--access-key", default="")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = LocalS3Server(args.host, args.port, args.access_key).start()
+    print(f"✅ Local S3 listening on {server.endpoint_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,166 @@
+# utils/local_smtp.py
+"""
+Local SMTP stand-in for tests and development.
+
+A minimal plain-text SMTP server (no TLS, no auth) that keeps every message
+it accepts in memory. Point the relay at it with
+
+    SMTP_RELAY_HOST=127.0.0.1 SMTP_RELAY_PORT=1025 SMTP_RELAY_STARTTLS=false
+
+and run it with `python -m utils.local_smtp --port 1025`, or start one
+in-process from a test:
+
+    with LocalSMTPServer() as server:
+        ...  # server.port, server.messages
+
+`fail_next` makes the next N transactions fail with a temporary 451 error,
+`delay_seconds` stalls each reply and `connect_delay_seconds` stalls the
+greeting (standing in for TCP + TLS setup to a remote relay), to exercise
+retries, slow relays and connection reuse. `connections` counts the
+sessions opened so far.
+"""
+import email
+import logging
+import socketserver
+import threading
+import time
+from email.message import Message
+
+logger = logging.getLogger(__name__)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def _reply(self, line: str):
+        if self.server.owner.delay_seconds:
+            time.sleep(self.server.owner.delay_seconds)
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        owner = self.server.owner
+        owner._connected()
+        if owner.connect_delay_seconds:
+            time.sleep(owner.connect_delay_seconds)
+        self._reply("220 localhost Remindes local SMTP")
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb == "EHLO":
+                self.wfile.write(b"250-localhost\r\n250 8BITMIME\r\n")
+            elif verb in ("HELO", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "MAIL":
+                if owner._take_failure():
+                    self._reply("451 4.3.0 Temporary local failure")
+                else:
+                    self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                owner._store(self._read_data())
+                self._reply("250 OK: queued")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+    def _read_data(self) -> bytes:
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return b"".join(lines)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    owner: "LocalSMTPServer"
+
+
+class LocalSMTPServer:
+    """In-process SMTP server that records the messages it receives"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        fail_next: int = 0,
+        delay_seconds: float = 0.0,
+        connect_delay_seconds: float = 0.0,
+    ):
+        self.host = host
+        self.port = port
+        self.fail_next = fail_next
+        self.delay_seconds = delay_seconds
+        self.connect_delay_seconds = connect_delay_seconds
+        self.connections = 0
+        self.messages: list[Message] = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def _connected(self):
+        with self._lock:
+            self.connections += 1
+
+    def _take_failure(self) -> bool:
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return True
+            return False
+
+    def _store(self, data: bytes):
+        message = email.message_from_bytes(data)
+        with self._lock:
+            self.messages.append(message)
+        logger.info(f"📨 Local SMTP received '{message['Subject']}' for {message['To']}")
+
+    def start(self) -> "LocalSMTPServer":
+        self._server = _Server((self.host, self.port), _SMTPHandler)
+        self._server.owner = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-smtp", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self) -> "LocalSMTPServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local SMTP stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = LocalSMTPServer(args.host, args.port).start()
+    print(f"✅ Local SMTP listening on {args.host}:{server.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
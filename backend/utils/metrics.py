@@ -0,0 +1,113 @@
+# utils/metrics.py
+"""
+Process-local metrics registry.
+
+Subsystems register a provider that returns a JSON-serialisable dict when
+their module is imported; main.py loads PROVIDER_MODULES at startup and the
+admin-only /metrics endpoint snapshots every provider on request. Providers
+that count table rows wrap the query in Sampled, so a scrape runs it at most
+once per METRICS_SAMPLE_SECONDS.
+"""
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+METRICS_SAMPLE_SECONDS = float(os.getenv("METRICS_SAMPLE_SECONDS", "60"))
+
+PROVIDER_MODULES = (
+    "utils.blob_store",
+    "utils.email_outbox",
+    "utils.email_templates",
+    "utils.expiry_sweep",
+    "utils.item_stats",
+    "utils.item_type_catalog",
+    "utils.notification_retention",
+    "utils.notification_scheduler",
+    "utils.principal",
+    "utils.smtp_relay",
+    "utils.thumbnails",
+    "utils.unread_counts",
+)
+
+_providers: dict[str, Callable[[], dict]] = {}
+
+
+def load_providers():
+    """Import every module in PROVIDER_MODULES, registering its provider"""
+    for module in PROVIDER_MODULES:
+        importlib.import_module(module)
+
+
+def register(name: str, provider: Callable[[], dict]):
+    """Register (or replace) the metrics provider for a subsystem"""
+    _providers[name] = provider
+
+
+def snapshot() -> dict:
+    """Collect the current metrics of every registered subsystem"""
+    result = {}
+    for name, provider in sorted(_providers.items()):
+        try:
+            result[name] = provider()
+        except Exception as e:
+            logger.error(f"Metrics provider '{name}' failed: {e}")
+            result[name] = {"error": str(e)}
+    return result
+
+
+class Sampled:
+    """
+    Memoizes an expensive query (table COUNTs, GROUP BYs) for `ttl` seconds;
+    concurrent callers wait for one run instead of querying side by side
+    """
+
+    def __init__(self, query: Callable[[], Any], ttl: float | None = None):
+        self.query = query
+        self.ttl = METRICS_SAMPLE_SECONDS if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._taken: float | None = None
+
+    def __call__(self) -> Any:
+        with self._lock:
+            if self._taken is None or time.monotonic() - self._taken >= self.ttl:
+                self._value = self.query()
+                self._taken = time.monotonic()
+            return self._value
+
+    def clear(self):
+        with self._lock:
+            self._taken = None
+
+
+class Timer:
+    """Accumulates call counts and durations (milliseconds)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            self.last_ms = ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+                "max_ms": round(self.max_ms, 3),
+                "last_ms": round(self.last_ms, 3),
+            }
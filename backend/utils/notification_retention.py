@@ -0,0 +1,167 @@
+# utils/notification_retention.py
+"""
+Retention policy for the notifications table.
+
+Read notifications older than NOTIFICATION_RETENTION_DAYS are either moved to
+notifications_archive ("archive") or dropped ("delete"), in id-ordered
+batches that each commit on their own so the job never holds a long write
+lock. Unread notifications are never touched.
+
+Run it from cron with `python -m utils.notification_retention`.
+"""
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import DateTime, delete, insert, literal
+from sqlmodel import Session, select, func
+
+from models.notification import Notification, NotificationArchive
+from utils import metrics
+from utils.expiry_sweep import EXPIRED_WINDOW
+from utils.unread_counts import invalidate_unread_count
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+NOTIFICATION_RETENTION_MODE = os.getenv("NOTIFICATION_RETENTION_MODE", "archive")
+NOTIFICATION_RETENTION_BATCH = int(os.getenv("NOTIFICATION_RETENTION_BATCH", "1000"))
+
+RETENTION_MODES = ("archive", "delete")
+
+# notifications column -> notifications_archive column
+_ARCHIVED_COLUMNS = {
+    "id": "notification_id",
+    "user_id": "user_id",
+    "item_id": "item_id",
+    "title": "title",
+    "message": "message",
+    "notification_type": "notification_type",
+    "is_read": "is_read",
+    "is_sent_via_email": "is_sent_via_email",
+    "created_at": "created_at",
+    "read_at": "read_at",
+}
+
+_totals = {"runs": 0, "rows": 0, "seconds": 0.0}
+_last_report: Optional["RetentionReport"] = None
+
+
+@dataclass
+class RetentionReport:
+    mode: str
+    cutoff: datetime
+    batches: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "cutoff": self.cutoff.isoformat(),
+            "batches": self.batches,
+            "rows": self.rows,
+            "seconds": round(self.seconds, 4),
+            "rows_per_second": round(self.rows / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+
+def run_notification_retention(
+    session: Session,
+    retention_days: int = NOTIFICATION_RETENTION_DAYS,
+    mode: str = NOTIFICATION_RETENTION_MODE,
+    batch_size: int = NOTIFICATION_RETENTION_BATCH,
+    now: Optional[datetime] = None,
+) -> RetentionReport:
+    """Archive or delete read notifications older than retention_days"""
+    global _last_report
+
+    if mode not in RETENTION_MODES:
+        raise ValueError(f"❌ Invalid retention mode '{mode}'. Must be one of {RETENTION_MODES}")
+    # Keep notifications (and their dedup keys) past the weekly expiry notice
+    if timedelta(days=retention_days) <= EXPIRED_WINDOW:
+        raise ValueError(f"❌ Retention must be longer than {EXPIRED_WINDOW.days} days")
+
+    report = RetentionReport(mode=mode, cutoff=(now or datetime.utcnow()) - timedelta(days=retention_days))
+    started = time.perf_counter()
+    last_id = 0
+
+    while True:
+        rows = session.exec(
+            select(Notification.id, Notification.user_id)
+            .where(
+                Notification.is_read == True,
+                Notification.created_at < report.cutoff,
+                Notification.id > last_id
+            )
+            .order_by(Notification.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        ids = [row[0] for row in rows]
+        last_id = ids[-1]
+
+        if mode == "archive":
+            columns = [getattr(Notification, name) for name in _ARCHIVED_COLUMNS]
+            archived_at = literal(datetime.utcnow(), DateTime)
+            session.exec(
+                insert(NotificationArchive).from_select(
+                    [*_ARCHIVED_COLUMNS.values(), "archived_at"],
+                    select(*columns, archived_at).where(Notification.id.in_(ids))
+                )
+            )
+        session.exec(delete(Notification).where(Notification.id.in_(ids)))
+        session.commit()
+
+        report.batches += 1
+        report.rows += len(ids)
+        for user_id in {row[1] for row in rows}:
+            invalidate_unread_count(user_id)
+
+    report.seconds = time.perf_counter() - started
+    _totals["runs"] += 1
+    _totals["rows"] += report.rows
+    _totals["seconds"] += report.seconds
+    _last_report = report
+
+    logger.info(f"✅ Notification retention: {report.as_dict()}")
+    return report
+
+
+def _count_table_rows() -> dict:
+    from database import engine
+
+    with Session(engine) as session:
+        return {
+            "notifications": session.exec(select(func.count()).select_from(Notification)).one(),
+            "notifications_archive": session.exec(select(func.count()).select_from(NotificationArchive)).one(),
+        }
+
+
+_table_rows = metrics.Sampled(_count_table_rows)
+
+
+def retention_metrics() -> dict:
+    return {
+        "table_rows": _table_rows(),
+        "runs": _totals["runs"],
+        "rows_processed": _totals["rows"],
+        "rows_per_second": round(_totals["rows"] / _totals["seconds"], 1) if _totals["seconds"] else 0.0,
+        "last_run": _last_report.as_dict() if _last_report else None,
+    }
+
+
+metrics.register("notification_retention", retention_metrics)
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    with Session(engine) as session:
+        print(run_notification_retention(session).as_dict())
@@ -0,0 +1,381 @@
+# utils/notification_scheduler.py
+"""
+Timezone-aware, sharded scheduler for the expiry sweep.
+
+Users are grouped into buckets by the current UTC offset of their
+User.timezone (unknown names count as UTC), and each bucket is swept once
+per local date, as soon as its local time reaches
+NOTIFICATION_SCHEDULER_SEND_HOUR. Each bucket is split into
+NOTIFICATION_SCHEDULER_SHARDS shards (user_id % shards).
+
+sweep_shard_runs is both the work queue and the lease:
+
+1. schedule - every tick inserts a "pending" row per (local date, offset,
+   shard) that is due. The unique key makes concurrent schedulers harmless.
+2. claim    - one UPDATE ... RETURNING leases a pending row (or one whose
+   lease expired) to this worker for NOTIFICATION_SCHEDULER_LEASE_SECONDS,
+   so only one worker across all threads and processes sweeps a shard.
+3. run      - run_expiry_sweep() limited to the shard's users, with their
+   local date as "today"; the row is then marked "done" or "failed".
+
+Workers run in-process (started with the app, NOTIFICATION_SCHEDULER_WORKERS=0
+disables them) or standalone with `python -m utils.notification_scheduler`.
+POST /notifications/check-expiring (admins only) queues every bucket now.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, func
+
+from models.sweep_run import SweepShardRun
+from models.user import User
+from utils import metrics
+from utils.dates import resolve_timezone
+from utils.expiry_sweep import run_expiry_sweep
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_SCHEDULER_WORKERS = int(os.getenv("NOTIFICATION_SCHEDULER_WORKERS", "2"))
+NOTIFICATION_SCHEDULER_SHARDS = int(os.getenv("NOTIFICATION_SCHEDULER_SHARDS", "4"))
+NOTIFICATION_SCHEDULER_SEND_HOUR = int(os.getenv("NOTIFICATION_SCHEDULER_SEND_HOUR", "8"))
+NOTIFICATION_SCHEDULER_POLL_SECONDS = float(os.getenv("NOTIFICATION_SCHEDULER_POLL_SECONDS", "60"))
+NOTIFICATION_SCHEDULER_LEASE_SECONDS = float(os.getenv("NOTIFICATION_SCHEDULER_LEASE_SECONDS", "900"))
+
+RUN_STATUSES = ("pending", "running", "done", "failed")
+
+_run_timer = metrics.Timer()
+_counters_lock = threading.Lock()
+_counters = {"scheduled": 0, "claimed": 0, "done": 0, "failed": 0}
+_scheduler: Optional["SchedulerWorkerPool"] = None
+
+
+def _count(name: str, n: int = 1):
+    with _counters_lock:
+        _counters[name] += n
+
+
+def _default_engine() -> Engine:
+    from database import engine
+    return engine
+
+
+def utc_offset_minutes(name: Optional[str], now: datetime) -> int:
+    """Current UTC offset of a timezone, `now` being naive UTC"""
+    offset = now.replace(tzinfo=timezone.utc).astimezone(resolve_timezone(name)).utcoffset()
+    return int(offset.total_seconds() // 60)
+
+
+def bucket_label(offset_minutes: int) -> str:
+    hours, minutes = divmod(abs(offset_minutes), 60)
+    return f"UTC{'-' if offset_minutes < 0 else '+'}{hours:02d}:{minutes:02d}"
+
+
+def timezone_buckets(session: Session, now: datetime) -> dict[int, list[Optional[str]]]:
+    """Timezone names of opted-in users, grouped by their current UTC offset"""
+    names = session.exec(
+        select(User.timezone).where(User.email_notifications == True).distinct()
+    ).all()
+    buckets: dict[int, list[Optional[str]]] = {}
+    for name in names:
+        buckets.setdefault(utc_offset_minutes(name, now), []).append(name)
+    return buckets
+
+
+def schedule_due_runs(
+    session: Session,
+    now: Optional[datetime] = None,
+    shard_count: Optional[int] = None,
+    send_hour: Optional[int] = None,
+    force: bool = False,
+) -> int:
+    """
+    Create the pending runs of every bucket whose local time has reached
+    send_hour. With `force` every bucket is due and its finished runs for
+    the local date are queued again. Returns how many runs were queued.
+    """
+    now = now or datetime.utcnow()
+    shard_count = shard_count or NOTIFICATION_SCHEDULER_SHARDS
+    send_hour = NOTIFICATION_SCHEDULER_SEND_HOUR if send_hour is None else send_hour
+    queued = 0
+    for offset in timezone_buckets(session, now):
+        local_now = now + timedelta(minutes=offset)
+        if local_now.hour < send_hour and not force:
+            continue
+        run_date = local_now.date()
+
+        existing = session.exec(
+            select(SweepShardRun.shard, SweepShardRun.status).where(
+                SweepShardRun.run_date == run_date,
+                SweepShardRun.utc_offset_minutes == offset,
+            )
+        ).all()
+        missing = set(range(shard_count)) - {shard for shard, _ in existing}
+        if missing:
+            session.add_all([
+                SweepShardRun(run_date=run_date, utc_offset_minutes=offset, shard=shard, shard_count=shard_count)
+                for shard in sorted(missing)
+            ])
+            try:
+                session.commit()
+                queued += len(missing)
+            except IntegrityError:
+                # Another scheduler queued this bucket first
+                session.rollback()
+
+        if force:
+            queued += session.exec(
+                update(SweepShardRun)
+                .where(
+                    SweepShardRun.run_date == run_date,
+                    SweepShardRun.utc_offset_minutes == offset,
+                    SweepShardRun.status.in_(("done", "failed")),
+                )
+                .values(status="pending", lease_expires_at=None, last_error=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            session.commit()
+
+    if queued:
+        _count("scheduled", queued)
+        logger.info(f"🗓️ Expiry sweep: queued {queued} shard runs")
+    return queued
+
+
+def _claimable(now: datetime):
+    return or_(
+        SweepShardRun.status == "pending",
+        and_(SweepShardRun.status == "running", SweepShardRun.lease_expires_at <= now),
+    )
+
+
+def claim_run(session: Session, owner: str, now: Optional[datetime] = None) -> Optional[SweepShardRun]:
+    """Lease the oldest claimable run to `owner`"""
+    now = now or datetime.utcnow()
+    next_run = (
+        select(SweepShardRun.id)
+        .where(_claimable(now))
+        .order_by(SweepShardRun.run_date, SweepShardRun.id)
+        .limit(1)
+    )
+    claimed_id = session.exec(
+        update(SweepShardRun)
+        .where(SweepShardRun.id == next_run.scalar_subquery())
+        # Re-checked by the UPDATE itself, so a concurrent claimer loses cleanly
+        .where(_claimable(now))
+        .values(
+            status="running",
+            owner=owner,
+            attempts=SweepShardRun.attempts + 1,
+            lease_expires_at=now + timedelta(seconds=NOTIFICATION_SCHEDULER_LEASE_SECONDS),
+            started_at=now,
+        )
+        .returning(SweepShardRun.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    session.commit()
+
+    if claimed_id is None:
+        return None
+    run = session.get(SweepShardRun, claimed_id)
+    session.expunge(run)
+    _count("claimed")
+    return run
+
+
+def _finish(session: Session, run: SweepShardRun, owner: str, **values):
+    # Only the current lease holder records the outcome
+    session.exec(
+        update(SweepShardRun)
+        .where(SweepShardRun.id == run.id, SweepShardRun.owner == owner)
+        .values(finished_at=datetime.utcnow(), lease_expires_at=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+
+
+def run_shard(session: Session, run: SweepShardRun, owner: str) -> bool:
+    """Sweep a claimed run's users; returns whether it succeeded"""
+    label = f"{run.run_date} {bucket_label(run.utc_offset_minutes)} shard {run.shard + 1}/{run.shard_count}"
+    started = time.perf_counter()
+    try:
+        timezones = timezone_buckets(session, datetime.utcnow()).get(run.utc_offset_minutes, [])
+        created = queued = 0
+        if timezones:
+            report = run_expiry_sweep(
+                session,
+                today=run.run_date,
+                timezones=timezones,
+                shard=run.shard,
+                shard_count=run.shard_count,
+            )
+            created, queued = report.notifications_created, report.emails_queued
+    except Exception as e:
+        session.rollback()
+        _finish(session, run, owner, status="failed", last_error=f"{type(e).__name__}: {e}")
+        _count("failed")
+        logger.error(f"❌ Expiry sweep {label} failed: {e}")
+        return False
+
+    _finish(session, run, owner, status="done", notifications_created=created, emails_queued=queued)
+    _run_timer.observe(time.perf_counter() - started)
+    _count("done")
+    logger.info(f"✅ Expiry sweep {label}: {created} notifications, {queued} emails")
+    return True
+
+
+def _owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def run_due_shards(engine: Optional[Engine] = None, now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+    """Queue due runs, then claim and sweep runs until none are left; returns how many ran"""
+    owner = _owner_id()
+    ran = 0
+    with Session(engine or _default_engine()) as session:
+        schedule_due_runs(session, now)
+        while limit is None or ran < limit:
+            run = claim_run(session, owner)
+            if run is None:
+                break
+            run_shard(session, run, owner)
+            ran += 1
+    return ran
+
+
+def enqueue_expiry_sweep(session: Session) -> int:
+    """Queue a sweep of every bucket now, regardless of local time (the admin trigger)"""
+    queued = schedule_due_runs(session, force=True)
+    wake_notification_scheduler()
+    return queued
+
+
+class SchedulerWorkerPool:
+    """Background threads that queue due shard runs and sweep them"""
+
+    def __init__(
+        self,
+        workers: int = NOTIFICATION_SCHEDULER_WORKERS,
+        poll_seconds: float = NOTIFICATION_SCHEDULER_POLL_SECONDS,
+        engine: Optional[Engine] = None,
+    ):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.engine = engine
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"notification-scheduler-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"✅ Notification scheduler: {self.workers} workers started")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                ran = run_due_shards(self.engine, limit=1)
+            except Exception as e:
+                logger.error(f"❌ Notification scheduler error: {e}")
+                ran = 0
+            if not ran:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+
+def start_notification_scheduler(
+    workers: int = NOTIFICATION_SCHEDULER_WORKERS, engine: Optional[Engine] = None
+) -> Optional[SchedulerWorkerPool]:
+    """Start the process-wide scheduler (no-op with NOTIFICATION_SCHEDULER_WORKERS=0)"""
+    global _scheduler
+    if workers <= 0 or (_scheduler and _scheduler.is_running()):
+        return _scheduler
+    _scheduler = SchedulerWorkerPool(workers=workers, engine=engine)
+    _scheduler.start()
+    return _scheduler
+
+
+def stop_notification_scheduler():
+    global _scheduler
+    if _scheduler:
+        _scheduler.stop()
+        _scheduler = None
+
+
+def wake_notification_scheduler():
+    if _scheduler:
+        _scheduler.wake()
+
+
+def _runs_by_status() -> dict:
+    with Session(_default_engine()) as session:
+        return dict(session.exec(
+            select(SweepShardRun.status, func.count()).group_by(SweepShardRun.status)
+        ).all())
+
+
+_sampled_runs = metrics.Sampled(_runs_by_status)
+
+
+def scheduler_metrics() -> dict:
+    by_status = _sampled_runs()
+    with _counters_lock:
+        counters = dict(_counters)
+    return {
+        "runs": {status: by_status.get(status, 0) for status in RUN_STATUSES},
+        "workers": len(_scheduler._threads) if _scheduler else 0,
+        "shards": NOTIFICATION_SCHEDULER_SHARDS,
+        "send_hour": NOTIFICATION_SCHEDULER_SEND_HOUR,
+        "run_latency": _run_timer.stats(),
+        **counters,
+    }
+
+
+metrics.register("notification_scheduler", scheduler_metrics)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the expiry sweep scheduler")
+    parser.add_argument("--once", action="store_true", help="Sweep the runs due now and exit (for cron)")
+    parser.add_argument("--force", action="store_true", help="Queue every timezone bucket now")
+    parser.add_argument("--workers", type=int, default=max(NOTIFICATION_SCHEDULER_WORKERS, 1))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.force:
+        with Session(_default_engine()) as session:
+            enqueue_expiry_sweep(session)
+    if args.once:
+        print(f"✅ Ran {run_due_shards()} shard runs")
+    else:
+        start_notification_scheduler(workers=args.workers)
+        print(f"✅ Notification scheduler running with {args.workers} workers (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            stop_notification_scheduler()
@@ -1,195 +1,90 @@
 # utils/notification_service.py
-from datetime import datetime, timedelta, date
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import func, tuple_, update
 from sqlmodel import Session, select
-from models.item import Item
 from models.notification import Notification
-from models.user import User
-from utils.email_service import send_expiry_notification_email, send_expired_notification_email
+from utils.expiry_sweep import run_expiry_sweep
+from utils.unread_counts import invalidate_unread_count
 
 def check_expiring_items(session: Session):
     """
     Check for items expiring soon and create notifications
     Called by a scheduled job (daily)
     """
-    users = session.exec(select(User).where(User.email_notifications == True)).all()
-    
-    notifications_created = 0
-    emails_sent = 0
-    
-    for user in users:
-        # Find ALL items for this user
-        statement = select(Item).where(Item.user_id == user.id)
-        all_items = session.exec(statement).all()
-        
-        for item in all_items:
-            expiry = item.get_expiry_date()
-            
-            if not expiry:
-                continue  # Skip items without expiry dates
-            
-            # Use item-specific reminder days if set, otherwise fall back to user's default
-            reminder_days = item.reminder_days_before if item.reminder_days_before is not None else user.notification_days_before
-            threshold_date = date.today() + timedelta(days=reminder_days)
-            
-            # Check if expiring soon
-            if date.today() <= expiry <= threshold_date:
-                # Check if notification already exists for this item
-                existing = session.exec(
-                    select(Notification).where(
-                        Notification.user_id == user.id,
-                        Notification.item_id == item.id,
-                        Notification.notification_type == "expiry_warning",
-                        Notification.created_at >= datetime.utcnow() - timedelta(days=1)
-                    )
-                ).first()
-                
-                if existing:
-                    continue  # Don't create duplicate notifications
-                
-                # Calculate days until expiry
-                days_until_expiry = (expiry - date.today()).days
-                
-                # Determine the message based on item type
-                if item.type == "document":
-                    item_description = f"document '{item.name}'"
-                elif item.type == "subscription":
-                    item_description = f"subscription '{item.name}'"
-                else:
-                    item_description = f"item '{item.name}'"
-                
-                # Create notification
-                notification = Notification(
-                    user_id=user.id,
-                    item_id=item.id,
-                    title=f"⚠️ {item.name} expiring soon",
-                    message=f"Your {item_description} expires in {days_until_expiry} day{'s' if days_until_expiry != 1 else ''}.",
-                    notification_type="expiry_warning",
-                    is_sent_via_email=False
-                )
-                
-                session.add(notification)
-                session.commit()
-                session.refresh(notification)
-                notifications_created += 1
-                
-                # Send email if user has email notifications enabled
-                if user.email_notifications and user.email:
-                    email_sent = send_expiry_notification_email(
-                        to_email=user.email,
-                        user_name=user.full_name or "User",
-                        item_name=item.name,
-                        item_type=item.type.capitalize(),
-                        expiry_date=expiry,
-                        days_until_expiry=days_until_expiry
-                    )
-                    
-                    if email_sent:
-                        notification.is_sent_via_email = True
-                        session.add(notification)
-                        session.commit()
-                        emails_sent += 1
-            
-            # Check if expired
-            elif expiry < date.today():
-                # Check if already notified about expiry
-                existing = session.exec(
-                    select(Notification).where(
-                        Notification.user_id == user.id,
-                        Notification.item_id == item.id,
-                        Notification.notification_type == "expired",
-                        Notification.created_at >= datetime.utcnow() - timedelta(days=7)
-                    )
-                ).first()
-                
-                if existing:
-                    continue
-                
-                days_expired = (date.today() - expiry).days
-                
-                # Determine the message based on item type
-                if item.type == "document":
-                    item_description = f"document '{item.name}'"
-                elif item.type == "subscription":
-                    item_description = f"subscription '{item.name}'"
-                else:
-                    item_description = f"item '{item.name}'"
-                
-                notification = Notification(
-                    user_id=user.id,
-                    item_id=item.id,
-                    title=f"❌ {item.name} has expired",
-                    message=f"Your {item_description} expired {days_expired} day{'s' if days_expired != 1 else ''} ago.",
-                    notification_type="expired",
-                    is_sent_via_email=False
-                )
-                
-                session.add(notification)
-                session.commit()
-                session.refresh(notification)
-                notifications_created += 1
-                
-                # Send email if user has email notifications enabled
-                if user.email_notifications and user.email:
-                    email_sent = send_expired_notification_email(
-                        to_email=user.email,
-                        user_name=user.full_name or "User",
-                        item_name=item.name,
-                        item_type=item.type.capitalize(),
-                        expiry_date=expiry,
-                        days_expired=days_expired
-                    )
-                    
-                    if email_sent:
-                        notification.is_sent_via_email = True
-                        session.add(notification)
-                        session.commit()
-                        emails_sent += 1
-    
-    print(f"✅ Created {notifications_created} notifications, sent {emails_sent} emails")
-    return notifications_created
+    report = run_expiry_sweep(session)
+    print(f"✅ Created {report.notifications_created} notifications, queued {report.emails_queued} emails ({report.emails_saved} saved by digests)")
+    return report.notifications_created
 
 
 # Keep the rest of the functions the same...
-def get_user_notifications(user_id: int, session: Session, unread_only: bool = False):
-    """Get notifications for a user"""
+def get_user_notifications(
+    user_id: int,
+    session: Session,
+    unread_only: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[tuple] = None
+):
+    """
+    Get notifications for a user, newest first. `after` is the
+    (created_at, id) of the last row of the previous page.
+    """
     statement = select(Notification).where(Notification.user_id == user_id)
     
     if unread_only:
         statement = statement.where(Notification.is_read == False)
     
-    statement = statement.order_by(Notification.created_at.desc())
+    if after is not None:
+        statement = statement.where(tuple_(Notification.created_at, Notification.id) < tuple_(*after))
+    
+    statement = statement.order_by(Notification.created_at.desc(), Notification.id.desc())
+    
+    if limit is not None:
+        statement = statement.limit(limit)
     
     return session.exec(statement).all()
 
 
 def mark_notification_read(notification_id: int, user_id: int, session: Session):
-    """Mark a notification as read"""
-    notification = session.get(Notification, notification_id)
+    """Mark a notification as read; False if it does not exist or belongs to someone else"""
+    result = session.exec(
+        update(Notification)
+        .where(Notification.id == notification_id, Notification.user_id == user_id)
+        .values(is_read=True, read_at=func.coalesce(Notification.read_at, datetime.utcnow()))
+    )
+    session.commit()
+    invalidate_unread_count(user_id)
     
-    if not notification or notification.user_id != user_id:
-        return False
+    return result.rowcount > 0
+
+
+def mark_notifications_read(
+    user_id: int,
+    session: Session,
+    notification_ids: Optional[list[int]] = None,
+    item_id: Optional[int] = None
+) -> int:
+    """
+    Mark a user's unread notifications as read with a single UPDATE,
+    optionally limited to some ids and/or one item. Returns the rows changed.
+    """
+    statement = update(Notification).where(
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    )
+    if notification_ids is not None:
+        statement = statement.where(Notification.id.in_(notification_ids))
+    if item_id is not None:
+        statement = statement.where(Notification.item_id == item_id)
     
-    notification.is_read = True
-    notification.read_at = datetime.utcnow()
-    session.add(notification)
+    result = session.exec(statement.values(is_read=True, read_at=datetime.utcnow()))
     session.commit()
+    if result.rowcount:
+        invalidate_unread_count(user_id)
     
-    return True
+    return result.rowcount
 
 
 def mark_all_read(user_id: int, session: Session):
     """Mark all notifications as read for a user"""
-    notifications = session.exec(
-        select(Notification).where(
-            Notification.user_id == user_id,
-            Notification.is_read == False
-        )
-    ).all()
-    
-    for notification in notifications:
-        notification.is_read = True
-        notification.read_at = datetime.utcnow()
-        session.add(notification)
-    
-    session.commit()
-    return len(notifications)
\ No newline at end of file
+    return mark_notifications_read(user_id, session)
@@ -0,0 +1,74 @@
+# utils/principal.py
+"""
+Cached identity of the authenticated user.
+
+Hot read routes only need a handful of User columns, so instead of loading
+the ORM row on every request they receive a frozen Principal that is cached
+per user id. Routes that change those columns must call invalidate_principal;
+the short TTL bounds how long other workers can serve a stale copy.
+"""
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from models.user import User
+from utils import metrics
+from utils.cache import TTLCache
+
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only snapshot of the User fields that request handlers rely on"""
+    id: int
+    email: str
+    full_name: Optional[str]
+    email_verified: bool
+    subscription_plan: str
+    subscription_status: Optional[str]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            email_verified=user.email_verified,
+            subscription_plan=user.subscription_plan,
+            subscription_status=user.subscription_status,
+        )
+
+    # Same rules as User.is_premium / User.can_add_items
+    def is_premium(self) -> bool:
+        return self.subscription_plan == "premium" and self.subscription_status in ["active", "trialing"]
+
+    def can_add_items(self, current_item_count: int) -> bool:
+        if self.is_premium():
+            return True
+        return current_item_count < 20
+
+
+def get_cached_principal(user_id: int) -> Optional[Principal]:
+    return _cache.get(user_id)
+
+
+def cache_principal(user: User) -> Principal:
+    principal = Principal.from_user(user)
+    _cache.set(user.id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: int):
+    """Drop a user's cached principal; call after committing changes to the User row"""
+    _cache.invalidate(user_id)
+
+
+def principal_metrics() -> dict:
+    return {"cache": _cache.stats()}
+
+
+metrics.register("principal_cache", principal_metrics)
@@ -0,0 +1,215 @@
+# utils/reminder_schedule.py
+"""
+Due-date queue for expiry reminders.
+
+An item's reminders are a list of stages: one warning per reminder offset
+("before:30", "before:7", ... days before the expiry date) and a repeating
+"expired" stage. reminder_schedule holds one row per (item, stage) for every
+dated item of an opted-in user, with the local date it fires on next.
+
+Item writes (routes/items/crud.py) and preference changes
+(routes/auth/settings.py) recompute the rows they affect with
+reschedule_items(). The expiry sweep reads only rows with fire_date <= today,
+so its cost follows the number of due stages, not the number of items or
+stages per item.
+
+Offsets come from, in order: Item.reminder_offsets,
+Item.reminder_days_before, User.reminder_offsets and
+User.notification_days_before. Offsets are JSON lists such as "[30, 7, 1]".
+
+Stages:
+- Each warning stage fires once, on its own date. An item whose window
+  opened before it was scheduled only fires the latest opened stage, right
+  away.
+- The expired stage fires the day after the expiry date and then weekly.
+- The stage rows are keyed on (item, stage). A row records the expiry date
+  it was planned for and the local date it last fired. A fired warning
+  stays fired until the expiry date changes, and an expired item keeps its
+  weekly cadence when it is edited.
+
+Rebuild the whole table with `python -m utils.reminder_schedule`.
+"""
+import json
+import logging
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlmodel import Session, select, delete
+
+from models.item import Item
+from models.reminder_schedule import ReminderSchedule
+from models.user import User
+from utils.dates import local_today
+
+logger = logging.getLogger(__name__)
+
+EXPIRED_STAGE = "expired"
+EXPIRED_INTERVAL = timedelta(days=7)
+
+MAX_REMINDER_OFFSETS = 10
+MAX_REMINDER_OFFSET_DAYS = 365
+
+
+def warning_stage(offset: int) -> str:
+    return f"before:{offset}"
+
+
+def clean_reminder_offsets(offsets) -> list[int]:
+    """Validate a list of reminder offsets; returns them deduplicated, largest first"""
+    if not isinstance(offsets, list) or not all(isinstance(o, int) and not isinstance(o, bool) for o in offsets):
+        raise ValueError("Reminder offsets must be a list of whole days")
+    if len(offsets) > MAX_REMINDER_OFFSETS:
+        raise ValueError(f"At most {MAX_REMINDER_OFFSETS} reminder offsets are allowed")
+    if any(o < 0 or o > MAX_REMINDER_OFFSET_DAYS for o in offsets):
+        raise ValueError(f"Reminder offsets must be between 0 and {MAX_REMINDER_OFFSET_DAYS} days")
+    return sorted(set(offsets), reverse=True)
+
+
+def parse_reminder_offsets(value: Optional[str]) -> Optional[list[int]]:
+    """Offsets stored as JSON; None when unset, empty or invalid"""
+    if not value:
+        return None
+    try:
+        offsets = clean_reminder_offsets(json.loads(value))
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid reminder offsets: {value!r}")
+        return None
+    return offsets or None
+
+
+def resolve_offsets(
+    item_offsets: Optional[str],
+    item_days: Optional[int],
+    user_offsets: Optional[str],
+    user_days: int,
+) -> list[int]:
+    """The reminder offsets that apply to an item"""
+    offsets = parse_reminder_offsets(item_offsets)
+    if offsets is None and item_days is not None:
+        offsets = [item_days]
+    if offsets is None:
+        offsets = parse_reminder_offsets(user_offsets)
+    return offsets if offsets is not None else [user_days]
+
+
+def plan_stages(expiry: date, offsets: list[int], today: date) -> dict[str, tuple[str, date]]:
+    """stage -> (kind, fire_date) for the stages of an item still to fire as of today"""
+    stages = {}
+    if today <= expiry:
+        # Of the stages whose date has come, only the closest to expiry fires
+        opened = [offset for offset in offsets if expiry - timedelta(days=offset) <= today]
+        latest_opened = min(opened) if opened else None
+        for offset in offsets:
+            fire_date = expiry - timedelta(days=offset)
+            if fire_date > today:
+                stages[warning_stage(offset)] = ("expiry_warning", fire_date)
+            elif offset == latest_opened:
+                stages[warning_stage(offset)] = ("expiry_warning", today)
+    stages[EXPIRED_STAGE] = ("expired", max(expiry + timedelta(days=1), today))
+    return stages
+
+
+def reschedule_items(
+    session: Session,
+    user_id: int,
+    item_ids: Optional[Iterable[int]] = None,
+    today: Optional[date] = None,
+) -> int:
+    """
+    Recompute the stages of a user's items (all of them, or `item_ids`)
+    from the current item and user settings. Runs in the caller's
+    transaction; returns how many items are scheduled.
+    """
+    if item_ids is not None:
+        item_ids = list(item_ids)
+        if not item_ids:
+            return 0
+
+    existing_query = select(ReminderSchedule).where(ReminderSchedule.user_id == user_id)
+    if item_ids is not None:
+        existing_query = existing_query.where(ReminderSchedule.item_id.in_(item_ids))
+    existing: dict[int, dict[str, ReminderSchedule]] = {}
+    for row in session.exec(existing_query):
+        existing.setdefault(row.item_id, {})[row.stage] = row
+
+    user = session.exec(
+        select(
+            User.email_notifications, User.notification_days_before, User.reminder_offsets, User.timezone
+        ).where(User.id == user_id)
+    ).first()
+    items = []
+    if user is not None and user.email_notifications:
+        items_query = (
+            select(Item.id, Item.effective_expiry_date, Item.reminder_days_before, Item.reminder_offsets)
+            .where(Item.user_id == user_id, Item.effective_expiry_date.isnot(None))
+        )
+        if item_ids is not None:
+            items_query = items_query.where(Item.id.in_(item_ids))
+        items = session.exec(items_query).all()
+        today = today or local_today(user.timezone)
+
+    now = datetime.utcnow()
+    for item_id, expiry, item_days, item_offsets in items:
+        offsets = resolve_offsets(item_offsets, item_days, user.reminder_offsets, user.notification_days_before)
+        rows = existing.pop(item_id, {})
+
+        for stage, (kind, fire_date) in plan_stages(expiry, offsets, today).items():
+            row = rows.pop(stage, None)
+            if row is None:
+                session.add(ReminderSchedule(
+                    item_id=item_id, user_id=user_id, stage=stage, kind=kind,
+                    expiry_date=expiry, fire_date=fire_date, updated_at=now,
+                ))
+                continue
+            if row.expiry_date != expiry:
+                row.expiry_date, row.last_fired_date = expiry, None
+            elif row.fire_date is None or (row.last_fired_date is not None and row.fire_date > today):
+                # Fired warnings stay fired; a fired expired stage keeps its cadence
+                continue
+            elif (row.kind, row.fire_date) == (kind, fire_date):
+                continue
+            row.kind, row.fire_date, row.updated_at = kind, fire_date, now
+            session.add(row)
+
+        # Stages no longer planned, except warnings already fired for this expiry date
+        configured = {warning_stage(offset) for offset in offsets}
+        for stage, row in rows.items():
+            if not (row.fire_date is None and row.expiry_date == expiry and stage in configured):
+                session.delete(row)
+
+    # Undated items, deleted items and opted-out users have nothing scheduled
+    for rows in existing.values():
+        for row in rows.values():
+            session.delete(row)
+    return len(items)
+
+
+def delete_item_reminders(item_ids: Iterable[int]):
+    """DELETE statement for the schedule of items about to be deleted"""
+    return delete(ReminderSchedule).where(ReminderSchedule.item_id.in_(list(item_ids)))
+
+
+def rebuild_reminder_schedule(session: Session, batch_size: int = 500) -> int:
+    """Recompute the schedule of every user, committing per batch of users"""
+    scheduled = 0
+    last_id = 0
+    while True:
+        user_ids = session.exec(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).all()
+        if not user_ids:
+            break
+        for user_id in user_ids:
+            scheduled += reschedule_items(session, user_id)
+        session.commit()
+        last_id = user_ids[-1]
+    logger.info(f"✅ Reminder schedule rebuilt: {scheduled} items scheduled")
+    return scheduled
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    with Session(engine) as session:
+        print(f"✅ Scheduled {rebuild_reminder_schedule(session)} items")
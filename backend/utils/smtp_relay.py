@@ -9,18 +9,41 @@ Supports sending from Remindes aliases:
   - info@remindes.com
   - no-reply@remindes.com
   - billing@remindes.com
+
+send_email() delivers inline over a one-off connection and is kept for
+scripts and debugging. Request handlers and the expiry sweep queue mail
+through utils/email_outbox.py, whose workers hand each batch to send_many():
+that goes through SMTPConnectionPool, which keeps up to SMTP_POOL_SIZE relay
+sessions open and sends many messages per session instead of paying
+connect + EHLO + STARTTLS for every email.
 """
 import os
 import smtplib
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Optional
+
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 
 SMTP_RELAY_HOST = os.getenv("SMTP_RELAY_HOST", "smtp-relay.gmail.com")
 SMTP_RELAY_PORT = int(os.getenv("SMTP_RELAY_PORT", "587"))
 SMTP_FROM_NAME = os.getenv("SMTP_FROM_NAME", "Remindes")
+# Disable for relays without TLS, e.g. the local stand-in in utils/local_smtp.py
+SMTP_RELAY_STARTTLS = os.getenv("SMTP_RELAY_STARTTLS", "true").lower() == "true"
+# Seconds before a stalled relay connection is abandoned
+SMTP_RELAY_TIMEOUT = float(os.getenv("SMTP_RELAY_TIMEOUT", "30"))
+
+# Pooled sessions used by send_many()
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+# Relays drop quiet sessions; older idle connections are replaced, not reused
+SMTP_POOL_IDLE_SECONDS = float(os.getenv("SMTP_POOL_IDLE_SECONDS", "60"))
 
 VALID_FROM_ADDRESSES = [
     "support@remindes.com",
@@ -30,6 +53,201 @@ VALID_FROM_ADDRESSES = [
 ]
 
 
+def build_message(
+    to_email: str,
+    subject: str,
+    html_body: str,
+    from_email: str = "no-reply@remindes.com",
+    from_name: str | None = None,
+    plain_body: str | None = None,
+) -> MIMEMultipart:
+    """Build the MIME message for an email; raises ValueError for an invalid sender"""
+    if from_email not in VALID_FROM_ADDRESSES:
+        raise ValueError(f"Invalid from_email '{from_email}'. Must be one of {VALID_FROM_ADDRESSES}")
+
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = f"{from_name or SMTP_FROM_NAME} <{from_email}>"
+    msg["To"] = to_email
+
+    if plain_body:
+        msg.attach(MIMEText(plain_body, "plain"))
+    msg.attach(MIMEText(html_body, "html"))
+    return msg
+
+
+def _open_relay_session() -> smtplib.SMTP:
+    server = smtplib.SMTP(SMTP_RELAY_HOST, SMTP_RELAY_PORT, timeout=SMTP_RELAY_TIMEOUT)
+    try:
+        if SMTP_RELAY_STARTTLS:
+            server.starttls()
+        # IP-authenticated – no login required
+        server.ehlo_or_helo_if_needed()
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def deliver_message(msg: MIMEMultipart):
+    """Send a built message over a one-off relay session; raises on any SMTP or socket error"""
+    with _open_relay_session() as server:
+        server.send_message(msg)
+
+
+class _PooledSession:
+    """One relay session and how much it has been used"""
+
+    def __init__(self):
+        self.server: Optional[smtplib.SMTP] = None
+        self.sent = 0
+        self.last_used = 0.0
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                self.server.close()
+        self.server = None
+        self.sent = 0
+
+
+class SMTPConnectionPool:
+    """
+    Up to `size` long-lived relay sessions shared by the sending threads.
+
+    A session is used by one thread at a time, carries at most
+    `max_messages` messages before it is closed and replaced, and is
+    replaced instead of reused after `idle_seconds` without traffic.
+    A message that fails because the session dropped is retried once on a
+    fresh session; a message the relay rejects leaves the session usable.
+    """
+
+    def __init__(
+        self,
+        size: int = SMTP_POOL_SIZE,
+        max_messages: int = SMTP_MAX_MESSAGES_PER_CONNECTION,
+        idle_seconds: float = SMTP_POOL_IDLE_SECONDS,
+    ):
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_seconds = idle_seconds
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: list[_PooledSession] = []
+        self._counters = {"connects": 0, "reconnects": 0, "messages": 0, "rejected": 0, "recycled": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    @contextmanager
+    def session(self):
+        """Check a session out of the pool (connected lazily on first send)"""
+        self._slots.acquire()
+        with self._lock:
+            pooled = self._idle.pop() if self._idle else _PooledSession()
+        if pooled.server is not None and time.monotonic() - pooled.last_used > self.idle_seconds:
+            pooled.close()
+        try:
+            yield pooled
+        finally:
+            pooled.last_used = time.monotonic()
+            with self._lock:
+                self._idle.append(pooled)
+            self._slots.release()
+
+    def _connect(self, pooled: _PooledSession):
+        pooled.close()
+        pooled.server = _open_relay_session()
+        self._count("connects")
+
+    def _send(self, pooled: _PooledSession, msg: MIMEMultipart) -> Optional[Exception]:
+        reused = pooled.server is not None
+        if not reused:
+            self._connect(pooled)
+        try:
+            pooled.server.send_message(msg)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+            # Rejected by the relay; smtplib has already RSET the session
+            self._count("rejected")
+            return e
+        except (smtplib.SMTPException, OSError):
+            # The session dropped (timeout, relay restart, idle disconnect)
+            pooled.close()
+            if not reused:
+                raise
+            self._count("reconnects")
+            return self._send(pooled, msg)
+
+        pooled.sent += 1
+        self._count("messages")
+        if pooled.sent >= self.max_messages:
+            pooled.close()
+            self._count("recycled")
+        return None
+
+    def send_many(self, messages: list[MIMEMultipart]) -> list[Optional[Exception]]:
+        """
+        Send messages over one pooled session, in order. Returns one entry
+        per message: None when the relay accepted it, else the error. Once
+        the relay cannot be reached the remaining messages fail with the
+        same error instead of reconnecting for each of them.
+        """
+        results: list[Optional[Exception]] = []
+        with self.session() as pooled:
+            for msg in messages:
+                try:
+                    results.append(self._send(pooled, msg))
+                except Exception as e:
+                    logger.error(f"❌ SMTP relay unreachable: {e}")
+                    results.extend([e] * (len(messages) - len(results)))
+                    break
+        return results
+
+    def close(self):
+        """Close every idle session"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            pooled.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            open_sessions = sum(1 for pooled in self._idle if pooled.server is not None)
+            return {"size": self.size, "max_messages": self.max_messages, "idle_open": open_sessions, **self._counters}
+
+
+_pool: Optional[SMTPConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SMTPConnectionPool()
+        return _pool
+
+
+def close_smtp_pool():
+    """Quit every pooled relay session (app shutdown, relay settings changed)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool:
+        pool.close()
+
+
+def send_many(messages: list[MIMEMultipart]) -> list[Optional[Exception]]:
+    """Send built messages over a pooled relay session; see SMTPConnectionPool.send_many"""
+    return get_smtp_pool().send_many(messages)
+
+
+metrics.register("smtp_pool", lambda: get_smtp_pool().stats())
+
+
 def send_email(
     to_email: str,
     subject: str,
@@ -52,27 +270,14 @@ def send_email(
     Returns:
         True if the email was sent successfully, False otherwise.
     """
-    if from_email not in VALID_FROM_ADDRESSES:
-        logger.error(f"Invalid from_email '{from_email}'. Must be one of {VALID_FROM_ADDRESSES}")
+    try:
+        msg = build_message(to_email, subject, html_body, from_email, from_name, plain_body)
+    except ValueError as e:
+        logger.error(str(e))
         return False
 
-    sender_name = from_name or SMTP_FROM_NAME
-
     try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = f"{sender_name} <{from_email}>"
-        msg["To"] = to_email
-
-        if plain_body:
-            msg.attach(MIMEText(plain_body, "plain"))
-        msg.attach(MIMEText(html_body, "html"))
-
-        with smtplib.SMTP(SMTP_RELAY_HOST, SMTP_RELAY_PORT) as server:
-            server.starttls()
-            # IP-authenticated – no login required
-            server.send_message(msg)
-
+        deliver_message(msg)
         logger.info(f"✅ Email sent to {to_email} from {from_email} (subject: {subject})")
         return True
 
@@ -0,0 +1,371 @@
+# utils/storage.py
+"""
+Storage backends for uploaded files.
+
+An upload is addressed by its key: the file name in Item.file_path
+(/uploads/<key>). Every write, read and delete of an upload goes through
+the backend returned by get_storage(), picked with STORAGE_BACKEND:
+
+- local (default): files under UPLOAD_DIR, sharded two directory levels
+  deep so no directory grows past a few thousand entries. Content-addressed
+  keys shard on their own hash (uploads/ab/cd/abcd...ef.pdf), other keys
+  on the hash of their name.
+- s3: an S3-compatible bucket (AWS S3, MinIO, ...) over HTTP with AWS
+  Signature V4. Objects use the same sharded layout under S3_PREFIX.
+  utils/local_s3.py is an in-process stand-in for tests and development.
+
+The interface is async. Local file I/O runs in the threadpool, and S3
+requests share a pooled httpx.AsyncClient per event loop, closed with that
+loop or by aclose() at app shutdown. Uploads are streamed to a local
+staging file first (utils/file.py), and put() moves that file into the
+store.
+"""
+import abc
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+STORAGE_CHUNK_SIZE = int(os.getenv("STORAGE_CHUNK_SIZE", str(256 * 1024)))
+
+SHARD_LEVELS = 2
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+
+class StorageError(Exception):
+    """A storage backend rejected or failed a request"""
+
+
+def upload_key(file_path: str) -> str:
+    """Storage key of a stored file_path (/uploads/<key> or a bare key)"""
+    return file_path.rsplit("/", 1)[-1]
+
+
+def is_content_addressed(key: str) -> bool:
+    stem = upload_key(key).split(".", 1)[0]
+    return len(stem) == 64 and all(c in "0123456789abcdef" for c in stem)
+
+
+def shard_path(key: str) -> str:
+    """Relative location of a key: <2 hex>/<2 hex>/<key>"""
+    if not key or key.startswith(".") or "/" in key or "\\" in key:
+        raise ValueError(f"Invalid storage key: {key!r}")
+    digest = key if is_content_addressed(key) else hashlib.sha256(key.encode()).hexdigest()
+    return "/".join([digest[2 * level:2 * level + 2] for level in range(SHARD_LEVELS)] + [key])
+
+
+class StorageBackend(abc.ABC):
+    """
+    Interface of the upload stores. Reads raise FileNotFoundError for a
+    missing key; ranges are byte offsets with an inclusive end, as in HTTP.
+    """
+    name = ""
+    staging_dir = ""
+
+    @abc.abstractmethod
+    async def put(self, key: str, source_path: str, sha256: Optional[str] = None):
+        """Move a local file into the store under `key` (replacing any object there)"""
+
+    @abc.abstractmethod
+    def stream(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Bytes start..end (inclusive, None for the end of the object) in chunks"""
+
+    @abc.abstractmethod
+    async def size(self, key: str) -> Optional[int]:
+        """Size of the object in bytes, or None if there is none"""
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> bool:
+        """Remove an object; returns True if it was removed"""
+
+    async def get(self, key: str) -> bytes:
+        return await self.get_range(key, 0, None)
+
+    async def get_range(self, key: str, start: int, end: Optional[int]) -> bytes:
+        return b"".join([chunk async for chunk in self.stream(key, start, end)])
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path of the object on this machine, if the backend keeps one (for sendfile)"""
+        return None
+
+    def status(self) -> str:
+        return "ok"
+
+    async def aclose(self):
+        """Release pooled connections (at app shutdown)"""
+
+
+class LocalStorage(StorageBackend):
+    """Hash-sharded directory tree on the local filesystem"""
+    name = "local"
+
+    def __init__(self, root: str = UPLOAD_DIR):
+        self.root = root
+        # Inside the root, so put() is a rename on the same filesystem
+        self.staging_dir = os.path.join(root, ".staging")
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, *shard_path(key).split("/"))
+
+    def _put(self, key: str, source_path: str):
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    async def put(self, key: str, source_path: str, sha256: Optional[str] = None):
+        await run_in_threadpool(self._put, key, source_path)
+
+    async def stream(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        f = await run_in_threadpool(open, self.local_path(key), "rb")
+        try:
+            await run_in_threadpool(f.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = STORAGE_CHUNK_SIZE if remaining is None else min(STORAGE_CHUNK_SIZE, remaining)
+                chunk = await run_in_threadpool(f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            f.close()
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            return (await run_in_threadpool(os.stat, self.local_path(key))).st_size
+        except FileNotFoundError:
+            return None
+
+    async def delete(self, key: str) -> bool:
+        path = self.local_path(key)
+        try:
+            await run_in_threadpool(os.remove, path)
+        except FileNotFoundError:
+            return False
+        logger.info(f"✅ Deleted file: {path}")
+        return True
+
+    def status(self) -> str:
+        return "ok" if os.path.isdir(self.root) else "error: uploads directory missing"
+
+
+def sign_v4(
+    method: str,
+    host: str,
+    path: str,
+    headers: dict,
+    payload_hash: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    now: Optional[datetime] = None,
+    query: str = "",
+) -> dict:
+    """Headers of an AWS Signature V4 signed S3 request (header names lower case)"""
+    now = now or datetime.utcnow()
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    date_stamp = now.strftime("%Y%m%d")
+    headers = {**headers, "host": host, "x-amz-content-sha256": payload_hash, "x-amz-date": amz_date}
+
+    signed_headers = sorted(headers)
+    canonical_request = "\n".join([
+        method,
+        path,
+        query,
+        "".join(f"{name}:{str(headers[name]).strip()}\n" for name in signed_headers),
+        ";".join(signed_headers),
+        payload_hash,
+    ])
+    scope = f"{date_stamp}/{region}/s3/aws4_request"
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ])
+
+    key = f"AWS4{secret_key}".encode()
+    for part in (date_stamp, region, "s3", "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    headers["authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+        f"SignedHeaders={';'.join(signed_headers)}, Signature={signature}"
+    )
+    return headers
+
+
+class S3Storage(StorageBackend):
+    """S3-compatible bucket, addressed path-style (endpoint/bucket/key)"""
+    name = "s3"
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str = "",
+        secret_key: str = "",
+        region: str = "us-east-1",
+        prefix: str = "",
+        staging_dir: Optional[str] = None,
+        timeout: float = 30,
+        max_connections: int = 20,
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.host = httpx.URL(self.endpoint_url).netloc.decode()
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.prefix = prefix.strip("/")
+        self.staging_dir = staging_dir or tempfile.gettempdir()
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        self._closer: Optional[asyncio.Task] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        # Connections belong to the event loop that opened them, and can only
+        # be closed on it: each loop gets a client and a task that closes it
+        # when the loop shuts down (asyncio.run cancels it) or on aclose()
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, limits=httpx.Limits(max_connections=self.max_connections)
+            )
+            self._client_loop = loop
+            self._closer = loop.create_task(self._close_with_loop(self._client))
+        return self._client
+
+    async def _close_with_loop(self, client: httpx.AsyncClient):
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await client.aclose()
+            if self._client is client:
+                self._client = None
+
+    def _object_path(self, key: str) -> str:
+        object_key = f"{self.prefix}/{shard_path(key)}" if self.prefix else shard_path(key)
+        return quote(f"/{self.bucket}/{object_key}", safe="/-_.~")
+
+    def _request(
+        self, method: str, key: str, headers: Optional[dict] = None, payload_hash: str = UNSIGNED_PAYLOAD, content=None
+    ) -> httpx.Request:
+        path = self._object_path(key)
+        headers = headers or {}
+        if self.access_key:
+            headers = sign_v4(
+                method, self.host, path, headers, payload_hash, self.access_key, self.secret_key, self.region
+            )
+        return self._http().build_request(method, f"{self.endpoint_url}{path}", headers=headers, content=content)
+
+    async def _send(self, request: httpx.Request, stream: bool = False) -> httpx.Response:
+        try:
+            return await self._http().send(request, stream=stream)
+        except httpx.HTTPError as e:
+            raise StorageError(f"S3 {request.method} {request.url.path} failed: {e}") from e
+
+    @staticmethod
+    def _check(response: httpx.Response, key: str):
+        if response.status_code == 404:
+            raise FileNotFoundError(key)
+        if response.status_code >= 300:
+            raise StorageError(f"S3 {response.request.method} {key} returned {response.status_code}")
+
+    async def put(self, key: str, source_path: str, sha256: Optional[str] = None):
+        size = await run_in_threadpool(os.path.getsize, source_path)
+
+        async def body():
+            with open(source_path, "rb") as f:
+                while chunk := await run_in_threadpool(f.read, STORAGE_CHUNK_SIZE):
+                    yield chunk
+
+        # An explicit Content-Length: S3 does not take chunked uploads
+        request = self._request(
+            "PUT", key, {"content-length": str(size)}, payload_hash=sha256 or UNSIGNED_PAYLOAD, content=body()
+        )
+        response = await self._send(request)
+        self._check(response, key)
+        await run_in_threadpool(os.remove, source_path)
+
+    async def stream(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["range"] = f"bytes={start}-{'' if end is None else end}"
+        response = await self._send(self._request("GET", key, headers), stream=True)
+        try:
+            if response.status_code == 416:
+                return
+            self._check(response, key)
+            async for chunk in response.aiter_bytes(STORAGE_CHUNK_SIZE):
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def size(self, key: str) -> Optional[int]:
+        response = await self._send(self._request("HEAD", key))
+        if response.status_code == 404:
+            return None
+        self._check(response, key)
+        return int(response.headers["content-length"])
+
+    async def delete(self, key: str) -> bool:
+        # S3 does not say whether the object existed
+        response = await self._send(self._request("DELETE", key))
+        if response.status_code == 404:
+            return False
+        self._check(response, key)
+        logger.info(f"✅ Deleted object: {key}")
+        return True
+
+    async def aclose(self):
+        closer = self._closer
+        if closer is not None and self._client_loop is asyncio.get_running_loop():
+            closer.cancel()
+            await asyncio.gather(closer, return_exceptions=True)
+
+    def status(self) -> str:
+        return "ok"
+
+
+def create_storage() -> StorageBackend:
+    """The backend configured by the environment"""
+    if STORAGE_BACKEND == "local":
+        return LocalStorage(UPLOAD_DIR)
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(
+            endpoint_url=os.getenv("S3_ENDPOINT_URL", "https://s3.amazonaws.com"),
+            bucket=os.environ["S3_BUCKET"],
+            access_key=os.getenv("S3_ACCESS_KEY_ID", ""),
+            secret_key=os.getenv("S3_SECRET_ACCESS_KEY", ""),
+            region=os.getenv("S3_REGION", "us-east-1"),
+            prefix=os.getenv("S3_PREFIX", ""),
+            staging_dir=os.getenv("S3_STAGING_DIR") or None,
+            max_connections=int(os.getenv("S3_MAX_CONNECTIONS", "20")),
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND!r}")
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+        logger.info(f"✅ Upload storage: {_storage.name}")
+    return _storage
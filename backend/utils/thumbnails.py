@@ -0,0 +1,326 @@
+# utils/thumbnails.py
+"""
+Background thumbnails for uploaded images and PDFs.
+
+After an upload commits, upload_item and update_item_with_file call
+enqueue_thumbnail(). The job runs on the event loop and renders in a pool of
+THUMBNAIL_WORKERS processes, so decoding a 10MB photo or a PDF never holds
+the GIL of the serving process:
+
+1. reuse  - a thumbnail is keyed by content (<sha256>.thumb.webp, stored next
+   to the blob in the upload storage), so content seen before is not
+   rendered again. The routes pick up an existing one before committing
+   (existing_thumbnail).
+2. render - images are downscaled with Pillow, and the first page of a PDF
+   is rasterised with pypdfium2. The worker writes a WebP of at most
+   THUMBNAIL_SIZE pixels a side to a staging file.
+3. store  - the staging file is put into the upload storage, and every item
+   with that file_path gets thumbnail_path (/uploads/<sha256>.thumb.webp).
+
+Pillow and pypdfium2 are optional: without them, the files they handle get
+no thumbnail. At most THUMBNAIL_QUEUE_MAX jobs wait at once. Jobs beyond
+that are dropped and counted; `python -m utils.thumbnails` renders whatever
+is missing. Queue depth, queue wait and render time are reported under
+"thumbnails" on GET /metrics.
+"""
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from models.item import Item
+from utils import metrics
+from utils.storage import StorageBackend, get_storage, is_content_addressed, upload_key
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "320"))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+THUMBNAIL_QUEUE_MAX = int(os.getenv("THUMBNAIL_QUEUE_MAX", "100"))
+
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp"}
+THUMBNAIL_SUFFIX = ".thumb.webp"
+
+_wait_timer = metrics.Timer()
+_render_timer = metrics.Timer()
+_counters_lock = threading.Lock()
+_counters = {"enqueued": 0, "rendered": 0, "reused": 0, "unsupported": 0, "dropped": 0, "failed": 0}
+_pipeline: Optional["ThumbnailPipeline"] = None
+
+
+def _count(name: str, n: int = 1):
+    with _counters_lock:
+        _counters[name] += n
+
+
+def _default_engine() -> Engine:
+    from database import engine
+    return engine
+
+
+def thumbnail_support() -> dict:
+    """Which kinds of file this installation can render"""
+    pillow = importlib.util.find_spec("PIL") is not None
+    return {"image": pillow, "pdf": pillow and importlib.util.find_spec("pypdfium2") is not None}
+
+
+def thumbnail_kind(file_path: str) -> Optional[str]:
+    ext = file_path.rsplit(".", 1)[-1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    if ext == "pdf":
+        return "pdf"
+    return None
+
+
+def thumbnail_key(file_path: str) -> Optional[str]:
+    """Storage key of the thumbnail of a content-addressed upload"""
+    key = upload_key(file_path)
+    if not is_content_addressed(key):
+        return None
+    return f"{key.split('.', 1)[0]}{THUMBNAIL_SUFFIX}"
+
+
+def render_thumbnail(source_path: str, kind: str, out_path: str, size: int, quality: int) -> float:
+    """
+    Runs in a pool process: write a WebP thumbnail of the image (or of the
+    first page of the PDF) at source_path to out_path. Returns the time the
+    work started, so the caller can tell queue wait from render time.
+    """
+    started = time.time()
+    from PIL import Image, ImageOps
+
+    if kind == "pdf":
+        import pypdfium2
+
+        pdf = pypdfium2.PdfDocument(source_path)
+        try:
+            page = pdf[0]
+            # Scale 1 is 72 dpi: render the longer side at `size` pixels
+            image = page.render(scale=size / max(page.get_width(), page.get_height())).to_pil()
+            page.close()
+        finally:
+            pdf.close()
+    else:
+        image = Image.open(source_path)
+        # JPEGs decode straight at a reduced scale
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+
+    image.thumbnail((size, size))
+    image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P", "PA") else "RGB")
+    image.save(out_path, "WEBP", quality=quality)
+    return started
+
+
+async def existing_thumbnail(file_path: Optional[str]) -> Optional[str]:
+    """thumbnail_path for an upload whose content already has a thumbnail"""
+    key = thumbnail_key(file_path) if file_path else None
+    if key is None or await get_storage().size(key) is None:
+        return None
+    return f"/uploads/{key}"
+
+
+async def _download(storage: StorageBackend, key: str, path: str):
+    with open(path, "wb") as f:
+        async for chunk in storage.stream(key):
+            await run_in_threadpool(f.write, chunk)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _record(engine: Engine, file_path: str, thumbnail_path: str) -> int:
+    with Session(engine) as session:
+        result = session.exec(
+            update(Item)
+            .where(Item.file_path == file_path)
+            .values(thumbnail_path=thumbnail_path)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        return result.rowcount
+
+
+async def generate_thumbnail(
+    file_path: str,
+    executor: Optional[Executor] = None,
+    engine: Optional[Engine] = None,
+    submitted: Optional[float] = None,
+) -> Optional[str]:
+    """
+    Render (or reuse) the thumbnail of an upload and set it on the items
+    with that file_path; returns the thumbnail_path, or None when the file
+    cannot have one. Renders in `executor` (a thread of the event loop's
+    default executor without one).
+    """
+    kind = thumbnail_kind(file_path)
+    key = thumbnail_key(file_path)
+    if kind is None or key is None or not thumbnail_support()[kind]:
+        _count("unsupported")
+        return None
+
+    storage = get_storage()
+    if await storage.size(key) is None:
+        source = storage.local_path(upload_key(file_path))
+        downloaded = None
+        if source is None:
+            source = downloaded = os.path.join(storage.staging_dir, f"{uuid.uuid4()}.src")
+            await _download(storage, upload_key(file_path), downloaded)
+        out_path = os.path.join(storage.staging_dir, f"{uuid.uuid4()}.part")
+        try:
+            started = await asyncio.get_running_loop().run_in_executor(
+                executor, render_thumbnail, source, kind, out_path, THUMBNAIL_SIZE, THUMBNAIL_QUALITY
+            )
+            _render_timer.observe(time.time() - started)
+            if submitted is not None:
+                _wait_timer.observe(max(started - submitted, 0.0))
+            await storage.put(key, out_path)
+        finally:
+            await run_in_threadpool(_remove, out_path)
+            if downloaded:
+                await run_in_threadpool(_remove, downloaded)
+        _count("rendered")
+    else:
+        _count("reused")
+
+    thumbnail_path = f"/uploads/{key}"
+    await run_in_threadpool(_record, engine or _default_engine(), file_path, thumbnail_path)
+    return thumbnail_path
+
+
+class ThumbnailPipeline:
+    """Thumbnail jobs on the event loop, rendering in a process pool"""
+
+    def __init__(
+        self,
+        workers: int = THUMBNAIL_WORKERS,
+        engine: Optional[Engine] = None,
+        queue_max: int = THUMBNAIL_QUEUE_MAX,
+    ):
+        self.workers = workers
+        self.engine = engine
+        self.queue_max = queue_max
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: set[asyncio.Task] = set()
+
+    def start(self):
+        # Spawned, not forked: the server process runs threads of its own
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"✅ Thumbnails: {self.workers} render processes ({thumbnail_support()})")
+
+    def stop(self):
+        for job in self._jobs:
+            job.cancel()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    def enqueue(self, file_path: str) -> bool:
+        """Start a thumbnail job (from the event loop); False if the queue is full"""
+        if len(self._jobs) >= self.queue_max:
+            _count("dropped")
+            logger.warning(f"⚠️ Thumbnail queue full, skipped {file_path}")
+            return False
+        job = asyncio.get_running_loop().create_task(self._run(file_path, time.time()))
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+        _count("enqueued")
+        return True
+
+    async def drain(self):
+        """Wait for the jobs started so far"""
+        while self._jobs:
+            await asyncio.gather(*self._jobs, return_exceptions=True)
+
+    async def _run(self, file_path: str, submitted: float):
+        try:
+            await generate_thumbnail(file_path, self._executor, self.engine, submitted)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _count("failed")
+            logger.error(f"❌ Thumbnail for {file_path} failed: {type(e).__name__}: {e}")
+
+
+def start_thumbnail_workers(workers: int = THUMBNAIL_WORKERS, engine: Optional[Engine] = None) -> Optional[ThumbnailPipeline]:
+    """Start the process-wide pipeline (no-op with THUMBNAIL_WORKERS=0)"""
+    global _pipeline
+    if workers <= 0 or _pipeline:
+        return _pipeline
+    _pipeline = ThumbnailPipeline(workers=workers, engine=engine)
+    _pipeline.start()
+    return _pipeline
+
+
+def stop_thumbnail_workers():
+    global _pipeline
+    if _pipeline:
+        _pipeline.stop()
+        _pipeline = None
+
+
+def enqueue_thumbnail(file_path: Optional[str]) -> bool:
+    """Queue a thumbnail for an upload once its item is committed"""
+    if not file_path or _pipeline is None or thumbnail_kind(file_path) is None:
+        return False
+    return _pipeline.enqueue(file_path)
+
+
+def thumbnail_metrics() -> dict:
+    with _counters_lock:
+        counters = dict(_counters)
+    return {
+        "pending": _pipeline.pending() if _pipeline else 0,
+        "workers": _pipeline.workers if _pipeline else 0,
+        "support": thumbnail_support(),
+        "queue_wait": _wait_timer.stats(),
+        "render": _render_timer.stats(),
+        **counters,
+    }
+
+
+metrics.register("thumbnails", thumbnail_metrics)
+
+
+async def _backfill(engine: Engine, workers: int) -> int:
+    with Session(engine) as session:
+        file_paths = session.exec(
+            select(Item.file_path).where(Item.file_path.isnot(None), Item.thumbnail_path.is_(None)).distinct()
+        ).all()
+    created = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for file_path in file_paths:
+            try:
+                created += await generate_thumbnail(file_path, executor, engine) is not None
+            except Exception as e:
+                logger.error(f"❌ Thumbnail for {file_path} failed: {type(e).__name__}: {e}")
+    return created
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    print(f"✅ {asyncio.run(_backfill(engine, max(THUMBNAIL_WORKERS, 1)))} thumbnails set")
@@ -0,0 +1,54 @@
+# utils/unread_counts.py
+"""
+Unread notification counts for the polled /notifications/unread-count.
+
+Counts come from COUNT(*) on the (user_id, is_read) index and are cached per
+user. Every path that creates, reads or deletes notifications invalidates
+the user's entry, so a cache hit (and a matching ETag) costs no DB work.
+"""
+import os
+from typing import Optional
+
+from sqlmodel import Session, select, func
+
+from models.notification import Notification
+from utils import metrics
+from utils.cache import TTLCache
+
+UNREAD_CACHE_TTL = int(os.getenv("UNREAD_CACHE_TTL", "30"))
+UNREAD_CACHE_SIZE = int(os.getenv("UNREAD_CACHE_SIZE", "10000"))
+
+_cache = TTLCache(maxsize=UNREAD_CACHE_SIZE, ttl=UNREAD_CACHE_TTL)
+
+
+def count_unread(session: Session, user_id: int) -> int:
+    statement = select(func.count()).select_from(Notification).where(
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    )
+    return session.exec(statement).one()
+
+
+def get_cached_unread_count(user_id: int) -> Optional[int]:
+    return _cache.get(user_id)
+
+
+def cache_unread_count(user_id: int, count: int) -> int:
+    _cache.set(user_id, count)
+    return count
+
+
+def invalidate_unread_count(user_id: int):
+    """Drop a user's cached count; call after notifications are created, read or deleted"""
+    _cache.invalidate(user_id)
+
+
+def unread_etag(count: int) -> str:
+    return f'W/"unread-{count}"'
+
+
+def unread_metrics() -> dict:
+    return {"cache": _cache.stats()}
+
+
+metrics.register("unread_counts", unread_metrics)
@@ -0,0 +1,70 @@
+# utils/upload_limit.py
+"""
+ASGI middleware capping the size of multipart request bodies.
+
+A declared Content-Length over the cap is rejected before any body is read.
+Bodies without one (chunked transfer encoding) are counted as they arrive
+and rejected as soon as they cross the cap, instead of being spooled in full.
+"""
+import logging
+
+from starlette.datastructures import Headers
+from starlette.requests import ClientDisconnect
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_METHODS = ("POST", "PUT", "PATCH")
+
+
+class UploadSizeLimitMiddleware:
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in UPLOAD_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if "multipart/form-data" not in headers.get("content-type", ""):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        content_length = headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            logger.warning(f"File upload too large: {content_length} bytes from {client}")
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request" and not rejected:
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    rejected = True
+                    logger.warning(f"File upload too large: over {received} bytes streamed from {client}")
+                    await self._reject(scope, receive, send)
+                    # The app stops reading; its own response is dropped below
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except ClientDisconnect:
+            # Raised by the app reading past the cut-off; the 413 is already sent
+            if not rejected:
+                raise
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse(status_code=413, content={"detail": "File too large. Maximum size is 10MB."})
+        await response(scope, receive, send)
@@ -0,0 +1,130 @@
+# utils/upload_serving.py
+"""
+HTTP delivery of stored uploads.
+
+serve_upload() answers a GET for a file in the upload storage
+(utils/storage.py):
+
+- A content-addressed file (<sha256>.<ext>) never changes under its key.
+  It gets a strong ETag of its whole key (hash and suffix, so a thumbnail
+  never shares the ETag of its source file) and
+  `Cache-Control: private, max-age=31536000, immutable`, so a browser
+  reuses its copy without asking. A revalidation (If-None-Match) is
+  answered 304 without touching the storage.
+- A Range request is answered 206, including with If-Range. A PDF viewer
+  can then fetch the pages it shows instead of the whole file.
+- Local files are sent by FileResponse, which hands the path to the server
+  (http.response.pathsend, i.e. sendfile) where the server supports it.
+  Behind nginx, UPLOAD_ACCEL_REDIRECT passes the transfer to nginx with
+  X-Accel-Redirect once the request is authorized. nginx then does the
+  sendfile and the Range handling, and no byte passes through Python.
+- S3 objects are streamed with a ranged GET.
+"""
+import mimetypes
+import os
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from utils.storage import get_storage, is_content_addressed, shard_path
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+# Internal nginx location serving UPLOAD_DIR, e.g. /_uploads/ (empty: send from Python)
+UPLOAD_ACCEL_REDIRECT = os.getenv("UPLOAD_ACCEL_REDIRECT", "")
+
+
+class RangeNotSatisfiable(ValueError):
+    """The requested range starts past the end of the file"""
+
+
+def content_etag(key: str) -> Optional[str]:
+    """Strong ETag of a content-addressed key: the key itself"""
+    if not is_content_addressed(key):
+        return None
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    (start, end) with an inclusive end for a single `bytes=` range; None
+    when the whole file should be sent (other units, several ranges or a
+    malformed header). Raises RangeNotSatisfiable.
+    """
+    units, _, spec = header.partition("=")
+    first, dash, last = spec.strip().partition("-")
+    if units.strip().lower() != "bytes" or not dash or "," in spec:
+        return None
+    if not (first.isdigit() or first == "") or not (last.isdigit() or last == ""):
+        return None
+
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        if int(last) == 0:
+            raise RangeNotSatisfiable(header)
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+async def serve_upload(request: Request, key: str) -> Response:
+    """Response for a GET of a stored upload"""
+    storage = get_storage()
+    etag = content_etag(key)
+    headers = {"cache-control": IMMUTABLE_CACHE_CONTROL if etag else REVALIDATE_CACHE_CONTROL}
+    if etag:
+        headers["etag"] = etag
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+    try:
+        size = await storage.size(key)
+    except ValueError:
+        size = None
+    if size is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+    local_path = storage.local_path(key)
+    if local_path and UPLOAD_ACCEL_REDIRECT:
+        headers["x-accel-redirect"] = f"{UPLOAD_ACCEL_REDIRECT.rstrip('/')}/{shard_path(key)}"
+        return Response(headers=headers, media_type=media_type)
+    if local_path:
+        # Handles Range and If-Range itself, against the ETag set here
+        return FileResponse(local_path, media_type=media_type, headers=headers)
+
+    headers["accept-ranges"] = "bytes"
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or (etag is not None and if_range == etag)):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            headers["content-length"] = str(end - start + 1)
+            return StreamingResponse(
+                storage.stream(key, start, end), status_code=206, media_type=media_type, headers=headers
+            )
+
+    headers["content-length"] = str(size)
+    return StreamingResponse(storage.stream(key), media_type=media_type, headers=headers)
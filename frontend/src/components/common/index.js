@@ -4,3 +4,4 @@ export { default as BaseModal } from './BaseModal.vue'
 export { default as Alert } from './Alert.vue'
 export { default as LoadingSpinner } from './LoadingSpinner.vue'
 export { default as EmptyState } from './EmptyState.vue'
+export { default as AuthorizedImage } from './AuthorizedImage.vue'
@@ -4,3 +4,4 @@ export { useModal } from "./useModal"
 export { useForm } from "./useForm"
 export { usePagination } from "./usePagination"
 export { useItemStatus } from "./useItemStatus"
+export { useAuthorizedFile, openAuthorizedFile } from "./useAuthorizedFile"
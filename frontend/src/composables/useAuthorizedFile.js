@@ -0,0 +1,49 @@
+import { onBeforeUnmount, ref, toValue, watch } from "vue"
+import { apiFetch } from "../utils/api"
+
+// Attachments are served to their owner only (GET /items/:id/file and
+// /items/:id/thumbnail), and <img src> or <a href> cannot send the bearer
+// token: fetch them with apiFetch and use an object URL instead.
+export function useAuthorizedFile(path) {
+  const url = ref(null)
+
+  function release() {
+    if (url.value) URL.revokeObjectURL(url.value)
+    url.value = null
+  }
+
+  async function load(target) {
+    release()
+    if (!target) return
+    const res = await apiFetch(target)
+    if (!res || !res.ok) return
+    const blob = await res.blob()
+    // The path changed while this one was loading
+    if (toValue(path) !== target) return
+    release()
+    url.value = URL.createObjectURL(blob)
+  }
+
+  watch(() => toValue(path), load, { immediate: true })
+  onBeforeUnmount(release)
+
+  return { url }
+}
+
+// Open an attachment in a new tab (call from a click handler, so the tab is not blocked)
+export async function openAuthorizedFile(path) {
+  const tab = window.open("", "_blank")
+  const res = await apiFetch(path)
+  if (!res || !res.ok) {
+    tab?.close()
+    return false
+  }
+  const url = URL.createObjectURL(await res.blob())
+  if (tab) {
+    tab.location.href = url
+  } else {
+    window.location.href = url
+  }
+  setTimeout(() => URL.revokeObjectURL(url), 60_000)
+  return true
+}